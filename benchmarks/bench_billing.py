@@ -0,0 +1,67 @@
+"""
+Benchmark for the weekly billing run.
+
+Seeds a scratch database with 100k customers, each with one Abo, spread over 50 cafés,
+and bills one week with billing_service.run. Then checks that the run is idempotent:
+billing the week again charges nothing, and a run interrupted after half of the
+customers resumes from its checkpoint without charging anybody twice. Fails if the
+full run exceeds the budget.
+
+Usage:
+    python -m benchmarks.bench_billing [--customers 100000]
+"""
+import argparse
+import sys
+from sqlalchemy import delete, func, select, update
+from benchmarks.seed import scratch_session, seed
+from models.model import BillingRun, Charge, Customer
+from services import billing_service
+
+BUDGET_SECONDS = 10.0
+YEAR, WEEK = 2025, 24
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--cafes", type=int, default=50)
+    return parser.parse_args()
+
+
+def main(args):
+    db = scratch_session()
+    seed(db, cafes=args.cafes, customers=args.customers, events=0, year=YEAR, week=WEEK)
+
+    result = billing_service.run(db, YEAR, WEEK)
+    print(f"full run:  {result.customers:,} customers, {result.charges:,} Abos, {result.amount:,} in total, "
+          f"{result.payouts} payouts in {result.batches} batches, {result.seconds:.2f} s")
+    failures = []
+    if result.seconds > BUDGET_SECONDS:
+        failures.append(f"full run took {result.seconds:.2f} s, budget {BUDGET_SECONDS:.0f} s")
+
+    again = billing_service.run(db, YEAR, WEEK)
+    print(f"re-run:    {again.batches} batches, {again.seconds:.2f} s")
+    if again.batches or again.amount != result.amount:
+        failures.append("re-running a billed week changed it")
+
+    # Simulate a crash after half of the customers: the first half is charged and
+    # checkpointed, the second half is not.
+    half = db.scalar(select(Customer.id).order_by(Customer.id).offset(args.customers // 2 - 1).limit(1))
+    db.execute(delete(Charge).where(Charge.customer_id > half))
+    db.execute(update(BillingRun).values(status="running", cursor=half))
+    db.commit()
+    resumed = billing_service.run(db, YEAR, WEEK)
+    print(f"resumed:   {resumed.batches} batches, {resumed.seconds:.2f} s")
+    abos = db.scalar(select(func.count(func.distinct(Charge.abo_id))))
+    if resumed.amount != result.amount or resumed.charges != result.charges or abos != resumed.charges:
+        failures.append("the resumed run did not charge every Abo exactly once")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,95 @@
+"""
+Benchmark for the streaming drink history export.
+
+Seeds a temporary database with the drink history of one customer and streams it with
+export_service.customer_drinks, once for a small and once for a large history. Prints
+the throughput and the peak memory allocated while streaming (tracemalloc), which must
+not grow with the size of the history.
+
+Usage:
+    python -m benchmarks.bench_export [--events 200000] [--format ndjson]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000, help="Size of the large history")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    return parser.parse_args()
+
+
+def seed(customer_id: str, events: int):
+    from sqlalchemy import insert
+    from database import SessionLocal
+    from models.model import DrinkEvent
+
+    start = datetime(2024, 1, 1)
+    db = SessionLocal()
+    try:
+        for offset in range(0, events, 10_000):
+            db.execute(insert(DrinkEvent), [
+                {"customer_id": customer_id, "cafe_id": "bench", "drink": "Espresso",
+                 "timestamp": start + timedelta(minutes=i)}
+                for i in range(offset, min(events, offset + 10_000))
+            ])
+            db.commit()
+    finally:
+        db.close()
+
+
+async def stream(customer_id: str, fmt: str):
+    from services import export_service
+
+    size = 0
+    async for chunk in export_service.customer_drinks(customer_id, fmt):
+        size += len(chunk)
+    return size
+
+
+def measure(customer_id: str, fmt: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = asyncio.run(stream(customer_id, fmt))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main(args):
+    import migrations
+    from database import engine
+
+    migrations.upgrade(engine)
+    sizes = {"small": args.events // 20, "large": args.events}
+    for name, events in sizes.items():
+        seed(name, events)
+
+    # Warm up imports and the connection pool outside the measurement
+    asyncio.run(stream("nobody", args.format))
+    peaks = []
+    for name, events in sizes.items():
+        size, elapsed, peak = measure(name, args.format)
+        peaks.append(peak)
+        print(f"{events:>9} events: {size / 2**20:7.1f} MiB {args.format} in {elapsed:5.2f} s "
+              f"({events / elapsed:,.0f} events/s), peak memory {peak / 2**20:5.1f} MiB")
+    print(f"peak memory grew by a factor of {peaks[1] / peaks[0]:.2f} for {sizes['large'] // sizes['small']}x the events")
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    # Must be set before the engines are imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        main(arguments)
+    finally:
+        os.remove(path)
@@ -0,0 +1,45 @@
+"""
+Microbenchmark for password hashing settings.
+
+Reports hashes and verifications per second and core for each scheme/cost combination,
+to pick BCRYPT_ROUNDS / PBKDF2_ROUNDS that fit the login rate of the hardware.
+
+Usage:
+    python -m benchmarks.bench_hashing [--bcrypt-rounds 10 11 12 13] [--pbkdf2-rounds 29000 100000]
+"""
+import argparse
+import time
+from utils.security import make_crypt_context
+
+MIN_SECONDS = 1.0
+
+
+def rate(func) -> float:
+    """Calls func repeatedly for at least MIN_SECONDS and returns calls per second."""
+    calls, start = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < MIN_SECONDS:
+        func()
+        calls += 1
+    return calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="*", default=[10, 11, 12, 13])
+    parser.add_argument("--pbkdf2-rounds", type=int, nargs="*", default=[29000, 100000, 300000])
+    args = parser.parse_args()
+
+    settings = [("bcrypt", {"bcrypt_rounds": r}, r) for r in args.bcrypt_rounds]
+    settings += [("pbkdf2_sha256", {"pbkdf2_rounds": r}, r) for r in args.pbkdf2_rounds]
+
+    print(f"{'scheme':<15}{'rounds':>8}{'hash/s':>10}{'verify/s':>10}{'ms/login':>10}")
+    for scheme, options, rounds in settings:
+        context = make_crypt_context([scheme], **options)
+        hashed = context.hash("benchmark-password")
+        hashes = rate(lambda: context.hash("benchmark-password"))
+        verifies = rate(lambda: context.verify("benchmark-password", hashed))
+        print(f"{scheme:<15}{rounds:>8}{hashes:>10.1f}{verifies:>10.1f}{1000 / verifies:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
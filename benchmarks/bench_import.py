@@ -0,0 +1,75 @@
+"""
+Benchmark for the bulk customer import.
+
+Writes a CSV file of synthetic customers and compares importing it with
+customer_import.import_customers against registering the customers one at a time
+(one hash and one commit per row, as POST /customers/ does). Prints the rates and the
+projected time for 50k customers. Hashing dominates both; the bulk import spreads it
+over all CPU cores, so its gain grows with the core count.
+
+Usage:
+    python -m benchmarks.bench_import [--rows 1000] [--rounds BCRYPT_ROUNDS] [--workers N]
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+TARGET_ROWS = 50_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, help="bcrypt cost, defaults to BCRYPT_ROUNDS")
+    parser.add_argument("--workers", type=int, help="Hashing processes, defaults to the CPU count")
+    return parser.parse_args()
+
+
+def write_csv(rows: int, offset: int = 0) -> str:
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "email", "password", "paymentMethod"])
+        for i in range(offset, offset + rows):
+            writer.writerow([f"Customer {i}", f"customer{i}@example.com", f"password-{i}", i % 2])
+    return path
+
+
+def main(args):
+    import datetime
+    from benchmarks.seed import scratch_session
+    from models.model import Customer
+    from services import customer_import
+    from utils.security import hash_password
+
+    db = scratch_session()
+
+    path = write_csv(args.rows)
+    start = time.perf_counter()
+    with open(path, newline="") as stream:
+        result = customer_import.import_customers(stream, "csv", db, workers=args.workers)
+    bulk = time.perf_counter() - start
+    assert result.imported == args.rows, result
+
+    path = write_csv(args.rows, offset=args.rows)
+    start = time.perf_counter()
+    with open(path, newline="") as stream:
+        for row in csv.DictReader(stream):
+            db.add(Customer(name=row["name"], email=row["email"], hashed_password=hash_password(row["password"]),
+                            paymentMethod=int(row["paymentMethod"]), lastPaid=datetime.date.today(), activated=True))
+            db.commit()
+    single = time.perf_counter() - start
+
+    for mode, seconds in (("one by one", single), ("bulk import", bulk)):
+        rate = args.rows / seconds
+        print(f"{mode:>11}: {rate:8.1f} rows/s, 50k customers in {TARGET_ROWS / rate / 60:6.1f} min")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.rounds:
+        # Must be set before utils.security builds its hashing context
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    main(args)
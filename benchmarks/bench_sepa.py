@@ -0,0 +1,84 @@
+"""
+Benchmark for the SEPA payout file generation.
+
+Seeds a scratch database with the payouts of 10k cafés, each with a valid IBAN and BIC,
+writes their SEPA credit transfer file with sepa_export.write and validates it. Prints
+the time and the peak memory allocated while writing (tracemalloc), which stays at a
+single payment batch, and fails if the file does not validate or a payout is missing.
+
+Usage:
+    python -m benchmarks.bench_sepa [--payouts 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from sqlalchemy import insert
+from benchmarks.seed import scratch_session
+from models.model import Payout
+from services import sepa_export
+import config
+
+YEAR, WEEK = 2025, 24
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payouts", type=int, default=10_000)
+    return parser.parse_args()
+
+
+def iban(bank_code: str, account: int) -> str:
+    bban = f"{bank_code}{account:010d}"
+    check = 98 - int(f"{bban}131400") % 97
+    return f"DE{check:02d}{bban}"
+
+
+def seed(db, payouts: int):
+    rnd = random.Random(42)
+    db.execute(insert(Payout), [
+        {"cafe_id": f"cafe_{i}", "year": YEAR, "week": WEEK, "iban": iban("50010517", i), "bic": "INGDDEFFXXX",
+         "account_holder": f"Café Nr. {i} & Söhne", "amount": rnd.randrange(50, 5000), "charges": rnd.randrange(5, 500)}
+        for i in range(payouts)
+    ])
+    db.commit()
+
+
+def main(args):
+    config.SEPA_DEBTOR_IBAN = iban("37040044", 532013000)
+    config.SEPA_DEBTOR_BIC = "COBADEFFXXX"
+    db = scratch_session()
+    seed(db, args.payouts)
+    fd, path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        result = sepa_export.write(db, YEAR, WEEK, path, date(2025, 6, 16))
+        elapsed = time.perf_counter() - start
+        # tracemalloc slows writing down considerably, so memory is measured in a second run
+        tracemalloc.start()
+        sepa_export.write(db, YEAR, WEEK, path, date(2025, 6, 16))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"wrote {result.transactions:,} transfers ({result.amount} {sepa_export.CURRENCY}) in "
+              f"{result.batches} batches: {os.path.getsize(path) / 2**20:.1f} MiB in {elapsed:.2f} s, "
+              f"peak memory {peak / 2**20:.1f} MiB")
+
+        start = time.perf_counter()
+        sepa_export.validate(path)
+        print(f"validated against {os.path.basename(config.SEPA_SCHEMA)} in {time.perf_counter() - start:.2f} s")
+    except ValueError as e:
+        sys.exit(f"FAIL: {e}")
+    finally:
+        os.remove(path)
+    if result.transactions != args.payouts or result.skipped:
+        sys.exit(f"FAIL: {len(result.skipped)} payouts were left out")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main(parse_args())
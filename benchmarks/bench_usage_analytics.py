@@ -0,0 +1,153 @@
+"""
+Benchmark for the vectorized usage analytics.
+
+Generates one million synthetic drink events for 50 cafés, 4 AboModels and 20k Abos
+over four weeks and measures usage_analytics.compute. The same statistics are computed
+with a plain Python loop per event as a baseline; both results must agree.
+
+Then seeds a scratch SQLite database with as many events and measures the whole
+endpoint path: usage_analytics.load, which reads the events into arrays, and compute.
+Finally one café is deleted; the report must skip its events and be unchanged for the rest.
+
+Usage:
+    python -m benchmarks.bench_usage_analytics [--events 1000000] [--skip-db]
+"""
+import argparse
+import math
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import delete
+from benchmarks import seed as seeding
+from models.model import Cafe
+from services import usage_analytics
+
+START = date(2025, 6, 2)
+DAYS = 28
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--cafes", type=int, default=50)
+    parser.add_argument("--abos", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-db", action="store_true", help="Only benchmark compute on synthetic arrays")
+    return parser.parse_args()
+
+
+def synthetic(events: int, cafes: int, abos: int, seed: int) -> usage_analytics.UsageData:
+    rng = np.random.default_rng(seed)
+    abo_cafe = rng.integers(0, cafes, abos, dtype=np.int32)
+    event_abo = rng.integers(-1, abos, events, dtype=np.int32)
+    start_us = (np.datetime64(START, "us") - np.datetime64(0, "us")).astype(np.int64)
+    return usage_analytics.UsageData(
+        start=START,
+        end=START + timedelta(days=DAYS - 1),
+        cafe_ids=np.array([f"cafe-{c}" for c in range(cafes)], dtype=object),
+        model_ids=np.array(["small", "medium", "large", "flat"], dtype=object),
+        model_amount=np.array([3, 7, 14, np.nan]),
+        model_price=np.array([5.0, 10.0, 18.0, 25.0]),
+        abo_cafe=abo_cafe,
+        abo_model=rng.integers(0, 4, abos, dtype=np.int32),
+        event_cafe=np.where(event_abo >= 0, abo_cafe[event_abo], rng.integers(0, cafes, events)).astype(np.int32),
+        event_abo=event_abo,
+        event_time=start_us + rng.integers(0, DAYS * usage_analytics.US_PER_DAY, events),
+    )
+
+
+def baseline(data: usage_analytics.UsageData) -> dict:
+    """
+    Computes quota utilisation and drinks per weekday and hour with a loop per event.
+    """
+    epoch = datetime(1970, 1, 1)
+    by_hour = Counter()
+    abo_drinks = Counter()
+    for cafe, abo, us in zip(data.event_cafe.tolist(), data.event_abo.tolist(), data.event_time.tolist()):
+        served = epoch + timedelta(microseconds=us)
+        by_hour[(cafe, served.weekday(), served.hour)] += 1
+        if abo >= 0:
+            abo_drinks[abo] += 1
+
+    groups = defaultdict(lambda: [0, 0])
+    for abo, (cafe, model) in enumerate(zip(data.abo_cafe.tolist(), data.abo_model.tolist())):
+        groups[(cafe, model)][0] += 1
+        groups[(cafe, model)][1] += abo_drinks[abo]
+    weeks = ((data.end - data.start).days + 1) / 7
+    utilisation = {
+        key: drinks / (abos * data.model_amount[key[1]] * weeks)
+        for key, (abos, drinks) in groups.items() if not math.isnan(data.model_amount[key[1]])
+    }
+    return {"by_hour": by_hour, "utilisation": utilisation}
+
+
+def agrees(report, expected: dict) -> bool:
+    for c, cafe in enumerate(report.cafes):
+        for weekday, hours in enumerate(cafe.drinks_by_hour):
+            for hour, drinks in enumerate(hours):
+                if drinks != expected["by_hour"][(c, weekday, hour)]:
+                    return False
+        models = {model_id: m for m, model_id in enumerate(["small", "medium", "large", "flat"])}
+        for usage in cafe.models:
+            wanted = expected["utilisation"].get((c, models[usage.model_id]))
+            if (usage.quota_utilisation is None) != (wanted is None):
+                return False
+            if wanted is not None and not math.isclose(usage.quota_utilisation, wanted):
+                return False
+    return True
+
+
+def main(args):
+    data = synthetic(args.events, args.cafes, args.abos, args.seed)
+
+    start = time.perf_counter()
+    report = usage_analytics.compute(data)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = baseline(data)
+    looped = time.perf_counter() - start
+
+    print(f"{args.events:,} events, {args.abos:,} Abos, {args.cafes} cafés")
+    print(f"vectorized: {vectorized:6.3f} s ({args.events / vectorized:,.0f} events/s)")
+    print(f"baseline:   {looped:6.3f} s ({args.events / looped:,.0f} events/s), "
+          f"{looped / vectorized:.0f}x slower")
+    if not agrees(report, expected):
+        raise SystemExit("Vectorized result differs from the baseline")
+    print("results agree")
+    if not args.skip_db:
+        database(args)
+
+
+def database(args):
+    year, week, _ = (START + timedelta(days=DAYS - 1)).isocalendar()
+    db = seeding.scratch_session()
+    start = time.perf_counter()
+    seeding.seed(db, cafes=args.cafes, customers=args.abos, events=args.events, year=year, week=week,
+                 weeks=DAYS // 7, seed=args.seed)
+    print(f"seeded {args.events:,} events into SQLite in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    data = usage_analytics.load(db, START, START + timedelta(days=DAYS - 1))
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    report = usage_analytics.compute(data)
+    computed = time.perf_counter() - start
+    print(f"load:       {loaded:6.3f} s ({len(data.event_time) / loaded:,.0f} events/s)")
+    print(f"compute:    {computed:6.3f} s, {loaded + computed:.3f} s in total")
+    if len(data.event_time) != args.events:
+        raise SystemExit(f"Loaded {len(data.event_time):,} of {args.events:,} events")
+
+    # Deleting a café keeps its events; the report must skip them and leave the other cafés unchanged
+    deleted = report.cafes[0].cafe_id
+    db.execute(delete(Cafe).where(Cafe.id == deleted))
+    db.commit()
+    remaining = usage_analytics.usage_report(db, START, START + timedelta(days=DAYS - 1))
+    if remaining.cafes != report.cafes[1:]:
+        raise SystemExit(f"Report differs for the other cafés after deleting {deleted}")
+    print(f"results agree after deleting {deleted}")
+
+
+if __name__ == "__main__":
+    main(parse_args())
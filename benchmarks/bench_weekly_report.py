@@ -0,0 +1,41 @@
+"""
+Benchmark for the weekly report engine.
+
+Seeds a scratch database with one café holding 100k drink events, all in the report
+week as the worst case, and measures report_service.weekly_report_data. Fails if the
+median run exceeds the one second budget.
+
+Usage:
+    python -m benchmarks.bench_weekly_report
+"""
+import statistics
+import sys
+import time
+from benchmarks.seed import scratch_session, seed
+from services import report_service
+
+BUDGET_SECONDS = 1.0
+RUNS = 5
+
+
+def main():
+    db = scratch_session()
+    cafe_id = seed(db, customers=2000, events=100_000, year=2025, week=24)[0]
+
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        report = report_service.weekly_report_data(cafe_id, 2025, 24, db)
+        timings.append(time.perf_counter() - start)
+
+    median = statistics.median(timings)
+    print(f"drinks served: {report.drinks_served}, abo users: {report.abo_users}")
+    print(f"weekly_report_data: median {median * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms over {RUNS} runs")
+    if median > BUDGET_SECONDS:
+        print(f"FAIL: above budget of {BUDGET_SECONDS:.1f} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Blocking check for the async endpoints.
+
+An `async def` endpoint runs on the event loop, so a statement sent through the sync
+engine from it stalls every other request until the database answers. This check
+calls each async endpoint and records the statements the sync engine executes on the
+thread of a running event loop; sync endpoints run in the threadpool and the async
+engine awaits its driver, so neither is reported. Any recorded statement fails the check.
+
+Usage:
+    python -m benchmarks.check_event_loop
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+CAFE = {"id": "Loop Cafe", "iban": "DE44500105175407324931", "bic": "DEUTDEFF",
+        "account_holder": "Bench", "abomodels": ["loop_model"]}
+
+# (method, path, request arguments); {customer} is the ID of the registered customer
+ENDPOINTS = [
+    ("POST", "/customers/", {"json": {"name": "Loop", "password": "pw", "email": "loop@example.com",
+                                      "paymentMethod": 0}}),
+    ("POST", "/customers/login", {"data": {"email": "loop@example.com", "password": "pw"}}),
+    ("PATCH", "/customers/{customer}", {"json": {"name": "Loop 2", "password": "pw2"}}),
+    ("GET", "/customers/{customer}/overview", {}),
+    ("GET", "/customers/{customer}/details", {}),
+    ("GET", "/customers/{customer}/drinks", {}),
+    ("GET", "/customers/{customer}/drinks/export", {}),
+    ("POST", "/employees/", {"json": {"id": "loop", "name": "Loop", "password": "pw", "sudo": True,
+                                      "cafe_id": "Loop_Cafe"}}),
+    ("POST", "/employees/login", {"data": {"employee_id": "loop", "cafe_id": "Loop_Cafe", "password": "pw"}}),
+    ("PATCH", "/employees/", {"json": {"id": "loop", "cafe_id": "Loop_Cafe", "password": "pw2"}}),
+    ("GET", "/employees/Loop_Cafe/employee/loop", {}),
+    ("GET", "/employees/Loop_Cafe/employees", {}),
+    ("GET", "/abomodels/", {}),
+    ("GET", "/abomodels/loop_model", {}),
+    ("GET", "/cafes/", {}),
+    ("GET", "/cafes/Loop_Cafe", {}),
+    ("GET", "/cafes/Loop_Cafe/abo", {}),
+    ("POST", "/abo/", {"json": {"model_id": "loop_model", "cafe_id": "Loop_Cafe", "customer_id": "{customer}"}}),
+]
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def main():
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    import migrations
+    from database import engine
+    from main import app
+    from services import catalogue_cache
+
+    migrations.upgrade(engine)
+    client = TestClient(app)
+    client.post("/abomodels/", json={"id": "loop_model", "specialdrinks": False, "priceperweek": 7,
+                                     "amount": 3}).raise_for_status()
+    client.post("/cafes/", json=CAFE).raise_for_status()
+
+    blocking = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if _on_event_loop():
+            blocking.append(statement)
+
+    customer, token = None, None
+    failed = False
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for method, path, kwargs in ENDPOINTS:
+            # Cold cache, so that the cached endpoints read the database as well
+            catalogue_cache.invalidate()
+            if "json" in kwargs and "customer_id" in kwargs["json"]:
+                kwargs = {"json": {**kwargs["json"], "customer_id": customer}}
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            blocking.clear()
+            response = client.request(method, path.format(customer=customer), headers=headers, **kwargs)
+            response.raise_for_status()
+            if path == "/customers/":
+                customer = response.json()["id"]
+            if path == "/employees/login":
+                token = response.json()["access_token"]
+            ok = not blocking
+            failed |= not ok
+            print(f"{'ok' if ok else 'FAIL':>4}  {method} {path}: {len(blocking)} sync statements on the event loop")
+            for statement in blocking:
+                print(f"        {' '.join(statement.split())[:100]}")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    # Must be set before the app (and thereby the engines) is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    main()
@@ -0,0 +1,79 @@
+"""
+N+1 check for the café and AboModel endpoints.
+
+Runs each endpoint against a café linked to few and to many AboModels and counts the
+SQL statements with utils.query_counter. The count must not grow with the number of
+AboModels and must stay within the endpoint's budget; otherwise the check fails.
+Endpoints are measured with a cold catalogue cache; the cached ones are then requested
+again and must not run any statement.
+
+Usage:
+    python -m benchmarks.check_query_counts
+"""
+import os
+import sys
+import tempfile
+
+SMALL, LARGE = 2, 25
+
+# Statements per request: (method, path, body, budget). {n} is the number of AboModels.
+# PATCH also updates the café row, so that its row version (ETag) changes with new links.
+ENDPOINTS = [
+    ("POST", "/cafes/", lambda n: {"id": f"cafe {n}", "iban": "DE44500105175407324931", "bic": "DEUTDEFF",
+                                  "account_holder": "Bench", "abomodels": [f"model_{i}" for i in range(n)]}, 4),
+    ("PATCH", "/cafes/", lambda n: {"id": f"cafe_{n}", "iban": "DE44500105175407324931", "bic": "DEUTDEFF",
+                                   "account_holder": "Bench", "abomodels": [f"model_{i}" for i in range(2 * n)]}, 5),
+    ("GET", "/cafes/cafe_{n}/abo", None, 2),
+    ("GET", "/cafes/", None, 1),
+    ("GET", "/abomodels/", None, 1),
+    ("GET", "/abomodels/model_0", None, 1),
+]
+# Served from the catalogue cache once loaded
+CACHED = ["/cafes/cafe_{n}/abo", "/abomodels/"]
+
+
+def main():
+    from fastapi.testclient import TestClient
+    import migrations
+    from database import async_engine, engine
+    from main import app
+    from services import catalogue_cache
+    from utils.query_counter import QueryCounter
+
+    migrations.upgrade(engine)
+    client = TestClient(app)
+    for i in range(2 * LARGE):
+        client.post("/abomodels/", json={"id": f"model_{i}", "specialdrinks": False, "priceperweek": 7, "amount": 3})
+
+    failed = False
+    for method, path, body, budget in ENDPOINTS:
+        counts = []
+        for n in (SMALL, LARGE):
+            catalogue_cache.invalidate()
+            with QueryCounter(engine, async_engine.sync_engine) as counter:
+                response = client.request(method, path.format(n=n), json=body(n) if body else None)
+            response.raise_for_status()
+            counts.append(counter.count)
+        ok = counts[0] == counts[1] and counts[1] <= budget
+        failed |= not ok
+        print(f"{'ok' if ok else 'FAIL':>4}  {method} {path}: {counts[0]} statements with {SMALL} AboModels, "
+              f"{counts[1]} with {LARGE} (budget {budget})")
+
+    for path in CACHED:
+        for n in (SMALL, LARGE):
+            client.get(path.format(n=n)).raise_for_status()
+            with QueryCounter(engine, async_engine.sync_engine) as counter:
+                client.get(path.format(n=n)).raise_for_status()
+            ok = counter.count == 0
+            failed |= not ok
+            print(f"{'ok' if ok else 'FAIL':>4}  GET {path.format(n=n)} (cached): {counter.count} statements (budget 0)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    # Must be set before the app (and thereby the engines) is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    main()
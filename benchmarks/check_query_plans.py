@@ -0,0 +1,65 @@
+"""
+EXPLAIN check for the hot lookup queries.
+
+Seeds a scratch SQLite database without the lookup indexes, applies the migrations and
+asserts with EXPLAIN QUERY PLAN that none of the queries below scans a whole table.
+SQLite reports full scans as "SCAN <table>" without a "USING ... INDEX" clause.
+
+Usage:
+    python -m benchmarks.check_query_plans
+"""
+import sys
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import migrations
+from benchmarks.seed import scratch_session, seed
+from models.model import Abo, AboCafe, AboWeekUsage, Customer, DrinkEvent, Employee
+
+LOOKUP_INDEXES = ["ix_abos_customer_id", "ix_abos_cafe_id_model_id", "ix_employees_cafe_id",
+                  "ix_cafe_abomodel_abo_id"]
+
+QUERIES = {
+    "abo of customer": select(Abo.id).where(Abo.customer_id == "c"),
+    "abos of café and model": select(Abo).where(Abo.cafe_id == "cafe_0", Abo.model_id == "small"),
+    "abo redemption check": select(Abo.model_id).where(
+        Abo.id == "a", Abo.customer_id == "c", Abo.cafe_id == "cafe_0"),
+    "employees of café": select(Employee).where(Employee.cafe_id == "cafe_0"),
+    "employee login": select(Employee).where(Employee.id == "1", Employee.cafe_id == "cafe_0"),
+    "customer login": select(Customer).where(Customer.email == "customer1@example.com"),
+    "cafés of AboModel": select(AboCafe.c.cafe_id).where(AboCafe.c.abo_id == "small"),
+    "weekly quota counter": select(AboWeekUsage.count).where(
+        AboWeekUsage.abo_id == "a", AboWeekUsage.year == 2025, AboWeekUsage.week == 24),
+    "drink history": select(DrinkEvent).where(DrinkEvent.customer_id == "c", DrinkEvent.id < 100)
+    .order_by(DrinkEvent.id.desc()).limit(20),
+}
+
+
+def query_plan(db: Session, statement) -> list:
+    sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def full_scans(plan: list) -> list:
+    return [step for step in plan if step.startswith("SCAN ") and " USING " not in step]
+
+
+def main():
+    db = scratch_session()
+    seed(db, cafes=5, customers=2000, events=10_000)
+    for name in LOOKUP_INDEXES:
+        db.connection().exec_driver_sql(f"DROP INDEX {name}")
+    db.commit()
+    migrations.upgrade(db.get_bind())
+
+    failed = False
+    for name, statement in QUERIES.items():
+        plan = query_plan(db, statement)
+        scans = full_scans(plan)
+        failed |= bool(scans)
+        print(f"{'FAIL' if scans else 'ok':>4}  {name}: {'; '.join(plan)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Load test comparing the sync (threadpool) and async (event loop) database paths.
+
+Seeds a scratch database (or uses --url, e.g. a PostgreSQL database) and fires the same
+read requests at two variants of the café catalogue and customer overview endpoints:
+the app's async routes on AsyncSession, and sync `def` routes on the blocking Session,
+which Starlette runs on its 40-thread pool. Reports throughput and latency per mode.
+
+Keep --concurrency at or below the connection pool size (DB_POOL_SIZE + DB_MAX_OVERFLOW,
+set to 20 + 20 here unless given): a sync route keeps its connection until the get_db
+cleanup has run on the threadpool, so with more requests in flight than connections all
+threads can end up waiting for a checkout while the holders wait for a thread. The async
+routes only queue on the pool in that case.
+
+Usage:
+    python -m benchmarks.load_test [--requests 4000] [--concurrency 40] [--url DATABASE_URL]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--url", help="Database URL, defaults to a scratch SQLite file. "
+                                      "Only SQLite databases are seeded; others must hold data already")
+    return parser.parse_args()
+
+
+async def run(client, paths, total: int, concurrency: int):
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with gate:
+            start = time.perf_counter()
+            response = await client.get(paths[i % len(paths)])
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - start), latencies
+
+
+async def main(args):
+    import httpx
+    from fastapi import APIRouter, Depends
+    from sqlalchemy.orm import Session
+    from database import SessionLocal, get_db
+    from main import app
+    from models.model import Cafe, Customer
+    from schemas.cafe import CafeOutB
+    from schemas.customer import CustomerOut
+    from services import cafe_service, customer_service
+    from benchmarks.seed import scratch_session, seed
+
+    if args.url.startswith("sqlite:///"):
+        seed_db = scratch_session(args.url[len("sqlite:///"):])
+        seed(seed_db, cafes=20, customers=2000, events=10_000)
+        seed_db.close()
+
+    db = SessionLocal()
+    cafe_ids = [c for (c,) in db.query(Cafe.id).limit(20)]
+    customer_ids = [c for (c,) in db.query(Customer.id).limit(200)]
+    db.close()
+
+    sync_routes = APIRouter(prefix="/sync")
+
+    @sync_routes.get("/cafes/{id}/abo", response_model=CafeOutB)
+    def sync_cafe(id: str, db: Session = Depends(get_db)):
+        return cafe_service.get_cafe_w_abos(id, db)
+
+    @sync_routes.get("/customers/{id}/overview", response_model=CustomerOut)
+    def sync_overview(id: str, db: Session = Depends(get_db)):
+        return customer_service.overview(id, db)
+
+    app.include_router(sync_routes)
+
+    paths = [f"/cafes/{c}/abo" for c in cafe_ids] + [f"/customers/{c}/overview" for c in customer_ids]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode, prefix in (("sync", "/sync"), ("async", "")):
+            await run(client, [prefix + p for p in paths], 200, args.concurrency)  # warm-up
+            throughput, latencies = await run(client, [prefix + p for p in paths], args.requests, args.concurrency)
+            latencies.sort()
+            print(f"{mode:>5}: {throughput:8.1f} req/s   p50 {statistics.median(latencies) * 1000:7.1f} ms   "
+                  f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.url:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        args.url = f"sqlite:///{path}"
+    # Must be set before the app (and thereby the engines) is imported
+    os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("DB_POOL_SIZE", "20")
+    os.environ.setdefault("DB_MAX_OVERFLOW", "20")
+    asyncio.run(main(args))
@@ -0,0 +1,97 @@
+"""
+seed.py
+
+Helpers that fill a scratch SQLite database with synthetic cafés, AboModels,
+customers, Abos and drink events for the benchmarks in this package.
+"""
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from database import Base
+from models.model import AboCafe, AboModel, Abo, Cafe, Customer, DrinkEvent
+from services import rollup_service
+
+DRINKS = ["Espresso", "Cappuccino", "Flat White", "Latte Macchiato", "Americano", "Chai Latte"]
+MODELS = [("small", 7, 3), ("medium", 11, 5), ("large", 15, 7)]
+
+
+def scratch_session(path: str = None) -> Session:
+    """
+    Creates a fresh SQLite database file with all tables and returns a session on it.
+
+    Args:
+        path (str): Database file, defaults to a new temporary file.
+
+    Returns:
+        Session: Session bound to the scratch database.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def seed(db: Session, cafes: int = 1, customers: int = 2000, events: int = 100_000,
+         year: int = 2025, week: int = 24, weeks: int = 1, seed: int = 42) -> list:
+    """
+    Inserts synthetic data with bulk executemany statements.
+
+    Events are spread uniformly over `weeks` ISO weeks ending with (year, week)
+    and over all cafés; 80 % of them are redeemed on the customer's Abo. The drink
+    rollups are rebuilt afterwards, as after a bulk load in production.
+
+    Returns:
+        list: The IDs of the created cafés.
+    """
+    rnd = random.Random(seed)
+    cafe_ids = [f"cafe_{i}" for i in range(cafes)]
+
+    db.execute(insert(AboModel), [
+        {"id": m, "specialdrinks": False, "priceperweek": p, "amount": a} for m, p, a in MODELS
+    ])
+    db.execute(insert(Cafe), [
+        {"id": c, "iban": "DE44500105175407324931", "bic": "DEUTDEFF", "account_holder": c}
+        for c in cafe_ids
+    ])
+    db.execute(insert(AboCafe), [
+        {"cafe_id": c, "abo_id": m} for c in cafe_ids for m, _, _ in MODELS
+    ])
+
+    customer_rows, abo_rows = [], []
+    for i in range(customers):
+        customer_id = str(uuid4())
+        customer_rows.append({
+            "id": customer_id, "name": f"Customer {i}", "hashed_password": "x",
+            "email": f"customer{i}@example.com", "paymentMethod": i % 2,
+            "drinksDrunk": 0, "activated": True
+        })
+        abo_rows.append({
+            "id": str(uuid4()), "customer_id": customer_id,
+            "cafe_id": cafe_ids[i % cafes], "model_id": MODELS[i % len(MODELS)][0]
+        })
+    db.execute(insert(Customer), customer_rows)
+    db.execute(insert(Abo), abo_rows)
+
+    end = datetime.fromisocalendar(year, week, 1) + timedelta(days=7)
+    span = int(timedelta(days=7 * weeks).total_seconds())
+    event_rows = []
+    for _ in range(events):
+        abo = abo_rows[rnd.randrange(customers)]
+        event_rows.append({
+            "customer_id": abo["customer_id"],
+            "cafe_id": abo["cafe_id"],
+            "abo_id": abo["id"] if rnd.random() < 0.8 else None,
+            "drink": rnd.choice(DRINKS),
+            "timestamp": end - timedelta(seconds=rnd.randrange(1, span))
+        })
+    if event_rows:
+        db.execute(insert(DrinkEvent), event_rows)
+    db.commit()
+    rollup_service.rebuild(db)
+    return cafe_ids
@@ -3,17 +3,20 @@ This module defines routes for managing Abonnements (subscriptions) in the Coffe
 
 Endpoints:
 - POST /abo/: Create a new Abo (subscription) for a user.
+- GET /abo/{id}/quota: Weekly quota of an Abo with used and remaining drinks.
 
 All endpoints require a valid access token and interact with the Abo service layer.
 """
 
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from schemas.abo import AboCreate
-from schemas.token import Token
-from services import abo_service
-from database import get_db
+from schemas.abo import AboCreate, AboQuotaOut
+from schemas.token import TokenData
+from services import abo_service, quota_service, report_service
+from database import get_async_db, get_db
 from utils.security import verify_access_token
 
 router = APIRouter(
@@ -22,18 +25,18 @@ router = APIRouter(
 )
 
 @router.post("/", summary="Create a new subscription (Abo)")
-def create_new_abonnement(
+async def create_new_abonnement(
     abo: AboCreate,
-    db: Session = Depends(get_db),
-    token_data: Token = Depends(verify_access_token)  # auto-extracts and validates token
+    db: AsyncSession = Depends(get_async_db),
+    token_data: TokenData = Depends(verify_access_token)  # auto-extracts and validates token
 ):
     """
     Creates a new Abo (subscription) for the authenticated user.
 
     Args:
         abo (AboCreate): The Abo creation payload containing model_id, start date, etc.
-        db (Session): SQLAlchemy session for database operations.
-        token_data (Token): Decoded token data containing the user's identity and roles.
+        db (AsyncSession): Async SQLAlchemy session for database operations.
+        token_data (TokenData): Decoded token data containing the user's identity and roles.
 
     Returns:
         dict: A dictionary representing the newly created Abo.
@@ -44,4 +47,31 @@ def create_new_abonnement(
     This endpoint allows a non-admin user to register an Abo for a customer.
     Only valid users with a token can access this route.
     """
-    return abo_service.create_abo(abo, db, token_data)
+    return await abo_service.create_abo(abo, db, token_data)
+
+
+@router.get("/{id}/quota", response_model=AboQuotaOut, summary="Weekly quota of an Abo")
+def get_abo_quota(
+    id: str,
+    year: Optional[int] = None,
+    week: Optional[int] = None,
+    db: Session = Depends(get_db),
+    token_data: TokenData = Depends(verify_access_token)
+):
+    """
+    Returns how many drinks of an Abo's weekly quota are used and how many are left,
+    e.g. to show at the counter before a drink is redeemed.
+
+    Args:
+        id (str): ID of the Abo.
+        year (Optional[int]): ISO year, defaults to the current week's year.
+        week (Optional[int]): ISO week number, defaults to the current week.
+        db (Session): SQLAlchemy session for database operations.
+        token_data (TokenData): Decoded token of the caller.
+
+    Returns:
+        AboQuotaOut: Quota, used and remaining drinks of the week.
+    """
+    if year is None or week is None:
+        year, week = report_service.current_week()
+    return quota_service.quota(db, id, year, week)
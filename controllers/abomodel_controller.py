@@ -6,12 +6,14 @@ in the system. It includes endpoints for creating, updating, retrieving, and del
 subscription models used by cafés.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from schemas.abomodel import AboModelCreate, AboModelBase
 from services import abomodel_service
-from database import get_db
+from database import get_db, get_async_db
+from utils import etag, pagination
 
 router = APIRouter(prefix="/abomodels", tags=["abo models"])
 
@@ -47,36 +49,54 @@ def adjust_abomodel(model: AboModelCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[AboModelBase])
-def get_all_abomodels(db: Session = Depends(get_db)):
+async def get_all_abomodels(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Retrieve all AboModels from the database.
+    Retrieve a page of the AboModels, sorted by ID. The cursor of the next page
+    is returned in the X-Next-Cursor and Link headers. Answered with 304 from the
+    catalogue cache if the client's copy is current.
 
     Args:
-        db (Session): The database session dependency.
+        cursor (Optional[str]): Cursor of the page, omitted for the first page.
+        limit (int): Page size.
+        if_none_match (Optional[str]): ETag of the client's cached copy.
+        db (AsyncSession): The async database session dependency.
 
     Returns:
-        List[AboModelBase]: A list of all available subscription models.
+        List[AboModelBase]: The subscription models of the page, or 304.
     """
-    return abomodel_service.get_all(db)
+    page = await abomodel_service.get_all_versioned_async(db, cursor, limit)
+    not_modified = etag.conditional(page, response, if_none_match, None)
+    if not_modified:
+        return not_modified
+    models, next_cursor = page.value
+    pagination.link_next(request, response, next_cursor)
+    return models
 
 
 @router.get("/{id}", response_model=AboModelBase)
-def get_by_id(ida: str, db: Session = Depends(get_db)):
+async def get_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve a single AboModel by its ID.
 
     Args:
         id (str): The ID of the subscription model.
-        db (Session): The database session dependency.
+        db (AsyncSession): The async database session dependency.
 
     Returns:
         AboModelBase: The matching subscription model.
     """
-    return abomodel_service.get_by_id(ida, db)
+    return await abomodel_service.get_by_id_async(id, db)
 
 
 @router.delete("/{id}")
-def delete_model(ida: str, db: Session = Depends(get_db)):
+def delete_model(id: str, db: Session = Depends(get_db)):
     """
     Delete an AboModel by its ID.
 
@@ -87,4 +107,4 @@ def delete_model(ida: str, db: Session = Depends(get_db)):
     Returns:
         dict: A confirmation message after deletion.
     """
-    return abomodel_service.delete_by_id(ida, db)
+    return abomodel_service.delete_by_id(id, db)
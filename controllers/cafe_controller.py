@@ -3,14 +3,21 @@ cafe_routes.py
 
 Defines API routes for managing cafés in the system. Includes endpoints
 to create, update, retrieve, and delete café records, as well as retrieve
-a café with its associated subscription models (AboModels).
+a café with its associated subscription models (AboModels), and to export
+the drinks a café served.
 """
-from typing import List
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from schemas.cafe import CafeCreate, CafeOut, CafeOutB
-from services import cafe_service
-from database import get_db
+from schemas.token import TokenData
+from services import cafe_service, export_service
+from database import get_db, get_async_db
+from utils import etag, pagination
+from utils.security import verify_access_token
 
 router = APIRouter(prefix="/cafes", tags=["cafe"])
 
@@ -46,32 +53,43 @@ def patch_cafe(model: CafeCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[CafeOut])
-def get_cafes(db: Session = Depends(get_db)):
+async def get_cafes(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Retrieve a list of all cafés in the system.
+    Retrieve a page of the cafés in the system, sorted by ID. The cursor of the
+    next page is returned in the X-Next-Cursor and Link headers.
 
     Args:
-        db (Session): The database session dependency.
+        cursor (Optional[str]): Cursor of the page, omitted for the first page.
+        limit (int): Page size.
+        db (AsyncSession): The async database session dependency.
 
     Returns:
-        List[CafeOut]: A list of all cafés.
+        List[CafeOut]: The cafés of the page.
     """
-    return cafe_service.get_all_cafes(db)
+    cafes, next_cursor = await cafe_service.get_all_cafes_async(db, cursor, limit)
+    pagination.link_next(request, response, next_cursor)
+    return cafes
 
 
 @router.get("/{id}", response_model=CafeOut)
-def cafe_by_id(id: str, db: Session = Depends(get_db)):
+async def cafe_by_id(id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve a specific café by its ID.
 
     Args:
         id (str): The café's unique ID.
-        db (Session): The database session dependency.
+        db (AsyncSession): The async database session dependency.
 
     Returns:
         CafeOut: The matching café object.
     """
-    return cafe_service.get_by_id(id, db)
+    return await cafe_service.get_by_id_async(id, db)
 
 
 @router.delete("/{id}")
@@ -90,15 +108,56 @@ def del_cafe(id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{id}/abo", response_model=CafeOutB)
-def get_cafe_with_abos(id: str, db: Session = Depends(get_db)):
+async def get_cafe_with_abos(
+    id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Retrieve a café including its associated subscription models (AboModels).
+    Answered with 304 from the catalogue cache if the client's copy is current.
 
     Args:
         id (str): The café's unique ID.
-        db (Session): The database session dependency.
+        if_none_match (Optional[str]): ETag of the client's cached copy.
+        if_modified_since (Optional[str]): Last-Modified date of the client's cached copy.
+        db (AsyncSession): The async database session dependency.
+
+    Returns:
+        CafeOutB: The café with attached AboModel information, or 304.
+    """
+    cafe = await cafe_service.get_cafe_w_abos_versioned_async(id, db)
+    return etag.conditional(cafe, response, if_none_match, if_modified_since) or cafe.value
+
+
+@router.get("/{id}/drinks/export", response_class=StreamingResponse)
+def export_drinks(
+    id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    token_data: TokenData = Depends(verify_access_token)
+):
+    """
+    Streams the drinks served by a café in a date range, in constant memory.
+    Only employees of the café may export its drinks.
+
+    Args:
+        id (str): The café's unique ID.
+        format (str): "ndjson" (one JSON object per line) or "csv".
+        start (Optional[date]): First day to export.
+        end (Optional[date]): Last day to export (inclusive).
+        token_data (TokenData): Decoded token of an employee of the café.
 
     Returns:
-        CafeOutB: The café with attached AboModel information.
+        StreamingResponse: The drink events as a file download.
     """
-    return cafe_service.get_cafe_w_abos(id, db)
+    if token_data.role != "Employee" or token_data.cafe_id != id:
+        raise HTTPException(status_code=403, detail="Only employees of the café can export its drinks")
+    return StreamingResponse(
+        export_service.cafe_drinks(id, format, start, end),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=drinks.{format}"}
+    )
@@ -6,94 +6,261 @@ profile update, overview, and statistics using FastAPI.
 
 Endpoints:
 - POST /customers/: Register a new customer.
+- POST /customers/import: Start a bulk import of customers from a CSV or JSON Lines file (café admins only).
+- GET /customers/import/{job_id}: Get the status and result of a bulk import (café admins only).
+- POST /customers/drinks/batch: Record a backlog of offline redemptions (employees only).
 - POST /customers/login: Log in a customer and return a JWT token.
 - PATCH /customers/{id}: Update customer profile.
 - GET /customers/{id}/overview: Get customer profile overview.
 - GET /customers/{id}/details: Get customer usage statistics.
+- POST /customers/{id}/drinks: Record a redeemed drink (employees only).
+- GET /customers/{id}/drinks: Page through the customer's drink history.
+- GET /customers/{id}/drinks/export: Stream the customer's drink history as NDJSON or CSV.
 """
+from datetime import date
+from typing import List, Optional
 from pydantic import EmailStr
-from fastapi import APIRouter, Depends, Form
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from schemas.customer import CustomerCreate, CustomerOut
-from schemas.token import Token
-from services import customer_service, auth_service
-from database import get_db
+from schemas.customer import CustomerCreate, CustomerImportJob, CustomerOut, CustomerUpdate
+from schemas.drink import DrinkBatch, DrinkBatchResult, DrinkCreate, DrinkEventOut
+from schemas.token import Token, TokenData
+from services import customer_import, customer_service, auth_service, export_service, redemption_service
+from database import get_db, get_async_db
+from utils import etag
+from utils.security import verify_access_token
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
 @router.post("/", response_model=CustomerOut)
-def register_customer(customer: CustomerCreate, db: Session = Depends(get_db)):
+async def register_customer(customer: CustomerCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new customer account.
 
     Args:
         customer (CustomerCreate): Customer data from the request body.
-        db (Session): SQLAlchemy database session dependency.
+        db (AsyncSession): Async SQLAlchemy database session dependency.
 
     Returns:
         CustomerOut: The created customer object.
     """
-    return customer_service.create_customer(db, customer)
+    return await customer_service.create_customer(db, customer)
+
+
+def _require_admin(token_data: TokenData):
+    if token_data.role != "Employee" or not token_data.sudo:
+        raise HTTPException(status_code=403, detail="Only café admins can import customers")
+
+
+@router.post("/import", response_model=CustomerImportJob, status_code=202)
+def import_customers(
+    response: Response,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    token_data: TokenData = Depends(verify_access_token)
+):
+    """
+    Start a bulk import of customers from a CSV or JSON Lines upload. The import runs
+    in the background; its result is available at the URL in the Location header.
+    Invalid rows are skipped and reported, all other rows are imported.
+
+    Args:
+        response (Response): Outgoing response, receives the Location header.
+        file (UploadFile): CSV file with a header row, or one JSON object per line.
+        format (Optional[str]): "csv" or "jsonl", defaults to the file extension.
+        token_data (TokenData): Decoded token of a café admin.
+
+    Returns:
+        CustomerImportJob: The queued import job.
+    """
+    _require_admin(token_data)
+    fmt = customer_import.detect_format(file.filename, format)
+    job = customer_import.start_import(file.file, fmt)
+    response.headers["Location"] = f"/customers/import/{job.id}"
+    return job
+
+
+@router.get("/import/{job_id}", response_model=CustomerImportJob)
+def get_import_job(job_id: str, token_data: TokenData = Depends(verify_access_token)):
+    """
+    Get the status of a bulk import, with the number of imported customers and the
+    rejected rows once it is done.
+
+    Args:
+        job_id (str): ID of the import job.
+        token_data (TokenData): Decoded token of a café admin.
+
+    Returns:
+        CustomerImportJob: The import job.
+    """
+    _require_admin(token_data)
+    return customer_import.get_job(job_id)
+
+
+@router.post("/drinks/batch", response_model=List[DrinkBatchResult])
+def record_drink_batch(
+    batch: DrinkBatch,
+    db: Session = Depends(get_db),
+    token_data: TokenData = Depends(verify_access_token)
+):
+    """
+    Records drinks that the café's POS redeemed while it was offline, in one transaction.
+    Safe to retry: events that were recorded before are reported as duplicates.
+
+    Args:
+        batch (DrinkBatch): The redemptions with their POS-generated IDs.
+        db (Session): SQLAlchemy database session dependency.
+        token_data (TokenData): Decoded token of an employee of the café.
+
+    Returns:
+        List[DrinkBatchResult]: Accepted, duplicate or rejected, per event in batch order.
+    """
+    return redemption_service.record_batch(batch, db, token_data)
 
 
 @router.post("/login", response_model=Token)
-def login_customer(email: EmailStr = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+async def login_customer(email: EmailStr = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_async_db)):
     """
     Authenticates a customer and returns a JWT access token.
 
     Args:
         email (EmailStr): Customer's email from form data.
         password (str): Customer's password from form data.
-        db (Session): SQLAlchemy database session dependency.
+        db (AsyncSession): Async SQLAlchemy database session dependency.
 
     Returns:
         Token: Access token and token type.
     """
-    token = auth_service.authenticate_customer(db, email, password)
+    token = await auth_service.authenticate_customer(db, email, password)
     return {"access_token": token, "token_type": "bearer"}
 
 
 @router.patch("/{id}", response_model=CustomerOut)
-def patch_customer(id: str, customer: CustomerCreate, db: Session = Depends(get_db)):
+async def patch_customer(id: str, customer: CustomerUpdate, db: AsyncSession = Depends(get_async_db)):
     """
-    Update customer information.
+    Update customer information. Only the fields present in the body are changed.
 
     Args:
         id (str): Customer's unique identifier.
-        customer (CustomerCreate): Updated customer data.
-        db (Session): SQLAlchemy database session dependency.
+        customer (CustomerUpdate): Changed customer data.
+        db (AsyncSession): Async SQLAlchemy database session dependency.
 
     Returns:
         CustomerOut: The updated customer object.
     """
-    return customer_service.patch_customer(id, customer, db)
+    return await customer_service.patch_customer(id, customer, db)
 
 
 @router.get("/{id}/overview", response_model=CustomerOut)
-def overview_customer(id: str, db: Session = Depends(get_db)):
+async def overview_customer(
+    id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Retrieves an overview of the customer's profile.
+    Retrieves an overview of the customer's profile. Answered with 304, without
+    building the response body, if the client's copy is current.
 
     Args:
         id (str): Customer's unique identifier.
-        db (Session): SQLAlchemy database session dependency.
+        if_none_match (Optional[str]): ETag of the client's cached copy.
+        if_modified_since (Optional[str]): Last-Modified date of the client's cached copy.
+        db (AsyncSession): Async SQLAlchemy database session dependency.
 
     Returns:
-        CustomerOut: Customer profile overview.
+        CustomerOut: Customer profile overview, or 304.
     """
-    return customer_service.overview(id, db)
+    customer = await customer_service.overview_versioned_async(id, db)
+    return etag.conditional(customer, response, if_none_match, if_modified_since) or customer.value
 
 
 @router.get("/{id}/details")
-def get_stats(id: str, db: Session = Depends(get_db)):
+async def get_stats(id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Returns usage statistics for a specific customer.
 
     Args:
         id (str): Customer's unique identifier.
-        db (Session): SQLAlchemy database session dependency.
+        db (AsyncSession): Async SQLAlchemy database session dependency.
 
     Returns:
         dict: Statistical data about the customer's activity.
     """
-    return customer_service.statistics(id, db)
+    return await customer_service.statistics_async(id, db)
+
+
+@router.post("/{id}/drinks", response_model=DrinkEventOut)
+def record_drink(
+    id: str,
+    drink: DrinkCreate,
+    db: Session = Depends(get_db),
+    token_data: TokenData = Depends(verify_access_token)
+):
+    """
+    Records a drink redeemed by the customer at the employee's café.
+
+    Args:
+        id (str): Customer's unique identifier.
+        drink (DrinkCreate): Drink type and the Abo it is redeemed on.
+        db (Session): SQLAlchemy database session dependency.
+        token_data (TokenData): Decoded token of the employee at the counter.
+
+    Returns:
+        DrinkEventOut: The recorded drink event.
+    """
+    return customer_service.record_drink(id, drink, db, token_data)
+
+
+@router.get("/{id}/drinks", response_model=List[DrinkEventOut])
+async def get_drinks(
+    id: str,
+    before: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Returns one page of the customer's drink history, newest first.
+
+    Args:
+        id (str): Customer's unique identifier.
+        before (Optional[int]): ID of the last event of the previous page.
+        limit (int): Page size (max. 500).
+        db (AsyncSession): Async SQLAlchemy database session dependency.
+
+    Returns:
+        List[DrinkEventOut]: The drink events of the requested page.
+    """
+    return await customer_service.drink_history_async(id, db, before, limit)
+
+
+@router.get("/{id}/drinks/export", response_class=StreamingResponse)
+async def export_drinks(
+    id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Streams the customer's drink history, oldest first, in constant memory.
+
+    Args:
+        id (str): Customer's unique identifier.
+        format (str): "ndjson" (one JSON object per line) or "csv".
+        start (Optional[date]): First day to export.
+        end (Optional[date]): Last day to export (inclusive).
+        db (AsyncSession): Async SQLAlchemy database session dependency.
+
+    Returns:
+        StreamingResponse: The drink events as a file download.
+    """
+    await customer_service.overview_versioned_async(id, db)
+    return StreamingResponse(
+        export_service.customer_drinks(id, format, start, end),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=drinks-{id}.{format}"}
+    )
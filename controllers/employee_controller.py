@@ -4,7 +4,7 @@ This module defines routes for managing employees in the CoffeeClub system.
 Endpoints:
 - POST /employees/: Register a new employee
 - GET /employees/{cafe_id}/employee/{id}: Get a specific employee by composite key
-- GET /employees/{id}/employees: Get all employees of a café
+- GET /employees/{id}/employees: Get a page of the employees of a café
 - PATCH /employees/: Update an employee
 - DELETE /employees/: Delete an employee
 - POST /employees/login: Authenticate an employee and return a JWT token
@@ -12,34 +12,36 @@ Endpoints:
 All actions (except login) require DB session injection. Authentication is handled via auth_service.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, Form
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Form, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from schemas.token import Token
-from schemas.employee import EmployeeCreate, EmployeeOut, EmployeeDelete
+from schemas.employee import EmployeeCreate, EmployeeOut, EmployeeDelete, EmployeeUpdate
 from services import employee_service, auth_service
-from database import get_db
+from database import get_db, get_async_db
+from utils import pagination
 
 router = APIRouter(prefix="/employees", tags=["employees"])
 
 @router.post("/", response_model=EmployeeOut)
-def register_employee(employee: EmployeeCreate, db: Session = Depends(get_db)):
+async def register_employee(employee: EmployeeCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new employee for a specific café.
 
     Args:
         employee (EmployeeCreate): Employee registration data.
-        db (Session): SQLAlchemy session for database operations.
+        db (AsyncSession): Async SQLAlchemy session for database operations.
 
     Returns:
         EmployeeOut: Created employee data without password.
     """
-    return employee_service.create_employee(db, employee)
+    return await employee_service.create_employee(db, employee)
 
 
 @router.get("/{cafe_id}/employee/{id}")
-def get_employee(cafe_id: str, id: str, db: Session = Depends(get_db)):
+async def get_employee(cafe_id: str, id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve a single employee using the composite key (café ID + employee ID).
 
@@ -50,36 +52,48 @@ def get_employee(cafe_id: str, id: str, db: Session = Depends(get_db)):
     Returns:
         dict: Full employee information.
     """
-    return employee_service.get_employee(cafe_id, id, db)
+    return await employee_service.get_employee_async(cafe_id, id, db)
 
 
 @router.get("/{id}/employees", response_model=List[EmployeeOut])
-def get_all_emp(id: str, db: Session = Depends(get_db)):
+async def get_all_emp(
+    id: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(pagination.DEFAULT_LIMIT, ge=1, le=pagination.MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get all employees working at a specific café.
+    Get a page of the employees working at a specific café, sorted by ID.
+    The cursor of the next page is returned in the X-Next-Cursor and Link headers.
 
     Args:
         id (str): Café ID.
+        cursor (Optional[str]): Cursor of the page, omitted for the first page.
+        limit (int): Page size.
 
     Returns:
-        List[EmployeeOut]: List of employees registered at the café.
+        List[EmployeeOut]: The employees of the page.
     """
-    return employee_service.get_all_employees(id, db)
+    employees, next_cursor = await employee_service.get_all_employees_async(id, db, cursor, limit)
+    pagination.link_next(request, response, next_cursor)
+    return employees
 
 
 @router.patch("/", response_model=EmployeeOut)
-def patch_emp(model: EmployeeCreate, db: Session = Depends(get_db)):
+async def patch_emp(model: EmployeeUpdate, db: AsyncSession = Depends(get_async_db)):
     """
-    Update employee data.
+    Update employee data. Only the fields present in the body are changed.
 
     Args:
-        model (EmployeeCreate): Updated employee information.
-        db (Session): SQLAlchemy session for database operations.
+        model (EmployeeUpdate): Employee key and changed information.
+        db (AsyncSession): Async SQLAlchemy session for database operations.
 
     Returns:
         EmployeeOut: The updated employee data.
     """
-    return employee_service.patch_employee(model, db)
+    return await employee_service.patch_employee(model, db)
 
 
 @router.delete("/")
@@ -98,11 +112,11 @@ def delete_emp(emp: EmployeeDelete, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     employee_id: str = Form(...),
     cafe_id: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate an employee and return a JWT access token.
@@ -111,10 +125,10 @@ def login(
         employee_id (str): Unique employee ID.
         cafe_id (str): Café ID the employee belongs to.
         password (str): Plaintext password.
-        db (Session): SQLAlchemy session for authentication.
+        db (AsyncSession): Async SQLAlchemy session for authentication.
 
     Returns:
         Token: JWT access token and type.
     """
-    token = auth_service.authenticate_employee(db, employee_id, cafe_id, password)
+    token = await auth_service.authenticate_employee(db, employee_id, cafe_id, password)
     return {"access_token": token, "token_type": "bearer"}
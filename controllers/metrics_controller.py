@@ -0,0 +1,33 @@
+"""
+metrics_controller.py
+
+Exposes runtime metrics of the backend's internal worker pools for monitoring.
+
+Endpoints:
+- GET /metrics/: Snapshot of all pool metrics.
+"""
+from fastapi import APIRouter
+from database import pool_metrics
+from services.catalogue_cache import catalogue_cache_metrics
+from services.quota_service import quota_cache_metrics
+from utils.security import hashing_metrics, token_cache_metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/")
+def get_metrics():
+    """
+    Returns a snapshot of the runtime metrics.
+
+    Returns:
+        dict: Metrics per subsystem, e.g. the bcrypt pool's queue depth and rejections
+            the hit rate of the verified-token cache or database pool checkouts and waits.
+    """
+    return {
+        "hashing": hashing_metrics(),
+        "token_cache": token_cache_metrics(),
+        "quota_cache": quota_cache_metrics(),
+        "catalogue_cache": catalogue_cache_metrics(),
+        "database": pool_metrics(),
+    }
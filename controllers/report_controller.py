@@ -1,34 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from services import report_service
+from schemas.report import UsageReport, WeeklyReport
+from services import report_cache, report_service, usage_analytics
 from database import get_db
+from utils import etag
 import os
 
 router = APIRouter(prefix="/report")
 
 @router.get("/weekly", response_class=FileResponse)
-def get_weekly_report(db: Session = Depends(get_db)):
+def get_weekly_report(
+    cafe_id: str,
+    year: Optional[int] = None,
+    week: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
-    Generate and download the weekly PDF report.
+    Download the weekly PDF report of a café from the report cache.
 
     Args:
+        cafe_id (str): ID of the café.
+        year (Optional[int]): ISO year, defaults to the current week's year.
+        week (Optional[int]): ISO week number, defaults to the current week.
+        if_none_match (Optional[str]): ETag of the client's cached copy.
         db (Session): Database session.
 
     Returns:
-        FileResponse: PDF file as downloadable response.
-
-    Raises:
-        HTTPException: If the PDF report file is not found.
+        FileResponse: PDF file as downloadable response, or 304 if the client's copy is current.
     """
-    pdf_path = report_service.generate_weekly_report_pdf() 
+    if year is None or week is None:
+        year, week = report_service.current_week()
+    artifact = report_cache.get_report(cafe_id, year, week, db)
 
-    if not os.path.exists(pdf_path):
-        raise HTTPException(status_code=404, detail="Report not found")
+    headers = {
+        "ETag": artifact.etag,
+        "Cache-Control": "public, max-age=31536000, immutable" if artifact.closed else "no-cache"
+    }
+    if etag.matches(if_none_match, artifact.etag):
+        return Response(status_code=304, headers=headers)
 
+    filename = os.path.basename(artifact.path)
     return FileResponse(
-        path=pdf_path,
+        path=artifact.path,
         media_type='application/pdf',
-        filename='weekly_report.pdf',
-        headers={"Content-Disposition": "attachment; filename=weekly_report.pdf"}
+        filename=filename,
+        headers={**headers, "Content-Disposition": f"attachment; filename={filename}"}
     )
+
+
+@router.get("/weekly/data", response_model=WeeklyReport)
+def get_weekly_report_data(
+    cafe_id: str,
+    year: Optional[int] = None,
+    week: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Return the figures of the weekly report of a café as JSON.
+
+    Args:
+        cafe_id (str): ID of the café.
+        year (Optional[int]): ISO year, defaults to the current week's year.
+        week (Optional[int]): ISO week number, defaults to the current week.
+        db (Session): Database session.
+
+    Returns:
+        WeeklyReport: The aggregated report figures.
+    """
+    if year is None or week is None:
+        year, week = report_service.current_week()
+    return report_service.weekly_report_data(cafe_id, year, week, db)
+
+
+@router.get("/usage", response_model=UsageReport)
+def get_usage_report(
+    cafe_id: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Return usage statistics per café and AboModel: drinks per weekday and hour,
+    quota utilisation, churn risk and revenue per drink.
+
+    Args:
+        cafe_id (Optional[str]): Only analyse this café, defaults to all cafés.
+        start (Optional[date]): First day of the period, defaults to four weeks before `end`.
+        end (Optional[date]): Last day of the period (inclusive), defaults to today.
+        db (Session): Database session.
+
+    Returns:
+        UsageReport: The usage statistics.
+
+    Raises:
+        HTTPException: If the period ends before it starts.
+    """
+    return usage_analytics.usage_report(db, start, end, cafe_id)
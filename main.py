@@ -1,11 +1,8 @@
 from fastapi import FastAPI
 from controllers import (cafe_controller, customer_controller, 
                          abomodel_controller, employee_controller, 
-                         abo_controller, report_controller)
-from models import model
-from database import engine
-
-model.Base.metadata.create_all(bind=engine)
+                         abo_controller, report_controller,
+                         metrics_controller)
 
 app = FastAPI()
 
@@ -16,3 +13,4 @@ app.include_router(abomodel_controller.router)
 app.include_router(cafe_controller.router)
 app.include_router(abo_controller.router)
 app.include_router(report_controller.router)
+app.include_router(metrics_controller.router)
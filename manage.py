@@ -0,0 +1,222 @@
+"""
+manage.py
+
+Command line entry point for maintenance tasks that run outside the API.
+
+Usage:
+    python manage.py migrate [--target VERSION]
+    python manage.py import-customers FILE [--format csv|jsonl] [--batch-size N] [--workers N]
+    python manage.py rebuild-rollups [--cafe-id CAFE_ID]
+    python manage.py weekly-reports [--year YEAR --week WEEK] [--workers N] [--cafe-id ID ...] [--force]
+    python manage.py export-analytics [--dir DIR] [--format parquet|lance] [--full]
+    python manage.py billing-run [--year YEAR --week WEEK] [--batch-size N] [--force]
+    python manage.py sepa-payouts [--year YEAR --week WEEK] [--out FILE] [--execution-date DATE]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+import config
+import migrations
+from database import SessionLocal, engine
+from fastapi import HTTPException
+from services import analytics_export, billing_service, customer_import, report_batch, rollup_service, sepa_export
+
+
+def migrate(args):
+    """
+    Apply the pending schema migrations to the configured database. Run once per
+    deployment, before the API workers start.
+    """
+    start = time.perf_counter()
+    applied = migrations.upgrade(engine, args.target)
+    for name in applied:
+        print(f"Applied {name}")
+    print(f"{len(applied)} migrations applied in {time.perf_counter() - start:.2f} s")
+
+
+def import_customers(args):
+    """
+    Bulk import customers from a CSV or JSON Lines file, printing the rejected rows.
+    """
+    try:
+        fmt = customer_import.detect_format(args.file, args.format)
+    except HTTPException as e:
+        sys.exit(e.detail)
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        with open(args.file, encoding="utf-8-sig", newline="") as stream:
+            result = customer_import.import_customers(stream, fmt, db, args.batch_size, args.workers)
+    finally:
+        db.close()
+
+    for error in result.errors:
+        print(f"  line {error.line}{f' ({error.email})' if error.email else ''}: {error.error}")
+    print(f"{result.imported} imported, {result.failed} rejected in {time.perf_counter() - start:.2f} s")
+    if result.failed:
+        sys.exit(1)
+
+
+def rebuild_rollups(args):
+    """
+    Recompute the daily drink rollups from the raw drink events.
+    """
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        rows = rollup_service.rebuild(db, args.cafe_id)
+        print(f"Rebuilt {rows} rollup rows in {time.perf_counter() - start:.2f} s")
+    finally:
+        db.close()
+
+
+def weekly_reports(args):
+    """
+    Render the weekly PDF reports of all cafés on a process pool, printing per-café timings.
+    Safe to re-run after an interruption: final reports that already exist are skipped.
+    """
+    if args.year is None or args.week is None:
+        args.year, args.week = report_batch.previous_week()
+    print(f"Rendering weekly reports for {args.year}-W{args.week:02d}")
+
+    start = time.perf_counter()
+    counts = {"rendered": 0, "skipped": 0, "failed": 0}
+    for result in report_batch.run(args.year, args.week, args.workers, args.cafe_id, args.force):
+        counts[result.status] += 1
+        line = f"  {result.cafe_id}: {result.status} in {result.seconds:.2f} s"
+        print(line + (f" ({result.error})" if result.error else ""), flush=True)
+
+    print(f"{counts['rendered']} rendered, {counts['skipped']} skipped, {counts['failed']} failed "
+          f"in {time.perf_counter() - start:.2f} s")
+    if counts["failed"]:
+        sys.exit(1)
+
+
+def export_analytics(args):
+    """
+    Export new drink events and snapshots of Abos and customers into the columnar
+    analytics datasets. Meant to run nightly, e.g. from cron.
+    """
+    db = SessionLocal()
+    try:
+        result = analytics_export.run(db, args.dir, args.format, args.full)
+    finally:
+        db.close()
+    print(f"Exported {result.events} drink events (watermark {result.watermark}), {result.abos} Abos and "
+          f"{result.customers} customers in {result.seconds:.2f} s")
+
+
+def billing_run(args):
+    """
+    Charge all active customers for one week and compute the payouts per café.
+    Safe to re-run: an interrupted run resumes, a finished week is not billed again.
+    """
+    if args.year is None or args.week is None:
+        args.year, args.week = report_batch.previous_week()
+    print(f"Billing {args.year}-W{args.week:02d}")
+
+    db = SessionLocal()
+    try:
+        try:
+            result = billing_service.run(db, args.year, args.week, args.batch_size, args.force)
+        except HTTPException as e:
+            sys.exit(e.detail)
+        for payout in billing_service.payouts(db, args.year, args.week):
+            print(f"  {payout.cafe_id}: {payout.amount} from {payout.charges} Abos to {payout.iban or 'no IBAN'}")
+    finally:
+        db.close()
+    if not result.batches:
+        print("Week was billed before; nothing charged")
+    print(f"{result.customers} customers, {result.charges} Abos charged, {result.amount} in total, "
+          f"{result.payouts} payouts in {result.seconds:.2f} s")
+
+
+def sepa_payouts(args):
+    """
+    Write the SEPA credit transfer file with the café payouts of a billed week and
+    validate it. Payouts with invalid bank details are left out and listed.
+    """
+    if args.year is None or args.week is None:
+        args.year, args.week = report_batch.previous_week()
+    path = args.out or os.path.join(config.SEPA_DIR, f"sepa-{args.year}-W{args.week:02d}.xml")
+
+    try:
+        # Fail before writing a file that could not be validated
+        sepa_export.schema_path()
+    except RuntimeError as e:
+        sys.exit(str(e))
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        result = sepa_export.write(db, args.year, args.week, path, args.execution_date)
+        sepa_export.validate(path)
+    except (ValueError, RuntimeError) as e:
+        sys.exit(str(e))
+    finally:
+        db.close()
+
+    for cafe_id, reason in result.skipped:
+        print(f"  {cafe_id}: left out ({reason})")
+    print(f"Wrote {result.transactions} transfers, {result.amount} {sepa_export.CURRENCY} in total, in "
+          f"{result.batches} batches to {path} in {time.perf_counter() - start:.2f} s")
+    if result.skipped:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CoffeeClub maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_cmd = commands.add_parser("migrate", help="Apply pending schema migrations")
+    migrate_cmd.add_argument("--target", type=int, help="Last version to apply, defaults to the newest")
+    migrate_cmd.set_defaults(func=migrate)
+
+    importer = commands.add_parser("import-customers", help="Bulk import customers from CSV or JSON Lines")
+    importer.add_argument("file", help="CSV file with a header row or JSON Lines file")
+    importer.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+    importer.add_argument("--batch-size", type=int, help="Rows per insert transaction")
+    importer.add_argument("--workers", type=int, help="Hashing processes, defaults to the CPU count")
+    importer.set_defaults(func=import_customers)
+
+    rollups = commands.add_parser("rebuild-rollups", help="Recompute drink_rollups from drink_events")
+    rollups.add_argument("--cafe-id", help="Only rebuild this café")
+    rollups.set_defaults(func=rebuild_rollups)
+
+    reports = commands.add_parser("weekly-reports", help="Render weekly reports for all cafés")
+    reports.add_argument("--year", type=int, help="ISO year, defaults to last week's")
+    reports.add_argument("--week", type=int, help="ISO week, defaults to last week")
+    reports.add_argument("--workers", type=int, help="Worker processes, defaults to the CPU count")
+    reports.add_argument("--cafe-id", action="append", help="Only render this café (repeatable)")
+    reports.add_argument("--force", action="store_true", help="Re-render final reports")
+    reports.set_defaults(func=weekly_reports)
+
+    analytics = commands.add_parser("export-analytics", help="Export data into columnar analytics datasets")
+    analytics.add_argument("--dir", help="Target directory, defaults to ANALYTICS_DIR")
+    analytics.add_argument("--format", choices=["parquet", "lance"], help="Defaults to ANALYTICS_FORMAT")
+    analytics.add_argument("--full", action="store_true", help="Re-export all drink events")
+    analytics.set_defaults(func=export_analytics)
+
+    billing = commands.add_parser("billing-run", help="Charge customers and compute café payouts for a week")
+    billing.add_argument("--year", type=int, help="ISO year, defaults to last week's")
+    billing.add_argument("--week", type=int, help="ISO week, defaults to last week")
+    billing.add_argument("--batch-size", type=int, help="Customers per transaction")
+    billing.add_argument("--force", action="store_true", help="Bill a finished week again for new Abos")
+    billing.set_defaults(func=billing_run)
+
+    sepa = commands.add_parser("sepa-payouts", help="Write the SEPA credit transfer file of a week's payouts")
+    sepa.add_argument("--year", type=int, help="ISO year, defaults to last week's")
+    sepa.add_argument("--week", type=int, help="ISO week, defaults to last week")
+    sepa.add_argument("--out", help="Target file, defaults to SEPA_DIR/sepa-YEAR-WWEEK.xml")
+    sepa.add_argument("--execution-date", type=date.fromisoformat, help="Requested execution date, defaults to today")
+    sepa.set_defaults(func=sepa_payouts)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
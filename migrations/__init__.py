@@ -0,0 +1,182 @@
+"""
+migrations
+
+Versioned schema migrations, applied once per deployment with `python manage.py migrate`
+instead of on every worker start. Every migration is a module in this package named
+v<NNN>_<description>.py that defines an upgrade(connection) function. Applied versions
+are recorded in the schema_migrations table, so each migration runs exactly once.
+
+Migrations run in their own transaction. Migrations that set TRANSACTIONAL = False get
+an autocommit connection instead, which online index builds (CREATE INDEX CONCURRENTLY
+on PostgreSQL) and batched backfills of large tables require; they must be idempotent,
+because an interruption leaves them partially applied.
+
+Migrations must do the same on every database they ever run on, so they use frozen
+table definitions and their own SQL instead of importing the ORM models or services.
+A migration may be corrected in place until it is released; after that, fixes go into
+a new migration, since databases that applied it never run it again.
+
+Functions:
+    - available: Return the migration modules in version order.
+    - applied_versions: Return the versions recorded in a database.
+    - add_column: Add a column unless it exists.
+    - create_index: Create an index without blocking writes where the database allows it.
+    - backfill: Run a data migration in small, separately committed batches.
+    - upgrade: Apply all pending migrations to a database.
+"""
+
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from types import ModuleType
+from typing import Any, Callable, List, Optional, Set
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+_MODULE_NAME = re.compile(r"^v(\d{3})_\w+$")
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+
+def _version(migration: ModuleType) -> int:
+    return int(_MODULE_NAME.match(_name(migration)).group(1))
+
+
+def _name(migration: ModuleType) -> str:
+    return migration.__name__.rsplit(".", 1)[1]
+
+
+def available() -> List[ModuleType]:
+    """
+    Returns the migration modules of this package ordered by version.
+
+    Returns:
+        List[ModuleType]: Imported migration modules.
+    """
+    names = sorted(info.name for info in pkgutil.iter_modules(__path__) if _MODULE_NAME.match(info.name))
+    return [importlib.import_module(f"{__name__}.{name}") for name in names]
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    """
+    Returns the migration versions already applied to a database.
+
+    Args:
+        engine (Engine): Engine of the target database.
+
+    Returns:
+        Set[int]: Applied versions.
+    """
+    with engine.begin() as connection:
+        _metadata.create_all(connection, checkfirst=True)
+        return set(connection.scalars(select(schema_migrations.c.version)))
+
+
+def add_column(connection: Connection, table: str, column: str, ddl_type: str):
+    """
+    Adds a column unless the table already has it. The column must be nullable or
+    have a constant default, which both databases add without rewriting the table.
+
+    Args:
+        connection (Connection): Connection to run the DDL on.
+        table (str): Name of the table.
+        column (str): Name of the new column.
+        ddl_type (str): SQL type and constraints of the column, e.g. "VARCHAR" or
+            "INTEGER NOT NULL DEFAULT 1".
+    """
+    if column not in {c["name"] for c in inspect(connection).get_columns(table)}:
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}")
+
+
+def create_index(connection: Connection, name: str, table: str, *columns: str, unique: bool = False):
+    """
+    Creates an index unless an index of that name already exists.
+
+    On PostgreSQL the index is built CONCURRENTLY, so the table stays writable during
+    the build; this needs an autocommit connection (TRANSACTIONAL = False). A concurrent
+    build that was interrupted leaves an invalid index behind, which is dropped and
+    rebuilt. SQLite has no online index builds and locks the database for writes.
+
+    Args:
+        connection (Connection): Connection to run the DDL on.
+        name (str): Name of the index.
+        table (str): Name of the indexed table.
+        *columns (str): Indexed columns, in order.
+        unique (bool): Create a unique index.
+    """
+    concurrently = ""
+    if connection.dialect.name == "postgresql":
+        concurrently = "CONCURRENTLY "
+        invalid = connection.exec_driver_sql(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = %(name)s AND NOT i.indisvalid", {"name": name}
+        ).first()
+        if invalid:
+            connection.exec_driver_sql(f"DROP INDEX CONCURRENTLY {name}")
+    connection.exec_driver_sql(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    )
+
+
+def backfill(connection: Connection, step: Callable[[Connection, Any], Optional[Any]], cursor: Any = None) -> int:
+    """
+    Runs a data migration in batches, each in its own short transaction, so large
+    tables are never locked for the whole migration and progress survives interruptions.
+
+    Args:
+        connection (Connection): Connection of a migration with TRANSACTIONAL = False;
+            batches run on their own connections from its engine.
+        step (Callable): Processes the batch after `cursor` on the given connection and
+            returns the next cursor, or None when there is nothing left.
+        cursor (Any): Cursor to start from.
+
+    Returns:
+        int: Number of batches run.
+    """
+    batches = 0
+    while True:
+        with connection.engine.begin() as batch:
+            cursor = step(batch, cursor)
+        if cursor is None:
+            return batches
+        batches += 1
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[str]:
+    """
+    Applies all pending migrations up to and including `target` in version order.
+
+    Args:
+        engine (Engine): Engine of the target database.
+        target (Optional[int]): Last version to apply, defaults to the newest.
+
+    Returns:
+        List[str]: Names of the migrations that were run.
+    """
+    done = applied_versions(engine)
+    applied = []
+    for migration in available():
+        version = _version(migration)
+        if version in done or (target is not None and version > target):
+            continue
+
+        record = insert(schema_migrations).values(version=version, name=_name(migration))
+        if getattr(migration, "TRANSACTIONAL", True):
+            with engine.begin() as connection:
+                migration.upgrade(connection)
+                connection.execute(record.values(applied_at=datetime.now()))
+        else:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                migration.upgrade(connection)
+            with engine.begin() as connection:
+                connection.execute(record.values(applied_at=datetime.now()))
+        applied.append(_name(migration))
+    return applied
@@ -0,0 +1,85 @@
+"""
+Baseline schema: the tables as they were created by Base.metadata.create_all before
+migrations existed. The definitions are frozen copies rather than the ORM models, so
+later model changes do not alter what this migration creates. Tables that already exist,
+as in databases created at startup by older versions, are left untouched.
+"""
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, JSON, MetaData
+from sqlalchemy import PrimaryKeyConstraint, String, Table
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+
+Table(
+    "cafes", metadata,
+    Column("id", String, primary_key=True),
+    Column("iban", String),
+    Column("bic", String),
+    Column("account_holder", String)
+)
+Table(
+    "abomodels", metadata,
+    Column("id", String, primary_key=True),
+    Column("specialdrinks", Boolean),
+    Column("priceperweek", Integer),
+    Column("amount", Integer)
+)
+Table(
+    "cafe_abomodel", metadata,
+    Column("cafe_id", String, ForeignKey("cafes.id"), primary_key=True),
+    Column("abo_id", String, ForeignKey("abomodels.id"), primary_key=True)
+)
+Table(
+    "employees", metadata,
+    Column("id", String, nullable=False),
+    Column("cafe_id", String, ForeignKey("cafes.id"), nullable=False),
+    Column("name", String, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("sudo", Boolean),
+    PrimaryKeyConstraint("id", "cafe_id")
+)
+Table(
+    "abos", metadata,
+    Column("id", String, primary_key=True),
+    Column("model_id", String, ForeignKey("abomodels.id")),
+    Column("customer_id", String, ForeignKey("customers.id")),
+    Column("cafe_id", String, ForeignKey("cafes.id"))
+)
+Table(
+    "customers", metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String),
+    Column("hashed_password", String),
+    Column("lastPaid", Date),
+    Column("activated", Boolean),
+    Column("paymentMethod", Integer),
+    Column("email", String, unique=True),
+    Column("drinksDrunk", Integer),
+    Column("drinkLog", JSON),
+    Column("abo1_id", String, ForeignKey("abos.id")),
+    Column("abo2_id", String, ForeignKey("abos.id"))
+)
+Table(
+    "drink_events", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("customer_id", String, ForeignKey("customers.id"), nullable=False),
+    Column("cafe_id", String, ForeignKey("cafes.id"), nullable=False),
+    Column("abo_id", String, ForeignKey("abos.id")),
+    Column("drink", String, nullable=False),
+    Column("timestamp", DateTime, nullable=False),
+    Index("ix_drink_events_customer_id_id", "customer_id", "id"),
+    Index("ix_drink_events_cafe_id_timestamp", "cafe_id", "timestamp", "customer_id", "abo_id", "drink")
+)
+Table(
+    "drink_rollups", metadata,
+    Column("cafe_id", String, ForeignKey("cafes.id"), nullable=False),
+    Column("day", Date, nullable=False),
+    Column("model_id", String, nullable=False),
+    Column("drink", String, nullable=False),
+    Column("count", Integer, nullable=False),
+    PrimaryKeyConstraint("cafe_id", "day", "model_id", "drink")
+)
+
+
+def upgrade(connection: Connection):
+    metadata.create_all(connection, checkfirst=True)
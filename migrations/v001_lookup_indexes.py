@@ -0,0 +1,18 @@
+"""
+Secondary indexes for the hot lookup paths: Abos by customer (one Abo per customer check)
+and by café and model, employees by café, and cafés offering an AboModel. The drink
+history indexes already exist since drink_events was introduced with them.
+
+Built online, so production tables stay writable while the indexes are created.
+"""
+from sqlalchemy.engine import Connection
+from migrations import create_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(connection: Connection):
+    create_index(connection, "ix_abos_customer_id", "abos", "customer_id")
+    create_index(connection, "ix_abos_cafe_id_model_id", "abos", "cafe_id", "model_id")
+    create_index(connection, "ix_employees_cafe_id", "employees", "cafe_id")
+    create_index(connection, "ix_cafe_abomodel_abo_id", "cafe_abomodel", "abo_id")
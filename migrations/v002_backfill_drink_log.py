@@ -0,0 +1,85 @@
+"""
+Moves the legacy per-customer drinkLog JSON into drink_events.
+
+Customers are processed in keyset-ordered batches, each committed on its own, so the
+customers table is never locked for the whole run. Entries become events and are removed
+from the log in the same transaction, which makes an interrupted run safe to restart.
+Entries without a drink, café or parsable timestamp cannot become events and stay in
+drinkLog. The drink rollups are rebuilt afterwards if any events were added, with a
+frozen copy of the rebuild query, so later changes to the rollup service do not alter
+what this migration does.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, JSON, column, delete, func, insert, select, table, update
+from sqlalchemy.engine import Connection
+from migrations import backfill
+
+TRANSACTIONAL = False
+BATCH_SIZE = 500
+
+customers = table("customers", column("id"), column("drinkLog", JSON))
+drink_events = table(
+    "drink_events", column("id"), column("customer_id"), column("cafe_id"), column("abo_id"), column("drink"),
+    column("timestamp", DateTime)
+)
+abos = table("abos", column("id"), column("model_id"))
+drink_rollups = table("drink_rollups", column("cafe_id"), column("day"), column("model_id"), column("drink"),
+                      column("count"))
+
+
+def _event(customer_id: str, entry) -> Optional[dict]:
+    if not isinstance(entry, dict) or not entry.get("drink") or not entry.get("cafe_id"):
+        return None
+    try:
+        timestamp = datetime.fromisoformat(str(entry.get("timestamp")))
+    except ValueError:
+        return None
+    return {
+        "customer_id": customer_id,
+        "cafe_id": entry["cafe_id"],
+        "abo_id": entry.get("abo_id"),
+        "drink": entry["drink"],
+        "timestamp": timestamp
+    }
+
+
+def _rebuild_rollups(connection: Connection):
+    day = func.date(drink_events.c.timestamp)
+    model_id = func.coalesce(abos.c.model_id, "")
+    aggregate = (
+        select(drink_events.c.cafe_id, day, model_id, drink_events.c.drink, func.count(drink_events.c.id))
+        .select_from(drink_events.outerjoin(abos, abos.c.id == drink_events.c.abo_id))
+        .group_by(drink_events.c.cafe_id, day, model_id, drink_events.c.drink)
+    )
+    with connection.engine.begin() as db:
+        db.execute(delete(drink_rollups))
+        db.execute(insert(drink_rollups).from_select(["cafe_id", "day", "model_id", "drink", "count"], aggregate))
+
+
+def upgrade(connection: Connection):
+    moved = 0
+
+    def step(batch: Connection, after: Optional[str]) -> Optional[str]:
+        nonlocal moved
+        query = select(customers.c.id, customers.c.drinkLog).order_by(customers.c.id).limit(BATCH_SIZE)
+        if after is not None:
+            query = query.where(customers.c.id > after)
+        rows = batch.execute(query).all()
+
+        for customer_id, log in rows:
+            if not isinstance(log, list) or not log:
+                continue
+            events, rest = [], []
+            for entry in log:
+                event = _event(customer_id, entry)
+                (events if event else rest).append(event or entry)
+            if events:
+                batch.execute(insert(drink_events), events)
+                batch.execute(update(customers).where(customers.c.id == customer_id).values(drinkLog=rest))
+                moved += len(events)
+        return rows[-1].id if rows else None
+
+    backfill(connection, step)
+    if moved:
+        _rebuild_rollups(connection)
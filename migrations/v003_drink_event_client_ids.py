@@ -0,0 +1,15 @@
+"""
+Client event IDs on drink_events, so that batches of drinks uploaded by a café's POS
+after an outage can be retried without recording any drink twice. Adding a nullable
+column is a metadata-only change; the unique index is built online.
+"""
+from sqlalchemy.engine import Connection
+from migrations import add_column, create_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(connection: Connection):
+    add_column(connection, "drink_events", "client_event_id", "VARCHAR")
+    create_index(connection, "ux_drink_events_cafe_id_client_event_id", "drink_events",
+                 "cafe_id", "client_event_id", unique=True)
@@ -0,0 +1,61 @@
+"""
+Weekly quota counters per Abo (abo_week_usage), filled from the Abo redemptions in
+drink_events. The counters are cleared and recounted in keyset-ordered batches of events,
+so an interrupted run starts over instead of counting events twice.
+"""
+from collections import Counter
+from typing import Optional
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, PrimaryKeyConstraint, String, Table
+from sqlalchemy import column, delete, select, table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from migrations import backfill
+
+TRANSACTIONAL = False
+BATCH_SIZE = 10_000
+
+metadata = MetaData()
+# Referenced by the foreign key only; created by the baseline
+Table("abos", metadata, Column("id", String, primary_key=True))
+abo_week_usage = Table(
+    "abo_week_usage", metadata,
+    Column("abo_id", String, ForeignKey("abos.id"), nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("week", Integer, nullable=False),
+    Column("count", Integer, nullable=False),
+    PrimaryKeyConstraint("abo_id", "year", "week")
+)
+drink_events = table("drink_events", column("id"), column("abo_id"), column("timestamp", DateTime))
+
+
+def upgrade(connection: Connection):
+    abo_week_usage.create(connection, checkfirst=True)
+    connection.execute(delete(abo_week_usage))
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+
+    def step(batch: Connection, after: Optional[int]) -> Optional[int]:
+        query = (
+            select(drink_events.c.id, drink_events.c.abo_id, drink_events.c.timestamp)
+            .where(drink_events.c.abo_id.isnot(None))
+            .order_by(drink_events.c.id)
+            .limit(BATCH_SIZE)
+        )
+        if after is not None:
+            query = query.where(drink_events.c.id > after)
+        rows = batch.execute(query).all()
+        if not rows:
+            return None
+
+        counts = Counter((abo_id, *timestamp.isocalendar()[:2]) for _, abo_id, timestamp in rows)
+        stmt = dialect.insert(abo_week_usage)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["abo_id", "year", "week"],
+            set_={"count": abo_week_usage.c.count + stmt.excluded.count}
+        )
+        batch.execute(stmt, [
+            {"abo_id": abo_id, "year": year, "week": week, "count": count}
+            for (abo_id, year, week), count in counts.items()
+        ])
+        return rows[-1].id
+
+    backfill(connection, step)
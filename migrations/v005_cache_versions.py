@@ -0,0 +1,17 @@
+"""
+Version counters of cached data sets (cache_versions), used to share cache
+invalidations between workers.
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+cache_versions = Table(
+    "cache_versions", metadata,
+    Column("namespace", String, primary_key=True),
+    Column("version", Integer, nullable=False)
+)
+
+
+def upgrade(connection: Connection):
+    cache_versions.create(connection, checkfirst=True)
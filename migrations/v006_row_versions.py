@@ -0,0 +1,38 @@
+"""
+Row versions (version, updated_at) on cafes, abomodels and customers, from which the
+ETag and Last-Modified headers of the catalogue and profile endpoints are derived.
+Existing rows start at version 1; updated_at is filled in keyset-ordered batches.
+"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import DateTime, column, select, table, update
+from sqlalchemy.engine import Connection
+from migrations import add_column, backfill
+
+TRANSACTIONAL = False
+BATCH_SIZE = 10_000
+TABLES = ("cafes", "abomodels", "customers")
+
+
+def upgrade(connection: Connection):
+    now = datetime.now()
+    for name in TABLES:
+        add_column(connection, name, "version", "INTEGER NOT NULL DEFAULT 1")
+        add_column(connection, name, "updated_at", "TIMESTAMP")
+        rows = table(name, column("id"), column("updated_at", DateTime))
+
+        def step(batch: Connection, after: Optional[str]) -> Optional[str]:
+            query = select(rows.c.id).where(rows.c.updated_at.is_(None)).order_by(rows.c.id).limit(BATCH_SIZE)
+            if after is not None:
+                query = query.where(rows.c.id > after)
+            ids = batch.scalars(query).all()
+            if not ids:
+                return None
+            batch.execute(
+                update(rows)
+                .where(rows.c.id.between(ids[0], ids[-1]), rows.c.updated_at.is_(None))
+                .values(updated_at=now)
+            )
+            return ids[-1]
+
+        backfill(connection, step)
@@ -0,0 +1,51 @@
+"""
+Tables of the weekly billing run: billing_runs (progress per week), charges (one per
+Abo and week) and payouts (totals per café and week).
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, PrimaryKeyConstraint, String, Table
+from sqlalchemy.engine import Connection
+
+metadata = MetaData()
+# Referenced by the foreign keys only; created by the baseline
+for name in ("abos", "customers", "cafes", "abomodels"):
+    Table(name, metadata, Column("id", String, primary_key=True))
+
+billing_runs = Table(
+    "billing_runs", metadata,
+    Column("year", Integer, nullable=False),
+    Column("week", Integer, nullable=False),
+    Column("cursor", String),
+    Column("status", String, nullable=False),
+    Column("started_at", DateTime, nullable=False),
+    Column("finished_at", DateTime),
+    PrimaryKeyConstraint("year", "week")
+)
+charges = Table(
+    "charges", metadata,
+    Column("abo_id", String, ForeignKey("abos.id"), nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("week", Integer, nullable=False),
+    Column("customer_id", String, ForeignKey("customers.id"), nullable=False),
+    Column("cafe_id", String, ForeignKey("cafes.id"), nullable=False),
+    Column("model_id", String, ForeignKey("abomodels.id"), nullable=False),
+    Column("amount", Integer, nullable=False),
+    PrimaryKeyConstraint("abo_id", "year", "week"),
+    Index("ix_charges_year_week_customer_id", "year", "week", "customer_id")
+)
+payouts = Table(
+    "payouts", metadata,
+    Column("cafe_id", String, ForeignKey("cafes.id"), nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("week", Integer, nullable=False),
+    Column("iban", String),
+    Column("bic", String),
+    Column("account_holder", String),
+    Column("amount", Integer, nullable=False),
+    Column("charges", Integer, nullable=False),
+    PrimaryKeyConstraint("cafe_id", "year", "week")
+)
+
+
+def upgrade(connection: Connection):
+    for table in (billing_runs, charges, payouts):
+        table.create(connection, checkfirst=True)
@@ -3,11 +3,15 @@ models.py
 
 This module defines the SQLAlchemy ORM models for a café subscription system.
 It includes models for Cafés, AboModels (subscription types), Employees, Customers,
-Abos (individual subscriptions), and the many-to-many relationship between Cafés and AboModels.
+Abos (individual subscriptions), DrinkEvents (the append-only drink history),
+DrinkRollups (daily per-café drink counts), AboWeekUsage (weekly quota counters), CacheVersions (shared cache invalidation),
+BillingRuns, Charges and Payouts (weekly billing), and the many-to-many relationship between
+Cafés and AboModels.
 """
+from datetime import datetime
 from uuid import uuid4
 from sqlalchemy import Column, PrimaryKeyConstraint, String, Boolean
-from sqlalchemy import Integer, ForeignKey, Date, Table, JSON
+from sqlalchemy import Integer, ForeignKey, Date, DateTime, Table, JSON, Index, literal_column
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -16,7 +20,9 @@ AboCafe = Table(
     "cafe_abomodel",
     Base.metadata,
     Column("cafe_id", String, ForeignKey("cafes.id"), primary_key=True),
-    Column("abo_id", String, ForeignKey("abomodels.id"), primary_key=True)
+    Column("abo_id", String, ForeignKey("abomodels.id"), primary_key=True),
+    # The primary key covers lookups by café; AboModel.cafes looks up by model
+    Index("ix_cafe_abomodel_abo_id", "abo_id")
 )
 
 class Cafe(Base):
@@ -28,6 +34,8 @@ class Cafe(Base):
         iban (str): IBAN for payments.
         bic (str): BIC for bank identification.
         account_holder (str): Name of the account owner.
+        version (int): Row version, incremented by every update; the source of ETags.
+        updated_at (datetime): Time of the last update (Last-Modified).
         abolist (List[AboModel]): Subscriptions offered by the café.
         employees (List[Employee]): Employees working in this café.
     """
@@ -37,6 +45,9 @@ class Cafe(Base):
     iban = Column(String)
     bic = Column(String)
     account_holder = Column(String)
+    version = Column(Integer, nullable=False, default=1, server_default="1",
+                     onupdate=literal_column("version") + 1)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     abolist = relationship(
         "AboModel",
@@ -55,6 +66,8 @@ class AboModel(Base):
         specialdrinks (bool): Whether special drinks are included.
         priceperweek (int): Cost per week for the subscription.
         amount (int): Number of drinks per week.
+        version (int): Row version, incremented by every update; the source of ETags.
+        updated_at (datetime): Time of the last update (Last-Modified).
         cafes (List[Cafe]): Cafés offering this model.
     """
     __tablename__ = "abomodels"
@@ -63,6 +76,9 @@ class AboModel(Base):
     specialdrinks = Column(Boolean, default=False)
     priceperweek = Column(Integer)
     amount = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1",
+                     onupdate=literal_column("version") + 1)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     cafes = relationship(
         "Cafe",
@@ -96,6 +112,8 @@ class Employee(Base):
 
     __table_args__ = (
         PrimaryKeyConstraint('id', 'cafe_id'),
+        # The primary key starts with id, so listing a café's staff needs its own index
+        Index("ix_employees_cafe_id", "cafe_id"),
     )
 
     cafe = relationship("Cafe", back_populates="employees")
@@ -120,6 +138,11 @@ class Abo(Base):
     customer_id = Column(String, ForeignKey("customers.id"))
     cafe_id = Column(String, ForeignKey("cafes.id"))
 
+    __table_args__ = (
+        Index("ix_abos_customer_id", "customer_id"),
+        Index("ix_abos_cafe_id_model_id", "cafe_id", "model_id"),
+    )
+
     model = relationship("AboModel")
     cafe = relationship("Cafe")
 
@@ -137,9 +160,11 @@ class Customer(Base):
         paymentMethod (int): 0 for Cash, 1 for PayPal.
         email (str): Unique email address.
         drinksDrunk (int): Total number of drinks consumed.
-        drinkLog (JSON): Detailed log of drink history.
+        drinkLog (JSON): Legacy drink history, superseded by the drink_events table.
         abo1_id (str): First active subscription ID.
         abo2_id (str): Second active subscription ID.
+        version (int): Row version, incremented by every update; the source of ETags.
+        updated_at (datetime): Time of the last update (Last-Modified).
         abo1 (Abo): First subscription relation.
         abo2 (Abo): Second subscription relation.
     """
@@ -157,6 +182,211 @@ class Customer(Base):
 
     abo1_id = Column(String, ForeignKey("abos.id"))
     abo2_id = Column(String, ForeignKey("abos.id"))
+    version = Column(Integer, nullable=False, default=1, server_default="1",
+                     onupdate=literal_column("version") + 1)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     abo1 = relationship("Abo", foreign_keys=[abo1_id])
     abo2 = relationship("Abo", foreign_keys=[abo2_id])
+
+
+class DrinkEvent(Base):
+    """
+    Represents a single redeemed drink. Rows are only ever inserted, never updated,
+    so recording a drink costs the same no matter how long a customer's history is.
+
+    Attributes:
+        id (int): Auto-incrementing ID, also used as the cursor when paging history.
+        customer_id (str): Foreign key to the Customer who drank.
+        cafe_id (str): Foreign key to the Café that served the drink.
+        abo_id (str): Foreign key to the Abo the drink was redeemed on, if any.
+        drink (str): Name of the drink type (e.g. "Cappuccino").
+        timestamp (DateTime): Time of redemption.
+        client_event_id (str): ID assigned by the café's POS for drinks uploaded in
+            batches, unique per café so that repeated uploads are recognised.
+    """
+    __tablename__ = "drink_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    customer_id = Column(String, ForeignKey("customers.id"), nullable=False)
+    cafe_id = Column(String, ForeignKey("cafes.id"), nullable=False)
+    abo_id = Column(String, ForeignKey("abos.id"))
+    drink = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False, default=datetime.now)
+    client_event_id = Column(String)
+
+    __table_args__ = (
+        Index("ix_drink_events_customer_id_id", "customer_id", "id"),
+        Index("ux_drink_events_cafe_id_client_event_id", "cafe_id", "client_event_id", unique=True),
+        # Covers the weekly report aggregates, so they never touch the table itself
+        Index("ix_drink_events_cafe_id_timestamp", "cafe_id", "timestamp", "customer_id", "abo_id", "drink"),
+    )
+
+
+class DrinkRollup(Base):
+    """
+    Number of drinks served per café, day, AboModel and drink type.
+
+    Maintained incrementally whenever a drink is recorded and rebuildable from
+    drink_events, so reports read a few rows per day instead of the raw history.
+
+    Composite Primary Key:
+        cafe_id + day + model_id + drink
+
+    Attributes:
+        cafe_id (str): ID of the café that served the drinks.
+        day (Date): Calendar day of the drinks.
+        model_id (str): AboModel the drinks were redeemed on, "" for drinks without Abo.
+        drink (str): Name of the drink type.
+        count (int): Number of drinks.
+    """
+    __tablename__ = "drink_rollups"
+
+    cafe_id = Column(String, ForeignKey("cafes.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    model_id = Column(String, nullable=False, default="")
+    drink = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("cafe_id", "day", "model_id", "drink"),
+    )
+
+
+class AboWeekUsage(Base):
+    """
+    Number of drinks redeemed on an Abo in one ISO week, checked against the weekly
+    quota of its AboModel (amount) whenever a drink is redeemed.
+
+    Composite Primary Key:
+        abo_id + year + week
+
+    Attributes:
+        abo_id (str): ID of the Abo.
+        year (int): ISO year.
+        week (int): ISO week number.
+        count (int): Number of drinks redeemed in that week.
+    """
+    __tablename__ = "abo_week_usage"
+
+    abo_id = Column(String, ForeignKey("abos.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    week = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("abo_id", "year", "week"),
+    )
+
+
+class CacheVersion(Base):
+    """
+    Version counter of a cached data set, shared by all workers. A worker that changes
+    the data increments the version; the others drop their cached copies once they
+    see the new version.
+
+    Attributes:
+        namespace (str): Name of the cached data set, e.g. "catalogue".
+        version (int): Number of invalidations so far.
+    """
+    __tablename__ = "cache_versions"
+
+    namespace = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class BillingRun(Base):
+    """
+    Progress of the billing run of one ISO week. The cursor is committed together with
+    each batch of charges, so an interrupted run resumes after the last finished batch.
+
+    Composite Primary Key:
+        year + week
+
+    Attributes:
+        year (int): ISO year of the billed week.
+        week (int): ISO week number of the billed week.
+        cursor (str): ID of the last customer billed, None before the first batch.
+        status (str): "running" or "done".
+        started_at (datetime): Time the run was started first.
+        finished_at (datetime): Time the payouts were computed, None while running.
+    """
+    __tablename__ = "billing_runs"
+
+    year = Column(Integer, nullable=False)
+    week = Column(Integer, nullable=False)
+    cursor = Column(String)
+    status = Column(String, nullable=False, default="running")
+    started_at = Column(DateTime, nullable=False, default=datetime.now)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("year", "week"),
+    )
+
+
+class Charge(Base):
+    """
+    Weekly charge of one Abo, the price per week of its AboModel. An Abo is charged at
+    most once per week.
+
+    Composite Primary Key:
+        abo_id + year + week
+
+    Attributes:
+        abo_id (str): ID of the charged Abo.
+        year (int): ISO year of the billed week.
+        week (int): ISO week number of the billed week.
+        customer_id (str): Customer who pays the charge.
+        cafe_id (str): Café the charge is paid out to.
+        model_id (str): AboModel the price was taken from.
+        amount (int): Charged price per week.
+    """
+    __tablename__ = "charges"
+
+    abo_id = Column(String, ForeignKey("abos.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    week = Column(Integer, nullable=False)
+    customer_id = Column(String, ForeignKey("customers.id"), nullable=False)
+    cafe_id = Column(String, ForeignKey("cafes.id"), nullable=False)
+    model_id = Column(String, ForeignKey("abomodels.id"), nullable=False)
+    amount = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("abo_id", "year", "week"),
+        Index("ix_charges_year_week_customer_id", "year", "week", "customer_id"),
+    )
+
+
+class Payout(Base):
+    """
+    Total of the charges of one week that is paid out to a café, with the café's bank
+    account at the time of the billing run.
+
+    Composite Primary Key:
+        cafe_id + year + week
+
+    Attributes:
+        cafe_id (str): ID of the café.
+        year (int): ISO year of the billed week.
+        week (int): ISO week number of the billed week.
+        iban (str): IBAN of the café.
+        bic (str): BIC of the café.
+        account_holder (str): Account holder of the café.
+        amount (int): Sum of the charges.
+        charges (int): Number of charged Abos.
+    """
+    __tablename__ = "payouts"
+
+    cafe_id = Column(String, ForeignKey("cafes.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    week = Column(Integer, nullable=False)
+    iban = Column(String)
+    bic = Column(String)
+    account_holder = Column(String)
+    amount = Column(Integer, nullable=False)
+    charges = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("cafe_id", "year", "week"),
+    )
@@ -2,10 +2,14 @@
 utility_crud.py
 
 This module provides generic CRUD utility functions for SQLAlchemy models.
-It allows you to retrieve and delete records from any table using their ID.
+It allows you to retrieve and delete records from any table using their ID
+and to atomically increment counter columns.
 """
 
-from typing import Type
+from typing import Optional, Type
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from database import Base  # Import your declarative base class
@@ -34,6 +38,29 @@ def get_by_id(table: Type[Base], id: str, db: Session):
     return model
 
 
+async def get_by_id_async(table: Type[Base], id: str, db: AsyncSession):
+    """
+    Retrieve a single database entry by its ID using an async session.
+
+    Args:
+        table (Type[Base]): The SQLAlchemy model class (table).
+        id (str): The primary key of the record to retrieve.
+        db (AsyncSession): The active async SQLAlchemy session.
+
+    Returns:
+        Base: The model instance if found.
+
+    Raises:
+        HTTPException: If no entry with the given ID is found.
+    """
+    model = (await db.execute(select(table).where(table.id == id))).scalars().first()
+
+    if not model:
+        raise HTTPException(status_code=404, detail="No model with given id found.")
+
+    return model
+
+
 def delete_by_id(table: Type[Base], id: str, db: Session):
     """
     Delete a database entry by its ID.
@@ -55,3 +82,59 @@ def delete_by_id(table: Type[Base], id: str, db: Session):
     return {
         "message": f"{table.__tablename__}-Eintrag mit der id {id} wurde erfolgreich gelöscht"
     }
+
+
+def increment(table: Type[Base], keys: dict, column: str, db: Session, amount: int = 1):
+    """
+    Atomically add `amount` to a counter column, creating the row if it does not exist.
+
+    Uses INSERT ... ON CONFLICT DO UPDATE, so concurrent writers never lose an
+    increment and no read is needed beforehand. The session is not committed.
+
+    Args:
+        table (Type[Base]): The SQLAlchemy model class whose primary key is `keys`.
+        keys (dict): Primary key column names and values of the counter row.
+        column (str): Name of the counter column.
+        db (Session): The active SQLAlchemy session.
+        amount (int): Value to add.
+    """
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(table).values(**keys, **{column: amount})
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: table.__table__.c[column] + stmt.excluded[column]}
+    )
+    db.execute(stmt)
+
+
+def increment_within(table: Type[Base], keys: dict, column: str, limit: Optional[int], db: Session,
+                     amount: int = 1) -> Optional[int]:
+    """
+    Atomically add `amount` to a counter column unless the result would exceed `limit`,
+    creating the row if it does not exist.
+
+    A single INSERT ... ON CONFLICT DO UPDATE ... WHERE, so the check and the increment
+    cannot be separated by a concurrent writer. The session is not committed.
+
+    Args:
+        table (Type[Base]): The SQLAlchemy model class whose primary key is `keys`.
+        keys (dict): Primary key column names and values of the counter row.
+        column (str): Name of the counter column.
+        limit (Optional[int]): Maximum value of the counter, None for no limit.
+        db (Session): The active SQLAlchemy session.
+        amount (int): Value to add.
+
+    Returns:
+        Optional[int]: The new counter value, or None if it would have exceeded the limit.
+    """
+    if limit is not None and amount > limit:
+        return None
+    counter = table.__table__.c[column]
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(table).values(**keys, **{column: amount})
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: counter + stmt.excluded[column]},
+        where=(counter + stmt.excluded[column] <= limit) if limit is not None else None
+    ).returning(counter)
+    return db.execute(stmt).scalar()
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class AboCreate(BaseModel):
     """
@@ -14,3 +15,23 @@ class AboCreate(BaseModel):
     
     class Config: 
         from_attributes = True
+
+
+class AboQuotaOut(BaseModel):
+    """
+    Weekly quota of an Abo and how much of it is used.
+
+    Attributes:
+        abo_id (str): ID of the Abo.
+        year (int): ISO year.
+        week (int): ISO week number.
+        amount (Optional[int]): Drinks per week of the AboModel, None for no quota.
+        used (int): Drinks redeemed in that week.
+        remaining (Optional[int]): Drinks left in that week, None for no quota.
+    """
+    abo_id: str
+    year: int
+    week: int
+    amount: Optional[int]
+    used: int
+    remaining: Optional[int]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import date
-from typing import Optional, Any
+from typing import List, Optional, Any
 
 class CustomerCreate(BaseModel):
     """
@@ -18,6 +18,23 @@ class CustomerCreate(BaseModel):
     paymentMethod: int
 
 
+class CustomerUpdate(BaseModel):
+    """
+    Partial update of a customer's profile (PATCH semantics).
+    Only the fields sent by the client are changed.
+
+    Attributes:
+        name (Optional[str]): New name of the customer.
+        password (Optional[str]): New plain-text password, only then hashed.
+        email (Optional[EmailStr]): New email address.
+        paymentMethod (Optional[int]): New payment method (0 = Cash, 1 = PayPal).
+    """
+    name: Optional[str] = None
+    password: Optional[str] = None
+    email: Optional[EmailStr] = None
+    paymentMethod: Optional[int] = None
+
+
 class CustomerOut(BaseModel):
     """
     Schema for safely returning customer data (e.g. after registration or login).
@@ -55,3 +72,47 @@ class CustomerStats(BaseModel):
     drinksDrunk: int 
     drinkLog: Any
     activated: bool
+
+
+class CustomerImportError(BaseModel):
+    """
+    A row of a bulk import that was not imported.
+
+    Attributes:
+        line (int): Line number in the import file.
+        email (Optional[str]): Email of the row, if it could be read.
+        error (str): Why the row was rejected.
+    """
+    line: int
+    email: Optional[str] = None
+    error: str
+
+
+class CustomerImportResult(BaseModel):
+    """
+    Outcome of a bulk customer import.
+
+    Attributes:
+        imported (int): Number of customers created.
+        failed (int): Number of rejected rows.
+        errors (List[CustomerImportError]): Rejected rows, at most the first 1000.
+    """
+    imported: int
+    failed: int
+    errors: List[CustomerImportError]
+
+
+class CustomerImportJob(BaseModel):
+    """
+    A bulk customer import running in the background.
+
+    Attributes:
+        id (str): ID of the job.
+        status (str): "queued", "running", "done" or "failed".
+        result (Optional[CustomerImportResult]): Outcome, once the job is done.
+        error (Optional[str]): Why the job failed.
+    """
+    id: str
+    status: str
+    result: Optional[CustomerImportResult] = None
+    error: Optional[str] = None
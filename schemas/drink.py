@@ -0,0 +1,81 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Literal, Optional
+
+class DrinkCreate(BaseModel):
+    """
+    Schema for recording a drink redeemed by a customer at the counter.
+
+    Attributes:
+        drink (str): Name of the drink type (e.g. "Cappuccino").
+        abo_id (Optional[str]): ID of the Abo the drink is redeemed on, if any.
+    """
+    drink: str
+    abo_id: Optional[str] = None
+
+
+class DrinkEventOut(BaseModel):
+    """
+    Output schema for a single entry of a customer's drink history.
+
+    Attributes:
+        id (int): Event ID, usable as the `before` cursor for the next page.
+        customer_id (str): ID of the customer.
+        cafe_id (str): ID of the café that served the drink.
+        abo_id (Optional[str]): ID of the Abo the drink was redeemed on.
+        drink (str): Name of the drink type.
+        timestamp (datetime): Time of redemption.
+    """
+    id: int
+    customer_id: str
+    cafe_id: str
+    abo_id: Optional[str]
+    drink: str
+    timestamp: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class DrinkBatchItem(BaseModel):
+    """
+    A drink redeemed at the counter while the café's POS was offline.
+
+    Attributes:
+        client_event_id (str): ID generated by the POS, unique per café.
+        customer_id (str): ID of the customer.
+        drink (str): Name of the drink type.
+        abo_id (Optional[str]): ID of the Abo the drink was redeemed on, if any.
+        timestamp (datetime): Time of redemption at the counter.
+    """
+    client_event_id: str = Field(min_length=1, max_length=64)
+    customer_id: str
+    drink: str
+    abo_id: Optional[str] = None
+    timestamp: datetime
+
+
+class DrinkBatch(BaseModel):
+    """
+    Backlog of offline redemptions uploaded in one request.
+
+    Attributes:
+        events (List[DrinkBatchItem]): The redemptions, at most 5000.
+    """
+    events: List[DrinkBatchItem] = Field(max_length=5000)
+
+
+class DrinkBatchResult(BaseModel):
+    """
+    Outcome of one uploaded redemption.
+
+    Attributes:
+        client_event_id (str): ID generated by the POS.
+        status (str): "accepted", "duplicate" (recorded by an earlier upload) or "rejected".
+        event_id (Optional[int]): ID of the recorded drink event, unless rejected.
+        error (Optional[str]): Why the redemption was rejected.
+    """
+    client_event_id: str
+    status: Literal["accepted", "duplicate", "rejected"]
+    event_id: Optional[int] = None
+    error: Optional[str] = None
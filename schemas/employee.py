@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class EmployeeCreate(BaseModel):
@@ -18,6 +19,25 @@ class EmployeeCreate(BaseModel):
     cafe_id: str
 
 
+class EmployeeUpdate(BaseModel):
+    """
+    Partial update of an employee (PATCH semantics). The composite key identifies
+    the employee; of the other fields only those sent by the client are changed.
+
+    Attributes:
+        id (str): Employee ID.
+        cafe_id (str): Café ID of the employee.
+        name (Optional[str]): New name of the employee.
+        password (Optional[str]): New plain-text password, only then hashed.
+        sudo (Optional[bool]): New admin privileges flag.
+    """
+    id: str
+    cafe_id: str
+    name: Optional[str] = None
+    password: Optional[str] = None
+    sudo: Optional[bool] = None
+
+
 class EmployeeOut(BaseModel):
     """
     Output schema for employee data (e.g., for lists or profiles).
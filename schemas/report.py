@@ -0,0 +1,127 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+class TopUser(BaseModel):
+    """
+    A customer ranked by the number of drinks in the report week.
+
+    Attributes:
+        name (str): Name of the customer.
+        drinks (int): Number of drinks in the report week.
+    """
+    name: str
+    drinks: int
+
+
+class DrinkCount(BaseModel):
+    """
+    A drink type ranked by how often it was served in the report week.
+
+    Attributes:
+        drink (str): Name of the drink type.
+        count (int): Number of times it was served.
+    """
+    drink: str
+    count: int
+
+
+class AboUsage(BaseModel):
+    """
+    Usage of one AboModel in the report week.
+
+    Attributes:
+        model_id (str): ID of the AboModel.
+        users (int): Number of distinct customers who redeemed a drink on it.
+        drinks (int): Number of drinks redeemed on it.
+    """
+    model_id: str
+    users: int
+    drinks: int
+
+
+class WeeklyReport(BaseModel):
+    """
+    Aggregated figures of one café for one ISO week.
+
+    Attributes:
+        cafe_id (str): ID of the café.
+        account_holder (str): Name of the café's account holder.
+        year (int): ISO year of the report week.
+        week (int): ISO week number.
+        start_date (date): Monday of the report week.
+        end_date (date): Sunday of the report week.
+        drinks_served (int): Total number of drinks served.
+        abo_users (int): Number of distinct Abo holders served.
+        top_users (List[TopUser]): Customers with the most drinks.
+        popular_drinks (List[DrinkCount]): Most served drink types.
+        abo_usage (List[AboUsage]): Drinks and users per AboModel.
+    """
+    cafe_id: str
+    account_holder: str
+    year: int
+    week: int
+    start_date: date
+    end_date: date
+    drinks_served: int
+    abo_users: int
+    top_users: List[TopUser]
+    popular_drinks: List[DrinkCount]
+    abo_usage: List[AboUsage]
+
+
+class ModelUsage(BaseModel):
+    """
+    Usage of one AboModel at one café over the analysed period.
+
+    Attributes:
+        model_id (str): ID of the AboModel.
+        abos (int): Number of Abos of this model at the café.
+        drinks (int): Drinks redeemed on these Abos.
+        quota_utilisation (Optional[float]): Drinks relative to the weekly quota (amount) of
+            all Abos over all weeks; None if the model has no quota.
+        at_quota_share (Optional[float]): Share of the Abo-weeks with at least one drink
+            that used up the quota; None if the model has no quota.
+        churn_risk (float): Share of the Abos without a drink in the last CHURN_DAYS days.
+        revenue_per_drink (Optional[float]): Weekly price of all Abos over all weeks per
+            redeemed drink; None if no drink was redeemed.
+    """
+    model_id: str
+    abos: int
+    drinks: int
+    quota_utilisation: Optional[float]
+    at_quota_share: Optional[float]
+    churn_risk: float
+    revenue_per_drink: Optional[float]
+
+
+class CafeUsage(BaseModel):
+    """
+    Usage statistics of one café over the analysed period.
+
+    Attributes:
+        cafe_id (str): ID of the café.
+        drinks (int): Drinks served, with or without Abo.
+        drinks_by_hour (List[List[int]]): Drinks per weekday (Monday first) and hour of day, 7 x 24.
+        models (List[ModelUsage]): Usage per AboModel offered at the café.
+    """
+    cafe_id: str
+    drinks: int
+    drinks_by_hour: List[List[int]]
+    models: List[ModelUsage]
+
+
+class UsageReport(BaseModel):
+    """
+    Usage statistics per café and AboModel.
+
+    Attributes:
+        start_date (date): First day of the analysed period.
+        end_date (date): Last day of the analysed period.
+        days (int): Number of days in the period.
+        cafes (List[CafeUsage]): Statistics per café.
+    """
+    start_date: date
+    end_date: date
+    days: int
+    cafes: List[CafeUsage]
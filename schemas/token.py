@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class Token(BaseModel):
@@ -10,3 +11,23 @@ class Token(BaseModel):
     """
     access_token: str
     token_type: str
+
+
+class TokenData(BaseModel):
+    """
+    Schema representing the decoded claims of a verified access token.
+
+    Attributes:
+        sub (str): ID of the authenticated employee or customer.
+        role (str): Either 'Employee' or 'Customer'.
+        cafe_id (Optional[str]): Café of the employee, not set for customers.
+        sudo (bool): Admin privileges flag of the employee.
+        name (Optional[str]): Name of the customer, not set for employees.
+        exp (Optional[int]): Expiry as a UNIX timestamp.
+    """
+    sub: str
+    role: str
+    cafe_id: Optional[str] = None
+    sudo: bool = False
+    name: Optional[str] = None
+    exp: Optional[int] = None
@@ -1,31 +1,24 @@
 # services/abo_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
-from schemas.token import Token
+from schemas.token import TokenData
 from schemas.abo import AboCreate
-from models.model import Abo, AboModel, Cafe
+from models.model import Abo
+from services import cafe_service
 
-def create_abo(abo: AboCreate, db: Session, token_data: Token):
+async def create_abo(abo: AboCreate, db: AsyncSession, token_data: TokenData):
     # Optional: enforce access control, e.g. same cafe
     if token_data.cafe_id != abo.cafe_id:
         raise HTTPException(status_code=403, detail="You can only create Abos for your own café")
 
-    # Check if the café exists
-    cafe = db.query(Cafe).filter(Cafe.id == abo.cafe_id).first()
-    if not cafe:
-        raise HTTPException(status_code=404, detail="Café not found.")
-
-    # Check if the café offers the Abo model
-    abomodel = db.query(AboModel).filter(
-        AboModel.id == abo.model_id,
-        AboModel.cafe_id == abo.cafe_id
-    ).first()
-
-    if not abomodel:
+    # Check if the café exists and offers the Abo model (from the catalogue cache)
+    cafe = await cafe_service.get_cafe_w_abos_async(abo.cafe_id, db)
+    if abo.model_id not in cafe.abomodels:
         raise HTTPException(status_code=400, detail="This café does not offer the selected Abo model.")
 
     # Prevent multiple Abos per customer
-    existing_abo = db.query(Abo).filter(Abo.customer_id == abo.customer_id).first()
+    existing_abo = await db.scalar(select(Abo.id).where(Abo.customer_id == abo.customer_id))
     if existing_abo:
         raise HTTPException(status_code=409, detail="Customer already has an active Abo.")
 
@@ -37,6 +30,6 @@ def create_abo(abo: AboCreate, db: Session, token_data: Token):
     )
 
     db.add(new_abo)
-    db.commit()
-    db.refresh(new_abo)
-    return new_abo
\ No newline at end of file
+    await db.commit()
+    await db.refresh(new_abo)
+    return new_abo
@@ -3,15 +3,23 @@ abomodel_service.py
 
 Service layer for managing AboModels (subscription models). Handles
 creation, update, retrieval, and deletion of AboModel entries in the database.
-Uses utility CRUD functions for common database operations.
+Uses utility CRUD functions for common database operations. Read functions
+also come as `_async` variants for endpoints running on the event loop.
+Pages of the AboModel list are served from the catalogue cache, which every
+change invalidates after its commit.
 """
 
-from typing import List
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from models import utility_crud
-from models.model import AboModel
-from schemas.abomodel import AboModelCreate
+from models.model import AboCafe, AboModel, Cafe
+from schemas.abomodel import AboModelBase, AboModelCreate
+from services import catalogue_cache
+from utils import etag, pagination
 
 def create_abomodel(db: Session, model: AboModelCreate) -> AboModel:
     """
@@ -32,6 +40,7 @@ def create_abomodel(db: Session, model: AboModelCreate) -> AboModel:
     )
     db.add(db_model)
     db.commit()
+    catalogue_cache.invalidate()
     db.refresh(db_model)
     return db_model
 
@@ -60,21 +69,94 @@ def patch_abomodel(model: AboModelCreate, db: Session) -> AboModel:
     db_model.amount = model.amount
 
     db.commit()
+    catalogue_cache.invalidate()
     db.refresh(db_model)
     return db_model
 
 
-def get_all(db: Session) -> List[AboModel]:
+def _abomodel_page(cursor: Optional[str], limit: int):
+    stmt = select(*pagination.projection(AboModel, AboModelBase), AboModel.version)
+    return pagination.paginate(stmt, [AboModel.id], cursor, limit)
+
+
+def _versioned_page(rows: list, cursor: Optional[str], limit: int) -> etag.Versioned:
+    models, next_cursor = pagination.page(rows, ["id"], limit)
+    # Inserts and deletes change the set of rows, updates their versions
+    tag = etag.from_versions(cursor, limit, next_cursor, [(model.id, model.version) for model in models])
+    return etag.Versioned((models, next_cursor), tag)
+
+
+def get_all_versioned(db: Session, cursor: Optional[str] = None,
+                      limit: int = pagination.DEFAULT_LIMIT) -> etag.Versioned:
+    """
+    Retrieve a page of AboModel entries, sorted by ID, together with an ETag derived
+    from the IDs and row versions of the page. Only the columns of AboModelBase are
+    selected.
+
+    Args:
+        db (Session): The SQLAlchemy session.
+        cursor (Optional[str]): Cursor of the page, None for the first page.
+        limit (int): Page size.
+
+    Returns:
+        Versioned: The AboModels of the page and the cursor of the next page, with the ETag.
+    """
+    return catalogue_cache.get_or_load(
+        ("abomodels", cursor, limit),
+        lambda: _versioned_page(db.execute(_abomodel_page(cursor, limit)).all(), cursor, limit)
+    )
+
+
+async def get_all_versioned_async(db: AsyncSession, cursor: Optional[str] = None,
+                                  limit: int = pagination.DEFAULT_LIMIT) -> etag.Versioned:
+    """
+    Retrieve a page of AboModel entries, sorted by ID, together with its ETag, using
+    an async session.
+
+    Args:
+        db (AsyncSession): The async SQLAlchemy session.
+        cursor (Optional[str]): Cursor of the page, None for the first page.
+        limit (int): Page size.
+
+    Returns:
+        Versioned: The AboModels of the page and the cursor of the next page, with the ETag.
+    """
+    async def load():
+        return _versioned_page((await db.execute(_abomodel_page(cursor, limit))).all(), cursor, limit)
+
+    return await catalogue_cache.get_or_load_async(("abomodels", cursor, limit), load)
+
+
+def get_all(db: Session, cursor: Optional[str] = None,
+            limit: int = pagination.DEFAULT_LIMIT) -> Tuple[list, Optional[str]]:
     """
-    Retrieve all AboModel entries from the database.
+    Retrieve a page of AboModel entries, sorted by ID.
 
     Args:
         db (Session): The SQLAlchemy session.
+        cursor (Optional[str]): Cursor of the page, None for the first page.
+        limit (int): Page size.
 
     Returns:
-        List[AboModel]: A list of all AboModel entries.
+        Tuple[list, Optional[str]]: The AboModels of the page and the cursor of the next page.
+    """
+    return get_all_versioned(db, cursor, limit).value
+
+
+async def get_all_async(db: AsyncSession, cursor: Optional[str] = None,
+                        limit: int = pagination.DEFAULT_LIMIT) -> Tuple[list, Optional[str]]:
     """
-    return db.query(AboModel).all()
+    Retrieve a page of AboModel entries, sorted by ID, using an async session.
+
+    Args:
+        db (AsyncSession): The async SQLAlchemy session.
+        cursor (Optional[str]): Cursor of the page, None for the first page.
+        limit (int): Page size.
+
+    Returns:
+        Tuple[list, Optional[str]]: The AboModels of the page and the cursor of the next page.
+    """
+    return (await get_all_versioned_async(db, cursor, limit)).value
 
 
 def get_by_id(id: str, db: Session) -> AboModel:
@@ -94,6 +176,23 @@ def get_by_id(id: str, db: Session) -> AboModel:
     return utility_crud.get_by_id(AboModel, id, db)
 
 
+async def get_by_id_async(id: str, db: AsyncSession) -> AboModel:
+    """
+    Retrieve a single AboModel by its unique ID using an async session.
+
+    Args:
+        id (str): The AboModel ID.
+        db (AsyncSession): The async SQLAlchemy session.
+
+    Returns:
+        AboModel: The matching AboModel object.
+
+    Raises:
+        HTTPException: If the AboModel does not exist.
+    """
+    return await utility_crud.get_by_id_async(AboModel, id, db)
+
+
 def delete_by_id(id: str, db: Session):
     """
     Delete an AboModel from the database by its ID.
@@ -105,4 +204,9 @@ def delete_by_id(id: str, db: Session):
     Returns:
         dict: A confirmation message after deletion.
     """
-    return utility_crud.delete_by_id(AboModel, id, db)
+    # Deleting the AboModel unlinks it from its cafés; bump their row versions
+    linked = select(AboCafe.c.cafe_id).where(AboCafe.c.abo_id == id)
+    db.execute(update(Cafe).where(Cafe.id.in_(linked)).values(updated_at=datetime.now()))
+    result = utility_crud.delete_by_id(AboModel, id, db)
+    catalogue_cache.invalidate()
+    return result
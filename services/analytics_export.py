@@ -0,0 +1,257 @@
+"""
+analytics_export.py
+
+Nightly export of the transactional data into columnar datasets (Parquet via Arrow, or
+Lance), so that analysts can run heavy queries without touching the production database.
+
+Layout below ANALYTICS_DIR:
+    drink_events/   Partitioned by café and ISO week (cafe_id=/year=/week=), appended
+                    incrementally: only events with an ID above the watermark are read.
+    abos/           Snapshot of all Abos, partitioned by café.
+    customers/      Snapshot of all customers without personal data (name, email, password).
+    _watermark.json ID of the last exported drink event, per format.
+
+Drink events are append-only, so their ID serves as watermark. They are read through a
+server-side cursor in batches of ANALYTICS_BATCH_SIZE rows; after every written batch
+the watermark is advanced. Files of a batch whose watermark was never written (an
+interrupted run) are removed before the next run starts, so no event is exported twice.
+Abos and customers change in place and are replaced by a fresh snapshot on every run.
+With Lance, the partition columns are stored in the dataset instead of the directory
+layout. On PostgreSQL, a transaction that commits an event with a lower ID after a run
+passed it leaves that event out; `full=True` rebuilds the export from scratch.
+
+Functions:
+    - run: Export new drink events and fresh snapshots of Abos and customers.
+"""
+
+import glob
+import json
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+import lance
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+from models.model import Abo, Customer, DrinkEvent
+import config
+
+EVENT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("customer_id", pa.string()),
+    ("cafe_id", pa.string()),
+    ("abo_id", pa.string()),
+    ("drink", pa.string()),
+    ("timestamp", pa.timestamp("us")),
+])
+ABO_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("model_id", pa.string()),
+    ("customer_id", pa.string()),
+    ("cafe_id", pa.string()),
+])
+CUSTOMER_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("paymentMethod", pa.int32()),
+    ("activated", pa.bool_()),
+    ("lastPaid", pa.date32()),
+    ("drinksDrunk", pa.int64()),
+    ("updated_at", pa.timestamp("us")),
+])
+EVENT_PARTITIONS = ["cafe_id", "year", "week"]
+WATERMARK_FILE = "_watermark.json"
+_BATCH_FILE = re.compile(r"events-(\d+)-\d+\.parquet$")
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    """
+    Outcome of an analytics export run.
+
+    Attributes:
+        events (int): Drink events appended in this run.
+        abos (int): Abos in the snapshot.
+        customers (int): Customers in the snapshot.
+        watermark (int): ID of the last exported drink event.
+        seconds (float): Wall time of the run.
+    """
+    events: int
+    abos: int
+    customers: int
+    watermark: int
+    seconds: float
+
+
+def _batches(db: Session, stmt: Select, schema: pa.Schema) -> Iterator[pa.RecordBatch]:
+    """
+    Reads a query in batches of ANALYTICS_BATCH_SIZE rows and converts them to Arrow.
+    """
+    result = db.execute(stmt.execution_options(yield_per=config.ANALYTICS_BATCH_SIZE))
+    for rows in result.partitions():
+        columns = zip(*rows)
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+        )
+
+
+def _with_week(batch: pa.RecordBatch) -> pa.Table:
+    table = pa.Table.from_batches([batch])
+    timestamps = table.column("timestamp")
+    table = table.append_column("year", pc.cast(pc.iso_year(timestamps), pa.int32()))
+    return table.append_column("week", pc.cast(pc.iso_week(timestamps), pa.int32()))
+
+
+def _read_watermarks(directory: str) -> dict:
+    path = os.path.join(directory, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_watermark(directory: str, fmt: str, watermark: int):
+    path = os.path.join(directory, WATERMARK_FILE)
+    watermarks = {**_read_watermarks(directory), fmt: watermark}
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(watermarks, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _replace_dir(tmp: str, final: str):
+    old = f"{final}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(final):
+        os.rename(final, old)
+    os.rename(tmp, final)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+class _ParquetTarget:
+    """
+    Writes hive-partitioned Parquet datasets. Every batch of drink events is written
+    into files named after its first event ID, which identifies them after a crash.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.events = os.path.join(directory, "drink_events")
+
+    def discard_after(self, watermark: int):
+        pattern = os.path.join(self.events, "**", "events-*.parquet")
+        for path in glob.glob(pattern, recursive=True):
+            match = _BATCH_FILE.search(path)
+            if match and int(match.group(1)) > watermark:
+                os.remove(path)
+
+    def append_events(self, table: pa.Table):
+        first_id = table.column("id")[0].as_py()
+        ds.write_dataset(
+            table, self.events, format="parquet", partitioning=EVENT_PARTITIONS, partitioning_flavor="hive",
+            basename_template=f"events-{first_id:012d}-{{i}}.parquet", existing_data_behavior="overwrite_or_ignore"
+        )
+
+    def replace(self, name: str, schema: pa.Schema, batches: Iterator[pa.RecordBatch],
+                partitioning: Optional[list] = None):
+        final = os.path.join(self.directory, name)
+        tmp = f"{final}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        ds.write_dataset(batches, tmp, schema=schema, format="parquet", partitioning=partitioning,
+                         partitioning_flavor="hive" if partitioning else None)
+        # An empty table writes no files
+        os.makedirs(tmp, exist_ok=True)
+        _replace_dir(tmp, final)
+
+    def reset(self):
+        shutil.rmtree(self.events, ignore_errors=True)
+
+
+class _LanceTarget:
+    """
+    Writes Lance datasets. Every write is an atomic commit of a new dataset version.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.events = os.path.join(directory, "drink_events.lance")
+
+    def discard_after(self, watermark: int):
+        if os.path.exists(self.events):
+            dataset = lance.dataset(self.events)
+            if dataset.count_rows(filter=f"id > {watermark}"):
+                dataset.delete(f"id > {watermark}")
+
+    def append_events(self, table: pa.Table):
+        mode = "append" if os.path.exists(self.events) else "create"
+        lance.write_dataset(table, self.events, mode=mode)
+
+    def replace(self, name: str, schema: pa.Schema, batches: Iterator[pa.RecordBatch],
+                partitioning: Optional[list] = None):
+        reader = pa.RecordBatchReader.from_batches(schema, batches)
+        lance.write_dataset(reader, os.path.join(self.directory, f"{name}.lance"), mode="overwrite")
+
+    def reset(self):
+        shutil.rmtree(self.events, ignore_errors=True)
+
+
+def run(db: Session, directory: Optional[str] = None, fmt: Optional[str] = None, full: bool = False) -> ExportResult:
+    """
+    Appends the drink events recorded since the last run and replaces the snapshots
+    of Abos and customers.
+
+    Args:
+        db (Session): SQLAlchemy session to read from.
+        directory (Optional[str]): Target directory, defaults to ANALYTICS_DIR.
+        fmt (Optional[str]): "parquet" or "lance", defaults to ANALYTICS_FORMAT.
+        full (bool): Drop the exported drink events and export all of them again.
+
+    Returns:
+        ExportResult: Exported row counts and the new watermark.
+    """
+    start = time.perf_counter()
+    directory = directory or config.ANALYTICS_DIR
+    fmt = fmt or config.ANALYTICS_FORMAT
+    os.makedirs(directory, exist_ok=True)
+    target = _LanceTarget(directory) if fmt == "lance" else _ParquetTarget(directory)
+
+    if full:
+        target.reset()
+        _write_watermark(directory, fmt, 0)
+    watermark = _read_watermarks(directory).get(fmt, 0)
+    target.discard_after(watermark)
+
+    # Events recorded while the export runs are left for the next run
+    until = db.scalar(select(func.max(DrinkEvent.id))) or 0
+    events = 0
+    stmt = (
+        select(DrinkEvent.id, DrinkEvent.customer_id, DrinkEvent.cafe_id, DrinkEvent.abo_id,
+               DrinkEvent.drink, DrinkEvent.timestamp)
+        .where(DrinkEvent.id > watermark, DrinkEvent.id <= until)
+        .order_by(DrinkEvent.id)
+    )
+    for batch in _batches(db, stmt, EVENT_SCHEMA):
+        target.append_events(_with_week(batch))
+        watermark = batch.column("id")[-1].as_py()
+        _write_watermark(directory, fmt, watermark)
+        events += batch.num_rows
+
+    counts = {"abos": 0, "customers": 0}
+
+    def counted(name: str, batches: Iterator[pa.RecordBatch]) -> Iterator[pa.RecordBatch]:
+        for batch in batches:
+            counts[name] += batch.num_rows
+            yield batch
+
+    abos = select(Abo.id, Abo.model_id, Abo.customer_id, Abo.cafe_id).order_by(Abo.id)
+    target.replace("abos", ABO_SCHEMA, counted("abos", _batches(db, abos, ABO_SCHEMA)), ["cafe_id"])
+    customers = select(
+        Customer.id, Customer.paymentMethod, Customer.activated, Customer.lastPaid, Customer.drinksDrunk,
+        Customer.updated_at
+    ).order_by(Customer.id)
+    target.replace("customers", CUSTOMER_SCHEMA, counted("customers", _batches(db, customers, CUSTOMER_SCHEMA)))
+
+    return ExportResult(events, counts["abos"], counts["customers"], watermark, time.perf_counter() - start)
@@ -3,21 +3,23 @@ auth_service.py
 
 Handles authentication logic for employees and customers.
 Verifies credentials and generates JWT access tokens upon successful login.
+Password checks run on the bounded bcrypt pool, so the functions are coroutines.
+Stored hashes with outdated scheme or cost are upgraded on a successful login.
 """
 
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import EmailStr
 from fastapi import HTTPException
 from models.model import Employee, Customer
-from utils.security import verify_password, create_access_token
+from utils.security import verify_and_update_async, create_access_token
 
-def authenticate_employee(db: Session, employee_id: str, cafe_id: str, password: str) -> str:
+async def authenticate_employee(db: AsyncSession, employee_id: str, cafe_id: str, password: str) -> str:
     """
     Authenticates an employee using their ID, café ID, and password.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): Async SQLAlchemy database session.
         employee_id (str): The ID of the employee.
         cafe_id (str): The ID of the café the employee belongs to.
         password (str): The plain text password to verify.
@@ -28,16 +30,23 @@ def authenticate_employee(db: Session, employee_id: str, cafe_id: str, password:
     Returns:
         str: JWT access token containing employee credentials.
     """
-    employee = db.query(Employee).filter(
+    employee = (await db.execute(select(Employee).where(
         and_(
             Employee.id == employee_id,
             Employee.cafe_id == cafe_id
         )
-    ).first()
+    ))).scalars().first()
 
-    if not employee or not verify_password(password, employee.hashed_password):
+    if not employee:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    valid, new_hash = await verify_and_update_async(password, employee.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        employee.hashed_password = new_hash
+        await db.commit()
+
     token_data = {
         "sub": employee.id,
         "cafe_id": employee.cafe_id,
@@ -49,12 +58,12 @@ def authenticate_employee(db: Session, employee_id: str, cafe_id: str, password:
     return create_access_token(token_data)
 
 
-def authenticate_customer(db: Session, emailS: EmailStr, password: str) -> str:
+async def authenticate_customer(db: AsyncSession, emailS: EmailStr, password: str) -> str:
     """
     Authenticates a customer using their email and password.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): Async SQLAlchemy database session.
         emailS (EmailStr): The customer's email address.
         password (str): The plain text password to verify.
 
@@ -64,10 +73,17 @@ def authenticate_customer(db: Session, emailS: EmailStr, password: str) -> str:
     Returns:
         str: JWT access token containing customer information.
     """
-    customer = db.query(Customer).filter(emailS == Customer.email).first()
+    customer = (await db.execute(select(Customer).where(Customer.email == emailS))).scalars().first()
     
-    if not customer or not verify_password(password, customer.hashed_password):
+    if not customer:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    valid, new_hash = await verify_and_update_async(password, customer.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        customer.hashed_password = new_hash
+        await db.commit()
 
     token_data = {
         "sub": customer.id,
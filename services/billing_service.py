@@ -0,0 +1,209 @@
+"""
+billing_service.py
+
+Weekly billing run: charges every active customer the price per week of each of their
+Abos, marks the customers as paid and computes the payout of every café.
+
+All work is done with set-based statements. Customers are processed in batches in the
+order of their IDs; each batch charges its Abos with one INSERT ... SELECT, updates
+lastPaid with one UPDATE and moves the run's cursor, all in a single transaction. The
+committed cursor is the checkpoint: an interrupted run resumes after the last finished
+batch, and because an Abo is charged at most once per week (the primary key of
+charges), running a week again never charges anybody twice.
+
+Functions:
+    - run: Bill one ISO week.
+    - payouts: Return the payouts of a billed week.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import delete, func, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models.model import Abo, AboModel, BillingRun, Cafe, Charge, Customer, Payout
+from services import report_service
+import config
+
+
+@dataclass(frozen=True)
+class BillingResult:
+    """
+    Outcome of the billing run of one week.
+
+    Attributes:
+        year (int): ISO year of the billed week.
+        week (int): ISO week number of the billed week.
+        customers (int): Number of charged customers.
+        charges (int): Number of charged Abos.
+        amount (int): Sum of all charges.
+        payouts (int): Number of cafés with a payout.
+        batches (int): Customer batches billed by this call; 0 if the week was billed before.
+        seconds (float): Wall time of this call.
+    """
+    year: int
+    week: int
+    customers: int
+    charges: int
+    amount: int
+    payouts: int
+    batches: int
+    seconds: float
+
+
+def _dialect(db: Session):
+    return postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+
+
+def _start(db: Session, year: int, week: int, force: bool) -> BillingRun:
+    db.execute(
+        _dialect(db).insert(BillingRun)
+        .values(year=year, week=week, status="running", started_at=datetime.now())
+        .on_conflict_do_nothing(index_elements=["year", "week"])
+    )
+    if force:
+        # Start over from the first customer; until the payouts are recomputed, the week
+        # must not count as done, or an interrupted run would leave them outdated.
+        db.execute(
+            update(BillingRun)
+            .where(BillingRun.year == year, BillingRun.week == week)
+            .values(status="running", cursor=None, finished_at=None)
+        )
+    db.commit()
+    return db.get(BillingRun, (year, week), populate_existing=True)
+
+
+def _bill_batch(db: Session, year: int, week: int, cursor: Optional[str], batch_size: int,
+                paid_on: date) -> Optional[str]:
+    """
+    Charges the next batch of active customers after `cursor` in one transaction and
+    returns the ID of the last one, or None if no customers are left.
+    """
+    ids = select(Customer.id).where(Customer.activated.is_(True)).order_by(Customer.id).limit(batch_size)
+    if cursor is not None:
+        ids = ids.where(Customer.id > cursor)
+    ids = db.scalars(ids).all()
+    if not ids:
+        return None
+    in_batch = [Customer.id <= ids[-1]] + ([Customer.id > cursor] if cursor is not None else [])
+    charged_in_batch = [Charge.customer_id <= ids[-1]] + ([Charge.customer_id > cursor] if cursor is not None else [])
+
+    abos = (
+        select(Abo.id, literal(year), literal(week), Abo.customer_id, Abo.cafe_id, Abo.model_id,
+               AboModel.priceperweek)
+        .join(Customer, Customer.id == Abo.customer_id)
+        .join(AboModel, AboModel.id == Abo.model_id)
+        .where(*in_batch, Customer.activated.is_(True), Abo.cafe_id.isnot(None),
+               AboModel.priceperweek.isnot(None))
+    )
+    db.execute(
+        _dialect(db).insert(Charge)
+        .from_select(["abo_id", "year", "week", "customer_id", "cafe_id", "model_id", "amount"], abos)
+        .on_conflict_do_nothing(index_elements=["abo_id", "year", "week"])
+    )
+
+    charged = select(Charge.customer_id).where(Charge.year == year, Charge.week == week, *charged_in_batch)
+    db.execute(
+        update(Customer)
+        .where(*in_batch, Customer.id.in_(charged), or_(Customer.lastPaid.is_(None), Customer.lastPaid < paid_on))
+        .values(lastPaid=paid_on)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(BillingRun)
+        .where(BillingRun.year == year, BillingRun.week == week)
+        .values(cursor=ids[-1])
+    )
+    db.commit()
+    return ids[-1]
+
+
+def _compute_payouts(db: Session, year: int, week: int):
+    """
+    Recomputes the payouts of a week from its charges and marks the run as done.
+    """
+    totals = (
+        select(Charge.cafe_id, literal(year), literal(week), Cafe.iban, Cafe.bic, Cafe.account_holder,
+               func.sum(Charge.amount), func.count())
+        .join(Cafe, Cafe.id == Charge.cafe_id)
+        .where(Charge.year == year, Charge.week == week)
+        .group_by(Charge.cafe_id, Cafe.iban, Cafe.bic, Cafe.account_holder)
+    )
+    db.execute(delete(Payout).where(Payout.year == year, Payout.week == week))
+    db.execute(
+        Payout.__table__.insert().from_select(
+            ["cafe_id", "year", "week", "iban", "bic", "account_holder", "amount", "charges"], totals
+        )
+    )
+    db.execute(
+        update(BillingRun)
+        .where(BillingRun.year == year, BillingRun.week == week)
+        .values(status="done", finished_at=datetime.now())
+    )
+    db.commit()
+
+
+def run(db: Session, year: int, week: int, batch_size: Optional[int] = None,
+        force: bool = False) -> BillingResult:
+    """
+    Bills one ISO week: charges the Abos of all active customers, sets their lastPaid
+    to the last day of the week and computes the payout per café.
+
+    A week that was billed completely is not billed again; its totals are returned.
+    With `force`, the run starts over from the first customer, so customers and Abos
+    added since are charged as well, and the payouts are recomputed. Abos that were
+    charged already are never charged twice.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        year (int): ISO year.
+        week (int): ISO week number.
+        batch_size (Optional[int]): Customers per transaction, defaults to BILLING_BATCH_SIZE.
+        force (bool): Bill a week again that was billed before.
+
+    Returns:
+        BillingResult: Totals of the billed week.
+
+    Raises:
+        HTTPException: If the week does not exist or has not ended yet.
+    """
+    start = time.perf_counter()
+    if report_service.week_bounds(year, week)[1] > datetime.now():
+        raise HTTPException(status_code=400, detail="Only weeks that have ended can be billed")
+    batch_size = batch_size or config.BILLING_BATCH_SIZE
+    paid_on = date.fromisocalendar(year, week, 7)
+
+    billing_run = _start(db, year, week, force)
+    batches = 0
+    if billing_run.status != "done":
+        cursor = billing_run.cursor
+        while (cursor := _bill_batch(db, year, week, cursor, batch_size, paid_on)) is not None:
+            batches += 1
+        _compute_payouts(db, year, week)
+
+    customers, charges, amount = db.execute(
+        select(func.count(func.distinct(Charge.customer_id)), func.count(), func.coalesce(func.sum(Charge.amount), 0))
+        .where(Charge.year == year, Charge.week == week)
+    ).one()
+    cafes = db.scalar(select(func.count()).select_from(Payout).where(Payout.year == year, Payout.week == week))
+    return BillingResult(year, week, customers, charges, amount, cafes, batches, time.perf_counter() - start)
+
+
+def payouts(db: Session, year: int, week: int) -> List[Payout]:
+    """
+    Returns the payouts of a billed week ordered by café.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        year (int): ISO year.
+        week (int): ISO week number.
+
+    Returns:
+        List[Payout]: One payout per café with charges in that week.
+    """
+    return db.scalars(
+        select(Payout).where(Payout.year == year, Payout.week == week).order_by(Payout.cafe_id)
+    ).all()
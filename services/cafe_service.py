@@ -7,19 +7,30 @@ as well as associating cafés with subscription models (AboModels).
 
 Functions:
     - create_cafe: Create a new café with optional AboModel associations.
-    - get_all_cafes: Retrieve a list of all cafés.
+    - get_all_cafes: Retrieve a page of cafés.
     - get_by_id: Retrieve a café by its ID.
     - delete_by_id: Delete a café by its ID.
     - get_cafe_w_abos: Retrieve a café and its associated AboModels.
+    - get_cafe_w_abos_versioned: The same with ETag and Last-Modified for conditional GETs.
     - patch_cafe: Update café details and link new AboModels.
+
+The read functions also come as `_async` variants for endpoints running on the event loop.
+AboModel links are always loaded with selectinload and looked up with a single IN query,
+never one query per AboModel. Cafés with their AboModels are served from the catalogue
+cache, which every change invalidates after its commit.
 """
 
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException
 from models.model import Cafe, AboModel
 from models import utility_crud
 from schemas.cafe import CafeCreate, CafeOut, CafeOutB
-from utils import validation
+from services import catalogue_cache
+from utils import etag, pagination, validation
 
 
 def create_cafe(db: Session, cafe_data: CafeCreate) -> Cafe:
@@ -40,28 +51,75 @@ def create_cafe(db: Session, cafe_data: CafeCreate) -> Cafe:
         account_holder=cafe_data.account_holder
     )
 
-    for abo_id in cafe_data.abomodels:
-        abo = db.query(AboModel).filter(AboModel.id == abo_id).first()
-        if abo:
-            cafe.abolist.append(abo)  # Many-to-Many linking
+    # Many-to-Many linking; unknown AboModel IDs are ignored
+    cafe.abolist = _abomodels(cafe_data.abomodels, db)
 
     db.add(cafe)
     db.commit()
+    catalogue_cache.invalidate()
     db.refresh(cafe)
     return cafe
 
 
-def get_all_cafes(db: Session):
+def _abomodels(ids: List[str], db: Session) -> List[AboModel]:
+    """
+    Loads the AboModels with the given IDs in a single IN query.
+    """
+    if not ids:
+        return []
+    return db.scalars(select(AboModel).where(AboModel.id.in_(set(ids)))).all()
+
+
+def _with_abos(cafe: Cafe) -> CafeOutB:
+    return CafeOutB(
+        id=cafe.id,
+        iban=cafe.iban,
+        bic=cafe.bic,
+        account_holder=cafe.account_holder,
+        abomodels=[abo.id for abo in cafe.abolist]
+    )
+
+
+def _versioned(cafe: Cafe) -> etag.Versioned:
+    return etag.Versioned(_with_abos(cafe), etag.from_versions(cafe.id, cafe.version, cafe.updated_at),
+                          cafe.updated_at)
+
+
+def _cafe_page(cursor: Optional[str], limit: int):
+    stmt = select(*pagination.projection(Cafe, CafeOut))
+    return pagination.paginate(stmt, [Cafe.id], cursor, limit)
+
+
+def get_all_cafes(db: Session, cursor: Optional[str] = None,
+                  limit: int = pagination.DEFAULT_LIMIT) -> Tuple[list, Optional[str]]:
     """
-    Fetch all cafés from the database.
+    Fetch a page of cafés, sorted by ID. Only the columns of CafeOut are selected.
 
     Args:
         db (Session): SQLAlchemy database session.
+        cursor (Optional[str]): Cursor of the page, None for the first page.
+        limit (int): Page size.
+
+    Returns:
+        Tuple[list, Optional[str]]: The cafés of the page and the cursor of the next page.
+    """
+    return pagination.page(db.execute(_cafe_page(cursor, limit)).all(), ["id"], limit)
+
+
+async def get_all_cafes_async(db: AsyncSession, cursor: Optional[str] = None,
+                              limit: int = pagination.DEFAULT_LIMIT) -> Tuple[list, Optional[str]]:
+    """
+    Fetch a page of cafés, sorted by ID, using an async session.
+
+    Args:
+        db (AsyncSession): Async SQLAlchemy database session.
+        cursor (Optional[str]): Cursor of the page, None for the first page.
+        limit (int): Page size.
 
     Returns:
-        List[Cafe]: A list of all cafés.
+        Tuple[list, Optional[str]]: The cafés of the page and the cursor of the next page.
     """
-    return db.query(Cafe).all()
+    return pagination.page((await db.execute(_cafe_page(cursor, limit))).all(), ["id"], limit)
 
 
 def get_by_id(ida: str, db: Session):
@@ -78,6 +136,23 @@ def get_by_id(ida: str, db: Session):
     return utility_crud.get_by_id(Cafe, ida, db)
 
 
+async def get_by_id_async(ida: str, db: AsyncSession):
+    """
+    Retrieve a café by its ID using an async session.
+
+    Args:
+        id (str): The unique café ID.
+        db (AsyncSession): Async SQLAlchemy database session.
+
+    Returns:
+        Cafe: The Café instance.
+
+    Raises:
+        HTTPException: If café with given ID is not found.
+    """
+    return await utility_crud.get_by_id_async(Cafe, ida, db)
+
+
 def delete_by_id(ida: str, db: Session):
     """
     Delete a café by its ID.
@@ -89,7 +164,61 @@ def delete_by_id(ida: str, db: Session):
     Returns:
         bool: True if deleted, False otherwise.
     """
-    return utility_crud.delete_by_id(Cafe, ida, db)
+    result = utility_crud.delete_by_id(Cafe, ida, db)
+    catalogue_cache.invalidate()
+    return result
+
+
+def get_cafe_w_abos_versioned(cafe_id: str, db: Session) -> etag.Versioned:
+    """
+    Retrieve a café by ID, including all associated AboModel IDs, together with its
+    ETag and Last-Modified time derived from the café's row version.
+
+    Args:
+        cafe_id (str): Unique ID of the café.
+        db (Session): SQLAlchemy database session.
+
+    Returns:
+        Versioned: The CafeOutB representation and its validators.
+
+    Raises:
+        HTTPException: If café with given ID is not found.
+    """
+    def load():
+        cafe = db.scalars(select(Cafe).options(selectinload(Cafe.abolist)).where(Cafe.id == cafe_id)).first()
+        if not cafe:
+            raise HTTPException(status_code=404, detail="Café not found")
+        return _versioned(cafe)
+
+    return catalogue_cache.get_or_load(("cafe", cafe_id), load)
+
+
+async def get_cafe_w_abos_versioned_async(cafe_id: str, db: AsyncSession) -> etag.Versioned:
+    """
+    Retrieve a café by ID, including all associated AboModel IDs, together with its
+    ETag and Last-Modified time, using an async session. The AboModels are loaded
+    eagerly, as lazy loading is not possible on the event loop.
+
+    Args:
+        cafe_id (str): Unique ID of the café.
+        db (AsyncSession): Async SQLAlchemy database session.
+
+    Returns:
+        Versioned: The CafeOutB representation and its validators.
+
+    Raises:
+        HTTPException: If café with given ID is not found.
+    """
+    async def load():
+        result = await db.execute(
+            select(Cafe).options(selectinload(Cafe.abolist)).where(Cafe.id == cafe_id)
+        )
+        cafe = result.scalars().first()
+        if not cafe:
+            raise HTTPException(status_code=404, detail="Café not found")
+        return _versioned(cafe)
+
+    return await catalogue_cache.get_or_load_async(("cafe", cafe_id), load)
 
 
 def get_cafe_w_abos(cafe_id: str, db: Session) -> CafeOutB:
@@ -106,17 +235,24 @@ def get_cafe_w_abos(cafe_id: str, db: Session) -> CafeOutB:
     Raises:
         HTTPException: If café with given ID is not found.
     """
-    cafe = db.query(Cafe).filter(Cafe.id == cafe_id).first()
-    if not cafe:
-        raise HTTPException(status_code=404, detail="Café not found")
-    
-    return CafeOutB(
-        id=cafe.id,
-        iban=cafe.iban,
-        bic=cafe.bic,
-        account_holder=cafe.account_holder,
-        abomodels=[abo.id for abo in cafe.abolist]
-    )
+    return get_cafe_w_abos_versioned(cafe_id, db).value
+
+
+async def get_cafe_w_abos_async(cafe_id: str, db: AsyncSession) -> CafeOutB:
+    """
+    Retrieve a café by ID, including all associated AboModel IDs, using an async session.
+
+    Args:
+        cafe_id (str): Unique ID of the café.
+        db (AsyncSession): Async SQLAlchemy database session.
+
+    Returns:
+        CafeOutB: A café representation including linked AboModels.
+
+    Raises:
+        HTTPException: If café with given ID is not found.
+    """
+    return (await get_cafe_w_abos_versioned_async(cafe_id, db)).value
 
 
 def patch_cafe(model: CafeCreate, db: Session) -> CafeOut:
@@ -134,17 +270,23 @@ def patch_cafe(model: CafeCreate, db: Session) -> CafeOut:
         HTTPException: If validation or update fails.
     """
     validation.validate_bankdetails(model.iban, model.bic)
-    db_model = get_by_id(model.id, db)
-    
+    db_model = db.scalars(select(Cafe).options(selectinload(Cafe.abolist)).where(Cafe.id == model.id)).first()
+    if not db_model:
+        raise HTTPException(status_code=404, detail="Café not found")
+
     db_model.iban = model.iban
     db_model.bic = model.bic
     db_model.account_holder = model.account_holder
 
-    for abo_id in model.abomodels:
-        abo = db.query(AboModel).filter(AboModel.id == abo_id).first()
-        if abo and abo not in db_model.abolist:
-            db_model.abolist.append(abo)
+    linked = {abo.id for abo in db_model.abolist}
+    added = [abo for abo in _abomodels(model.abomodels, db) if abo.id not in linked]
+    if added:
+        db_model.abolist.extend(added)
+        # New links do not touch the cafes row; update it so that its version changes
+        db_model.updated_at = datetime.now()
 
+    # Built before the commit expires the instance, so no reload is needed
+    result = _with_abos(db_model)
     db.commit()
-    db.refresh(db_model)
-    return get_cafe_w_abos(model.id, db)
+    catalogue_cache.invalidate()
+    return result
@@ -0,0 +1,104 @@
+"""
+catalogue_cache.py
+
+In-process read-through cache of the AboModel and café catalogue, which changes rarely
+but is read on every catalogue view and Abo creation.
+
+Entries are stored together with the catalogue version they were loaded under. The
+service functions that create, patch or delete AboModels or cafés bump the version after
+their commit, which makes all cached entries stale at once. The version is kept in a
+pluggable invalidation backend (CATALOGUE_CACHE_BACKEND), so that several workers can
+share invalidations.
+
+Functions:
+    - get_or_load: Return a cached value or load and cache it.
+    - get_or_load_async: The same for a loader running on the event loop.
+    - invalidate: Mark all cached catalogue entries as stale.
+    - set_backend: Replace the invalidation backend, e.g. in tests.
+    - catalogue_cache_metrics: Size, hit rate and version of the cache.
+"""
+
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+from database import async_engine, engine
+from utils.invalidation import DatabaseBackend, InvalidationBackend, MemoryBackend
+from utils.token_cache import TokenCache
+import config
+
+NAMESPACE = "catalogue"
+
+# Values keyed by lookup, stored as (version, value)
+_entries = TokenCache(config.CATALOGUE_CACHE_SIZE, config.CATALOGUE_CACHE_TTL)
+_backend: InvalidationBackend = (
+    DatabaseBackend(engine, config.CATALOGUE_CACHE_POLL, async_engine)
+    if config.CATALOGUE_CACHE_BACKEND == "database" else MemoryBackend()
+)
+
+
+def set_backend(backend: InvalidationBackend):
+    """
+    Replaces the invalidation backend and drops all cached entries.
+    """
+    global _backend
+    _backend = backend
+    _entries.clear()
+
+
+def _lookup(key: Hashable, version: int) -> Tuple[int, Optional[Any]]:
+    # The version is read before loading, so a change committed during the load
+    # leaves the entry stale instead of caching outdated data as current.
+    entry = _entries.get(key)
+    if entry is not None and entry[0] == version:
+        return version, entry[1]
+    return version, None
+
+
+def get_or_load(key: Hashable, load: Callable[[], Any]) -> Any:
+    """
+    Returns the cached value of a lookup, calling `load` if it is missing or stale.
+    Loaders must not return None; exceptions (e.g. 404s) are not cached.
+
+    Args:
+        key (Hashable): Key of the lookup, e.g. ("cafe", cafe_id).
+        load (Callable[[], Any]): Loads the value from the database.
+
+    Returns:
+        Any: The cached or loaded value.
+    """
+    version, value = _lookup(key, _backend.version(NAMESPACE))
+    if value is None:
+        value = load()
+        _entries.put(key, (version, value))
+    return value
+
+
+async def get_or_load_async(key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Returns the cached value of a lookup, awaiting `load` if it is missing or stale.
+
+    Args:
+        key (Hashable): Key of the lookup, e.g. ("cafe", cafe_id).
+        load (Callable[[], Awaitable[Any]]): Loads the value from the database.
+
+    Returns:
+        Any: The cached or loaded value.
+    """
+    version, value = _lookup(key, await _backend.version_async(NAMESPACE))
+    if value is None:
+        value = await load()
+        _entries.put(key, (version, value))
+    return value
+
+
+def invalidate():
+    """
+    Marks all cached catalogue entries as stale, in this and (through the backend)
+    all other workers. Call it after the change was committed.
+    """
+    _backend.bump(NAMESPACE)
+
+
+def catalogue_cache_metrics() -> dict:
+    """
+    Returns the size and hit rate of the catalogue cache and the current version.
+    """
+    return {**_entries.metrics(), "version": _backend.version(NAMESPACE)}
@@ -0,0 +1,339 @@
+"""
+customer_import.py
+
+Bulk import of customers from CSV or JSON Lines files, e.g. when a new café is onboarded.
+
+The file is parsed and validated row by row while it is read, so it is never held in
+memory as a whole. Valid rows are collected into batches. The bcrypt hashes of a batch
+are computed on a process pool, since hashing holds the GIL, while the previous batch is
+inserted with one executemany statement in its own transaction. Rejected rows are
+reported with their line number and skipped; all other rows are imported.
+
+Uploads through the API run as background jobs, one at a time, on a long-lived pool
+of worker processes. The workers are started with "spawn": forking the multi-threaded
+API process could leave a child waiting on a lock held by a thread that does not exist
+in it. Jobs are kept in memory, so their status is only known to the API process that
+accepted the upload.
+
+Functions:
+    - detect_format: Determine the format of an import file.
+    - read_rows: Parse an import file into rows.
+    - import_customers: Validate, hash and insert all rows of an import file.
+    - start_import: Queue an uploaded import file as a background job.
+    - get_job: Return the status of a background import.
+"""
+
+import csv
+import datetime
+import json
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Set, Tuple
+from uuid import uuid4
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.model import Customer
+from database import SessionLocal
+from schemas.customer import CustomerCreate, CustomerImportError, CustomerImportJob, CustomerImportResult
+from utils.security import hash_password
+import config
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# Rejected rows beyond this number are only counted
+MAX_REPORTED_ERRORS = 1000
+# Finished background imports whose status is kept
+MAX_FINISHED_JOBS = 100
+
+logger = logging.getLogger(__name__)
+
+_jobs: "OrderedDict[str, CustomerImportJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+_job_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="customer-import")
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+
+@dataclass
+class ImportRow:
+    """
+    A parsed row of an import file.
+
+    Attributes:
+        line (int): Line number in the file.
+        data (Optional[dict]): Field values, None if the line could not be parsed.
+        error (Optional[str]): Parse error of the line.
+    """
+    line: int
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class _Errors:
+    def __init__(self):
+        self.failed = 0
+        self.reported: List[CustomerImportError] = []
+
+    def add(self, line: int, email: Optional[str], error: str):
+        self.failed += 1
+        if len(self.reported) < MAX_REPORTED_ERRORS:
+            email = str(email) if email is not None else None
+            self.reported.append(CustomerImportError(line=line, email=email, error=error))
+
+
+def detect_format(filename: Optional[str], fmt: Optional[str] = None) -> str:
+    """
+    Returns the format of an import file, given explicitly or derived from its extension.
+
+    Args:
+        filename (Optional[str]): Name of the file.
+        fmt (Optional[str]): Explicit format, "csv" or "jsonl".
+
+    Returns:
+        str: "csv" or "jsonl".
+
+    Raises:
+        HTTPException: If the format is unknown.
+    """
+    if fmt is None and filename:
+        fmt = next((f for ext, f in FORMATS.items() if filename.lower().endswith(ext)), None)
+    if fmt not in FORMATS.values():
+        raise HTTPException(status_code=400, detail="Import files must be CSV or JSON Lines (.csv, .jsonl)")
+    return fmt
+
+
+def read_rows(stream: Iterable[str], fmt: str) -> Iterator[ImportRow]:
+    """
+    Parses an import file lazily. CSV files need a header row with the field names
+    of CustomerCreate; JSON Lines files hold one object per line.
+
+    Args:
+        stream (Iterable[str]): Lines of the file.
+        fmt (str): "csv" or "jsonl".
+
+    Yields:
+        ImportRow: One parsed row per record.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for data in reader:
+            yield ImportRow(reader.line_num, data)
+        return
+
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            yield ImportRow(line, error=f"Invalid JSON: {e}")
+            continue
+        if isinstance(data, dict):
+            yield ImportRow(line, data)
+        else:
+            yield ImportRow(line, error="Expected a JSON object")
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+
+def _valid_batches(rows: Iterable[ImportRow], batch_size: int, db: Session,
+                   errors: _Errors) -> Iterator[List[Tuple[int, CustomerCreate]]]:
+    """
+    Validates rows and groups the valid ones into batches without emails that are
+    repeated in the file or already registered.
+    """
+    seen: Set[str] = set()
+
+    def registered(batch):
+        emails = [customer.email for _, customer in batch]
+        taken = set(db.scalars(select(Customer.email).where(Customer.email.in_(emails))))
+        for line, customer in batch:
+            if customer.email in taken:
+                errors.add(line, customer.email, "Email already registered")
+        return [(line, customer) for line, customer in batch if customer.email not in taken]
+
+    batch = []
+    for row in rows:
+        if row.error:
+            errors.add(row.line, None, row.error)
+            continue
+        try:
+            customer = CustomerCreate.model_validate(row.data)
+        except ValidationError as e:
+            errors.add(row.line, row.data.get("email"), _describe(e))
+            continue
+        if customer.email in seen:
+            errors.add(row.line, customer.email, "Duplicate email in import file")
+            continue
+        seen.add(customer.email)
+        batch.append((row.line, customer))
+        if len(batch) == batch_size:
+            yield registered(batch)
+            batch = []
+    if batch:
+        yield registered(batch)
+
+
+def _insert(batch: List[Tuple[int, CustomerCreate]], hashes: Iterable[str], db: Session, errors: _Errors) -> int:
+    today = datetime.date.today()
+    rows = [
+        {
+            "id": str(uuid4()),
+            "name": customer.name,
+            "hashed_password": hashed,
+            "email": customer.email,
+            "paymentMethod": customer.paymentMethod,
+            "lastPaid": today,
+            "activated": True,
+            "drinksDrunk": 0,
+            "drinkLog": []
+        }
+        for (_, customer), hashed in zip(batch, hashes)
+    ]
+    if not rows:
+        return 0
+    try:
+        db.execute(insert(Customer), rows)
+        db.commit()
+        return len(rows)
+    except IntegrityError:
+        # An email was registered since the batch was checked; find it row by row.
+        db.rollback()
+
+    imported = 0
+    for (line, customer), row in zip(batch, rows):
+        try:
+            db.execute(insert(Customer), [row])
+            db.commit()
+            imported += 1
+        except IntegrityError:
+            db.rollback()
+            errors.add(line, customer.email, "Email already registered")
+    return imported
+
+
+def _spawn_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _shared_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = _spawn_pool(config.IMPORT_WORKERS)
+        return _hash_pool
+
+
+def import_customers(stream: Iterable[str], fmt: str, db: Session, batch_size: Optional[int] = None,
+                     workers: Optional[int] = None, pool: Optional[Executor] = None) -> CustomerImportResult:
+    """
+    Imports customers from a CSV or JSON Lines file.
+
+    Args:
+        stream (Iterable[str]): Lines of the file.
+        fmt (str): "csv" or "jsonl".
+        db (Session): SQLAlchemy session.
+        batch_size (Optional[int]): Rows per insert transaction, defaults to IMPORT_BATCH_SIZE.
+        workers (Optional[int]): Hashing processes, defaults to IMPORT_WORKERS.
+        pool (Optional[Executor]): Process pool to hash on, defaults to a new pool of
+            `workers` processes that is shut down afterwards.
+
+    Returns:
+        CustomerImportResult: Number of imported customers and the rejected rows.
+    """
+    batch_size = batch_size or config.IMPORT_BATCH_SIZE
+    workers = workers or config.IMPORT_WORKERS
+    if pool is None:
+        with _spawn_pool(workers) as own_pool:
+            return import_customers(stream, fmt, db, batch_size, workers, own_pool)
+
+    errors = _Errors()
+    imported = 0
+    pending = None
+    for batch in _valid_batches(read_rows(stream, fmt), batch_size, db, errors):
+        chunksize = max(1, math.ceil(len(batch) / (workers * 4)))
+        hashes = pool.map(hash_password, [customer.password for _, customer in batch], chunksize=chunksize)
+        if pending:
+            imported += _insert(*pending, db, errors)
+        pending = (batch, hashes)
+    if pending:
+        imported += _insert(*pending, db, errors)
+
+    reported = sorted(errors.reported, key=lambda error: error.line)
+    return CustomerImportResult(imported=imported, failed=errors.failed, errors=reported)
+
+
+def _update_job(job_id: str, **changes):
+    with _jobs_lock:
+        _jobs[job_id] = _jobs[job_id].model_copy(update=changes)
+
+
+def _run_job(job_id: str, path: str, fmt: str):
+    _update_job(job_id, status="running")
+    db = SessionLocal()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            result = import_customers(stream, fmt, db, pool=_shared_pool())
+        _update_job(job_id, status="done", result=result)
+    except Exception as e:
+        logger.exception("Customer import %s failed", job_id)
+        _update_job(job_id, status="failed", error=str(e))
+    finally:
+        db.close()
+        os.remove(path)
+
+
+def start_import(upload: BinaryIO, fmt: str) -> CustomerImportJob:
+    """
+    Copies an uploaded import file to a temporary file and queues its import. Imports
+    run one after another in a background thread, so the request returns right away.
+
+    Args:
+        upload (BinaryIO): The uploaded file.
+        fmt (str): "csv" or "jsonl".
+
+    Returns:
+        CustomerImportJob: The queued job.
+    """
+    with tempfile.NamedTemporaryFile(prefix="customer-import-", suffix=f".{fmt}", delete=False) as f:
+        shutil.copyfileobj(upload, f)
+    job = CustomerImportJob(id=str(uuid4()), status="queued")
+    with _jobs_lock:
+        _jobs[job.id] = job
+        finished = [job_id for job_id, j in _jobs.items() if j.status in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del _jobs[job_id]
+    _job_worker.submit(_run_job, job.id, f.name, fmt)
+    return job
+
+
+def get_job(job_id: str) -> CustomerImportJob:
+    """
+    Returns the status of a background import, with its result once it is done.
+
+    Args:
+        job_id (str): ID returned by start_import.
+
+    Returns:
+        CustomerImportJob: The job.
+
+    Raises:
+        HTTPException: If the job is unknown to this process.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
@@ -5,24 +5,38 @@ Provides business logic for managing customers in the backend system.
 
 Includes functionality to:
 - Create a new customer
-- Retrieve a customer profile
+- Retrieve a customer profile, also with ETag and Last-Modified for conditional GETs
 - Update customer details
+- Record redeemed drinks and page through the drink history
 - Fetch customer consumption statistics
+
+Registration, profile updates and the read functions run on an AsyncSession
+(`_async` suffix where a sync variant exists as well).
 """
 import datetime
+from typing import List, Optional
 from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from models.model import Customer
-from models.utility_crud import get_by_id
-from schemas.customer import CustomerCreate, CustomerOut, CustomerStats
-from utils.security import hash_password
+from models.model import Abo, AboModel, Customer, DrinkEvent
+from models.utility_crud import get_by_id, get_by_id_async
+from schemas.customer import CustomerCreate, CustomerOut, CustomerStats, CustomerUpdate
+from schemas.drink import DrinkCreate, DrinkEventOut
+from schemas.token import TokenData
+from services import quota_service, report_cache, rollup_service
+from utils import etag, pagination
+from utils.security import hash_password_async
+
+# Number of most recent drinks included in the statistics overview
+RECENT_DRINKS = 20
 
-def create_customer(db: Session, customer: CustomerCreate) -> Customer:
+async def create_customer(db: AsyncSession, customer: CustomerCreate) -> Customer:
     """
     Create a new customer account and store it in the database.
 
     Args:
-        db (Session): SQLAlchemy session for database interaction.
+        db (AsyncSession): Async SQLAlchemy session for database interaction.
         customer (CustomerCreate): Pydantic schema with customer registration details.
 
     Returns:
@@ -30,15 +44,15 @@ def create_customer(db: Session, customer: CustomerCreate) -> Customer:
     """
     db_customer = Customer(
         name=customer.name,
-        hashed_password=hash_password(customer.password),
+        hashed_password=await hash_password_async(customer.password),
         email=customer.email,
         paymentMethod=customer.paymentMethod,
         lastPaid=datetime.date.today(),
         activated=True
     )
     db.add(db_customer)
-    db.commit()
-    db.refresh(db_customer)
+    await db.commit()
+    await db.refresh(db_customer)
     return db_customer
 
 
@@ -56,14 +70,77 @@ def overview(ida: str, db: Session) -> CustomerOut:
     return get_by_id(Customer, ida, db)
 
 
-def patch_customer(ida: str, customer: CustomerCreate, db: Session) -> CustomerOut:
+async def overview_async(ida: str, db: AsyncSession) -> CustomerOut:
     """
-    Update a customer's account information.
+    Retrieve a customer's profile by ID using an async session.
+
+    Args:
+        id (str): The customer's unique identifier.
+        db (AsyncSession): Async SQLAlchemy database session.
+
+    Returns:
+        CustomerOut: Public-facing customer profile data.
+    """
+    return await get_by_id_async(Customer, ida, db)
+
+
+def _overview_query(ida: str):
+    return select(*pagination.projection(Customer, CustomerOut), Customer.version, Customer.updated_at).where(
+        Customer.id == ida
+    )
+
+
+def _versioned(row) -> etag.Versioned:
+    if row is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return etag.Versioned(row, etag.from_versions(row.id, row.version, row.updated_at), row.updated_at)
+
+
+def overview_versioned(ida: str, db: Session) -> etag.Versioned:
+    """
+    Retrieve a customer's profile by ID together with its ETag and Last-Modified time,
+    derived from the customer's row version. Only the columns of CustomerOut are selected.
+
+    Args:
+        id (str): The customer's unique identifier.
+        db (Session): SQLAlchemy database session.
+
+    Returns:
+        Versioned: The profile row and its validators.
+
+    Raises:
+        HTTPException: If the customer does not exist.
+    """
+    return _versioned(db.execute(_overview_query(ida)).first())
+
+
+async def overview_versioned_async(ida: str, db: AsyncSession) -> etag.Versioned:
+    """
+    Retrieve a customer's profile by ID together with its ETag and Last-Modified time,
+    using an async session.
+
+    Args:
+        id (str): The customer's unique identifier.
+        db (AsyncSession): Async SQLAlchemy database session.
+
+    Returns:
+        Versioned: The profile row and its validators.
+
+    Raises:
+        HTTPException: If the customer does not exist.
+    """
+    return _versioned((await db.execute(_overview_query(ida))).first())
+
+
+async def patch_customer(ida: str, customer: CustomerUpdate, db: AsyncSession) -> CustomerOut:
+    """
+    Update the fields of a customer's account that were sent by the client.
+    The password is only hashed if a new one is supplied.
 
     Args:
         id (str): Unique ID of the customer to update.
-        customer (CustomerCreate): Schema containing updated customer fields.
-        db (Session): SQLAlchemy session.
+        customer (CustomerUpdate): Schema containing the changed customer fields.
+        db (AsyncSession): Async SQLAlchemy session.
 
     Returns:
         CustomerOut: Updated customer profile.
@@ -71,19 +148,21 @@ def patch_customer(ida: str, customer: CustomerCreate, db: Session) -> CustomerO
     Raises:
         HTTPException: If customer ID is invalid.
     """
-    db_customer = get_by_id(Customer, ida, db)
+    db_customer = await get_by_id_async(Customer, ida, db)
 
     if not db_customer:
         raise HTTPException(status_code=401, detail="Invalid user id")
 
-    db_customer.name = customer.name
-    db_customer.hashed_password = hash_password(customer.password)
-    db_customer.email = customer.email
-    db_customer.paymentMethod = customer.paymentMethod
+    changes = customer.model_dump(exclude_unset=True, exclude_none=True)
+    password = changes.pop("password", None)
+    for field, value in changes.items():
+        setattr(db_customer, field, value)
+    if password is not None:
+        db_customer.hashed_password = await hash_password_async(password)
 
-    db.commit()
-    db.refresh(db_customer)
-    return overview(db_customer.id, db)
+    await db.commit()
+    await db.refresh(db_customer)
+    return db_customer
 
 
 def statistics(ida: str, db: Session) -> CustomerStats:
@@ -98,11 +177,141 @@ def statistics(ida: str, db: Session) -> CustomerStats:
         CustomerStats: Structured data about customer's drink activity and status.
     """
     customer = get_by_id(Customer, ida, db)
+    recent = drink_history(ida, db, limit=RECENT_DRINKS)
     out = CustomerStats(
         name=customer.name,
         email=customer.email,
         drinksDrunk=customer.drinksDrunk,
-        drinkLog=customer.drinkLog,
+        drinkLog=[DrinkEventOut.model_validate(event) for event in recent],
         activated=customer.activated
     )
     return out
+
+
+async def statistics_async(ida: str, db: AsyncSession) -> CustomerStats:
+    """
+    Retrieve customer-specific consumption and status statistics using an async session.
+
+    Args:
+        id (str): The customer's ID.
+        db (AsyncSession): Async SQLAlchemy session.
+
+    Returns:
+        CustomerStats: Structured data about customer's drink activity and status.
+    """
+    customer = await get_by_id_async(Customer, ida, db)
+    recent = await drink_history_async(ida, db, limit=RECENT_DRINKS)
+    return CustomerStats(
+        name=customer.name,
+        email=customer.email,
+        drinksDrunk=customer.drinksDrunk,
+        drinkLog=[DrinkEventOut.model_validate(event) for event in recent],
+        activated=customer.activated
+    )
+
+
+def record_drink(ida: str, drink: DrinkCreate, db: Session, token_data: TokenData) -> DrinkEvent:
+    """
+    Record a drink redeemed by a customer at the café of the authenticated employee.
+
+    The drink is appended to the drink_events table, and the customer's lifetime
+    counter and the café's daily rollup are incremented in SQL within the same
+    transaction, so the customer row is never rewritten. Drinks on an Abo are
+    counted against its weekly quota.
+
+    Args:
+        id (str): The customer's ID.
+        drink (DrinkCreate): The drink type and the Abo it is redeemed on.
+        db (Session): SQLAlchemy session.
+        token_data (TokenData): Decoded token of the employee at the counter.
+
+    Returns:
+        DrinkEvent: The newly recorded drink event.
+
+    Raises:
+        HTTPException: If the token is not an employee's, the customer does not exist,
+            the Abo does not belong to the customer and café, or its weekly quota is used up.
+    """
+    if token_data.role != "Employee" or not token_data.cafe_id:
+        raise HTTPException(status_code=403, detail="Only employees can record drinks")
+
+    updated = db.query(Customer).filter(Customer.id == ida).update(
+        {Customer.drinksDrunk: func.coalesce(Customer.drinksDrunk, 0) + 1},
+        synchronize_session=False
+    )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
+    timestamp = datetime.datetime.now()
+    model_id = used = None
+    if drink.abo_id:
+        abo = db.query(Abo.model_id, AboModel.amount).outerjoin(AboModel, AboModel.id == Abo.model_id).filter(
+            Abo.id == drink.abo_id,
+            Abo.customer_id == ida,
+            Abo.cafe_id == token_data.cafe_id
+        ).first()
+        if not abo:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Abo is not valid for this customer and café.")
+        model_id = abo.model_id
+        used = quota_service.try_redeem(db, drink.abo_id, *quota_service.week_of(timestamp), abo.amount)
+        if used is None:
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Weekly quota of the Abo is used up")
+
+    event = DrinkEvent(
+        customer_id=ida,
+        cafe_id=token_data.cafe_id,
+        abo_id=drink.abo_id,
+        drink=drink.drink,
+        timestamp=timestamp
+    )
+    db.add(event)
+    rollup_service.record_drink(db, event.cafe_id, event.timestamp.date(), model_id, event.drink)
+    db.commit()
+    db.refresh(event)
+    if used is not None:
+        quota_service.remember(drink.abo_id, *quota_service.week_of(timestamp), used)
+    report_cache.mark_dirty(event.cafe_id, event.timestamp)
+    return event
+
+
+def drink_history(ida: str, db: Session, before: Optional[int] = None, limit: int = 50) -> List[DrinkEvent]:
+    """
+    Retrieve one page of a customer's drink history, newest first.
+
+    Args:
+        id (str): The customer's ID.
+        db (Session): SQLAlchemy session.
+        before (Optional[int]): Only return events with an ID lower than this cursor.
+            Pass the ID of the last event of the previous page to get the next page.
+        limit (int): Maximum number of events to return.
+
+    Returns:
+        List[DrinkEvent]: The drink events of the requested page.
+    """
+    query = db.query(DrinkEvent).filter(DrinkEvent.customer_id == ida)
+    if before is not None:
+        query = query.filter(DrinkEvent.id < before)
+    return query.order_by(DrinkEvent.id.desc()).limit(limit).all()
+
+
+async def drink_history_async(ida: str, db: AsyncSession, before: Optional[int] = None,
+                              limit: int = 50) -> List[DrinkEvent]:
+    """
+    Retrieve one page of a customer's drink history, newest first, using an async session.
+
+    Args:
+        id (str): The customer's ID.
+        db (AsyncSession): Async SQLAlchemy session.
+        before (Optional[int]): Only return events with an ID lower than this cursor.
+        limit (int): Maximum number of events to return.
+
+    Returns:
+        List[DrinkEvent]: The drink events of the requested page.
+    """
+    query = select(DrinkEvent).where(DrinkEvent.customer_id == ida)
+    if before is not None:
+        query = query.where(DrinkEvent.id < before)
+    result = await db.execute(query.order_by(DrinkEvent.id.desc()).limit(limit))
+    return result.scalars().all()
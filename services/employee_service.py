@@ -11,21 +11,26 @@ Functions:
 - get_all_employees
 - patch_employee
 - delete_employee
+
+Registration, updates and the read functions run on an AsyncSession
+(`_async` suffix where a sync variant exists as well).
 """
-from typing import List
+from typing import Optional, Tuple
 from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 from models.model import Employee
-from schemas.employee import EmployeeCreate, EmployeeOut, EmployeeDelete
-from utils.security import hash_password
+from schemas.employee import EmployeeCreate, EmployeeOut, EmployeeDelete, EmployeeUpdate
+from utils import pagination
+from utils.security import hash_password_async
 
-def create_employee(db: Session, data: EmployeeCreate) -> Employee:
+async def create_employee(db: AsyncSession, data: EmployeeCreate) -> Employee:
     """
     Creates a new employee and stores it in the database.
 
     Args:
-        db (Session): The SQLAlchemy database session.
+        db (AsyncSession): The async SQLAlchemy database session.
         data (EmployeeCreate): The data required to create a new employee.
 
     Returns:
@@ -34,13 +39,13 @@ def create_employee(db: Session, data: EmployeeCreate) -> Employee:
     db_employee = Employee(
         id=data.id,
         name=data.name,
-        hashed_password=hash_password(data.password),
+        hashed_password=await hash_password_async(data.password),
         sudo=data.sudo,
         cafe_id=data.cafe_id
     )
     db.add(db_employee)
-    db.commit()
-    db.refresh(db_employee)
+    await db.commit()
+    await db.refresh(db_employee)
     return db_employee
 
 
@@ -64,44 +69,91 @@ def get_employee(cafe_id: str, id: str, db: Session) -> EmployeeOut:
     ).first()
 
 
-def get_all_employees(cafe_id: str, db: Session) -> List[EmployeeOut]:
+async def get_employee_async(cafe_id: str, id: str, db: AsyncSession) -> EmployeeOut:
+    """
+    Retrieves a single employee by cafe ID and employee ID using an async session.
+
+    Args:
+        cafe_id (str): The ID of the café the employee belongs to.
+        id (str): The ID of the employee.
+        db (AsyncSession): The async SQLAlchemy database session.
+
+    Returns:
+        EmployeeOut: The matching employee or None if not found.
+    """
+    result = await db.execute(select(Employee).where(
+        and_(
+            Employee.cafe_id == cafe_id,
+            Employee.id == id
+        )
+    ))
+    return result.scalars().first()
+
+
+def _employee_page(cafe_id: str, cursor: Optional[str], limit: int):
+    stmt = select(*pagination.projection(Employee, EmployeeOut)).where(Employee.cafe_id == cafe_id)
+    return pagination.paginate(stmt, [Employee.id], cursor, limit)
+
+
+def get_all_employees(cafe_id: str, db: Session, cursor: Optional[str] = None,
+                      limit: int = pagination.DEFAULT_LIMIT) -> Tuple[list, Optional[str]]:
     """
-    Retrieves all employees associated with a specific café.
+    Retrieves a page of the employees of a specific café, sorted by ID.
+    Only the columns of EmployeeOut are selected.
 
     Args:
         cafe_id (str): The ID of the café.
         db (Session): The SQLAlchemy database session.
+        cursor (Optional[str]): Cursor of the page, None for the first page.
+        limit (int): Page size.
 
     Returns:
-        List[EmployeeOut]: A list of employees for the given café.
+        Tuple[list, Optional[str]]: The employees of the page and the cursor of the next page.
     """
-    return db.query(Employee).filter(Employee.cafe_id == cafe_id).all()
+    return pagination.page(db.execute(_employee_page(cafe_id, cursor, limit)).all(), ["id"], limit)
 
 
-def patch_employee(model: EmployeeCreate, db: Session) -> EmployeeOut:
+async def get_all_employees_async(cafe_id: str, db: AsyncSession, cursor: Optional[str] = None,
+                                  limit: int = pagination.DEFAULT_LIMIT) -> Tuple[list, Optional[str]]:
     """
-    Updates an existing employee's information.
+    Retrieves a page of the employees of a specific café, sorted by ID, using an async session.
 
     Args:
-        model (EmployeeCreate): The updated employee data.
-        db (Session): The SQLAlchemy database session.
+        cafe_id (str): The ID of the café.
+        db (AsyncSession): The async SQLAlchemy database session.
+        cursor (Optional[str]): Cursor of the page, None for the first page.
+        limit (int): Page size.
+
+    Returns:
+        Tuple[list, Optional[str]]: The employees of the page and the cursor of the next page.
+    """
+    result = await db.execute(_employee_page(cafe_id, cursor, limit))
+    return pagination.page(result.all(), ["id"], limit)
+
+
+async def patch_employee(model: EmployeeUpdate, db: AsyncSession) -> EmployeeOut:
+    """
+    Updates the fields of an existing employee that were sent by the client.
+    The password is only hashed if a new one is supplied.
+
+    Args:
+        model (EmployeeUpdate): The employee's key and the changed fields.
+        db (AsyncSession): The async SQLAlchemy database session.
 
     Returns:
         EmployeeOut: The updated employee record.
     """
-    emp = db.query(Employee).filter(
-        and_(
-            Employee.cafe_id == model.cafe_id,
-            Employee.id == model.id
-        )
-    ).first()
+    emp = await get_employee_async(model.cafe_id, model.id, db)
     if not emp:
         raise HTTPException(404, "User not found")
-    emp.name = model.name
-    emp.sudo = model.sudo
-    emp.hashed_password = hash_password(model.password)
-    db.commit()
-    db.refresh(emp)
+    changes = model.model_dump(exclude_unset=True, exclude_none=True, exclude={"id", "cafe_id"})
+    password = changes.pop("password", None)
+    for field, value in changes.items():
+        setattr(emp, field, value)
+    if password is not None:
+        emp.hashed_password = await hash_password_async(password)
+    await db.commit()
+    await db.refresh(emp)
     return emp
 
 
@@ -0,0 +1,106 @@
+"""
+export_service.py
+
+Streaming exports of the drink history as NDJSON or CSV, per customer or per café.
+
+Events are read through a server-side cursor in chunks of EXPORT_CHUNK_SIZE rows
+(yield_per) and every chunk is encoded and sent before the next one is fetched, so
+memory use does not depend on the size of the history. The exports open their own
+database session, since they outlive the request's dependencies.
+
+Functions:
+    - customer_drinks: Stream the drink history of a customer.
+    - cafe_drinks: Stream the drinks served by a café.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Optional, Sequence
+from sqlalchemy import Select, select
+from database import AsyncSessionLocal
+from models.model import DrinkEvent
+from schemas.drink import DrinkEventOut
+from utils import pagination
+import config
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+COLUMNS = list(DrinkEventOut.model_fields)
+
+
+def _in_range(stmt: Select, start: Optional[date], end: Optional[date]) -> Select:
+    if start is not None:
+        stmt = stmt.where(DrinkEvent.timestamp >= datetime.combine(start, time.min))
+    if end is not None:
+        stmt = stmt.where(DrinkEvent.timestamp < datetime.combine(end + timedelta(days=1), time.min))
+    return stmt
+
+
+def _ndjson(rows: Sequence) -> bytes:
+    return "".join(
+        json.dumps(row._asdict(), default=datetime.isoformat, ensure_ascii=False) + "\n" for row in rows
+    ).encode()
+
+
+def _csv(rows: Sequence, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def _stream(stmt: Select, fmt: str) -> AsyncIterator[bytes]:
+    if fmt == "csv":
+        # The header is sent even if there are no events
+        yield _csv([], header=True)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=config.EXPORT_CHUNK_SIZE))
+        async for rows in result.partitions():
+            yield _ndjson(rows) if fmt == "ndjson" else _csv(rows, header=False)
+
+
+def customer_drinks(customer_id: str, fmt: str, start: Optional[date] = None,
+                    end: Optional[date] = None) -> AsyncIterator[bytes]:
+    """
+    Streams the drink history of a customer, oldest first.
+
+    Args:
+        customer_id (str): ID of the customer.
+        fmt (str): "ndjson" or "csv".
+        start (Optional[date]): First day to export, defaults to the first drink.
+        end (Optional[date]): Last day to export (inclusive), defaults to today.
+
+    Returns:
+        AsyncIterator[bytes]: Chunks of the encoded export.
+    """
+    stmt = (
+        select(*pagination.projection(DrinkEvent, DrinkEventOut))
+        .where(DrinkEvent.customer_id == customer_id)
+        .order_by(DrinkEvent.id)
+    )
+    return _stream(_in_range(stmt, start, end), fmt)
+
+
+def cafe_drinks(cafe_id: str, fmt: str, start: Optional[date] = None,
+                end: Optional[date] = None) -> AsyncIterator[bytes]:
+    """
+    Streams the drinks served by a café, in the order they were served.
+
+    Args:
+        cafe_id (str): ID of the café.
+        fmt (str): "ndjson" or "csv".
+        start (Optional[date]): First day to export, defaults to the first drink.
+        end (Optional[date]): Last day to export (inclusive), defaults to today.
+
+    Returns:
+        AsyncIterator[bytes]: Chunks of the encoded export.
+    """
+    stmt = (
+        select(*pagination.projection(DrinkEvent, DrinkEventOut))
+        .where(DrinkEvent.cafe_id == cafe_id)
+        .order_by(DrinkEvent.timestamp)
+    )
+    return _stream(_in_range(stmt, start, end), fmt)
@@ -0,0 +1,133 @@
+"""
+quota_service.py
+
+Enforces the weekly drink quota of Abos: an Abo allows AboModel.amount drinks per ISO
+week, no quota if amount is not set.
+
+Redeemed drinks are counted per Abo and week in abo_week_usage. A redemption increments
+its counter with one conditional upsert that only succeeds while the quota is not used
+up, so concurrent redemptions can never exceed it. Counters of recently used Abos are
+cached in memory after commit. Counters only grow within a week, so a cached counter
+that reached the quota safely rejects a redemption without touching the database.
+
+Functions:
+    - week_of: ISO year and week of a timestamp.
+    - try_redeem: Count drinks against an Abo's weekly quota if it allows them.
+    - remember: Cache a counter after its transaction was committed.
+    - used: Number of drinks redeemed on an Abo in a week.
+    - quota: Weekly quota of an Abo with used and remaining drinks.
+    - quota_cache_metrics: Size and hit rate of the counter cache.
+"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.model import Abo, AboModel, AboWeekUsage
+from schemas.abo import AboQuotaOut
+from models import utility_crud
+from services import report_service
+from utils.token_cache import TokenCache
+import config
+
+# Committed counters keyed by (abo_id, year, week)
+_counters = TokenCache(config.QUOTA_CACHE_SIZE, config.QUOTA_CACHE_TTL)
+
+
+def week_of(timestamp: datetime) -> Tuple[int, int]:
+    """
+    Returns the ISO year and week number of a timestamp.
+    """
+    year, week, _ = timestamp.isocalendar()
+    return year, week
+
+
+def try_redeem(db: Session, abo_id: str, year: int, week: int, amount: Optional[int],
+               drinks: int = 1) -> Optional[int]:
+    """
+    Counts drinks against the weekly quota of an Abo, unless that would exceed it.
+    Runs in the caller's transaction; call remember() after the commit.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        abo_id (str): ID of the Abo.
+        year (int): ISO year of the redemption.
+        week (int): ISO week of the redemption.
+        amount (Optional[int]): Drinks per week of the AboModel, None for no quota.
+        drinks (int): Number of drinks to redeem.
+
+    Returns:
+        Optional[int]: The new counter value, or None if the quota does not allow the drinks.
+    """
+    cached = _counters.get((abo_id, year, week))
+    if amount is not None and cached is not None and cached + drinks > amount:
+        return None
+    keys = {"abo_id": abo_id, "year": year, "week": week}
+    return utility_crud.increment_within(AboWeekUsage, keys, "count", amount, db, drinks)
+
+
+def remember(abo_id: str, year: int, week: int, count: int):
+    """
+    Caches the committed counter of an Abo and week until the week ends.
+    """
+    week_end = report_service.week_bounds(year, week)[1]
+    _counters.put((abo_id, year, week), count, week_end.timestamp())
+
+
+def used(db: Session, abo_id: str, year: int, week: int) -> int:
+    """
+    Returns the number of drinks redeemed on an Abo in a week, from the cache or
+    with a primary key lookup.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        abo_id (str): ID of the Abo.
+        year (int): ISO year.
+        week (int): ISO week number.
+
+    Returns:
+        int: Redeemed drinks.
+    """
+    cached = _counters.get((abo_id, year, week))
+    if cached is not None:
+        return cached
+    count = db.scalar(select(AboWeekUsage.count).where(
+        AboWeekUsage.abo_id == abo_id, AboWeekUsage.year == year, AboWeekUsage.week == week
+    )) or 0
+    remember(abo_id, year, week, count)
+    return count
+
+
+def quota(db: Session, abo_id: str, year: int, week: int) -> AboQuotaOut:
+    """
+    Returns the weekly quota of an Abo and how much of it is used.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        abo_id (str): ID of the Abo.
+        year (int): ISO year.
+        week (int): ISO week number.
+
+    Returns:
+        AboQuotaOut: Quota, used and remaining drinks.
+
+    Raises:
+        HTTPException: If the Abo does not exist or the week is invalid.
+    """
+    report_service.week_bounds(year, week)
+    abo = db.execute(
+        select(Abo.id, AboModel.amount).outerjoin(AboModel, AboModel.id == Abo.model_id).where(Abo.id == abo_id)
+    ).first()
+    if not abo:
+        raise HTTPException(status_code=404, detail="Abo not found")
+    count = used(db, abo_id, year, week)
+    remaining = max(abo.amount - count, 0) if abo.amount is not None else None
+    return AboQuotaOut(abo_id=abo_id, year=year, week=week, amount=abo.amount, used=count, remaining=remaining)
+
+
+def quota_cache_metrics() -> dict:
+    """
+    Returns the size and hit-rate counters of the quota counter cache.
+    """
+    return _counters.metrics()
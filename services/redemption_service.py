@@ -0,0 +1,244 @@
+"""
+redemption_service.py
+
+Records backlogs of drinks that a café's POS redeemed while it was offline.
+
+A batch is validated with a few set-based queries (known client event IDs, customers,
+Abos with their weekly quota, the quota counters of the affected weeks) instead of
+lookups per event, and all accepted drinks are written in a single transaction. Client
+event IDs make uploads idempotent: drinks of a batch that is sent again are reported as
+duplicates together with the ID of the event recorded the first time.
+
+Functions:
+    - record_batch: Record a batch of offline redemptions.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+from fastapi import HTTPException
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.model import Abo, AboModel, AboWeekUsage, Customer, DrinkEvent
+from schemas.drink import DrinkBatch, DrinkBatchItem, DrinkBatchResult
+from schemas.token import TokenData
+from services import quota_service, report_cache, report_service, rollup_service
+
+# Maximum number of values per IN list
+CHUNK_SIZE = 500
+# How far the POS clock may run ahead of the server's
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+# Evaluations of a batch before giving up on concurrent writers
+ATTEMPTS = 3
+
+
+class _QuotaRace(Exception):
+    """
+    Raised when concurrent redemptions used up a quota after the batch read its counters.
+    """
+
+
+class _AboQuota(NamedTuple):
+    customer_id: str
+    model_id: str
+    amount: Optional[int]
+
+
+def _chunks(values: Iterable) -> Iterable[list]:
+    values = list(values)
+    for i in range(0, len(values), CHUNK_SIZE):
+        yield values[i:i + CHUNK_SIZE]
+
+
+def _local(timestamp: datetime) -> datetime:
+    # drink_events stores naive local times
+    return timestamp.astimezone().replace(tzinfo=None) if timestamp.tzinfo else timestamp
+
+
+def _known_events(ids: Iterable[str], cafe_id: str, db: Session) -> Dict[str, int]:
+    known = {}
+    for chunk in _chunks(ids):
+        known.update(db.execute(
+            select(DrinkEvent.client_event_id, DrinkEvent.id)
+            .where(DrinkEvent.cafe_id == cafe_id, DrinkEvent.client_event_id.in_(chunk))
+        ).all())
+    return known
+
+
+def _existing_customers(ids: Iterable[str], db: Session) -> set:
+    found = set()
+    for chunk in _chunks(ids):
+        found.update(db.scalars(select(Customer.id).where(Customer.id.in_(chunk))))
+    return found
+
+
+def _abo_quotas(ids: Iterable[str], cafe_id: str, db: Session) -> Dict[str, _AboQuota]:
+    quotas = {}
+    for chunk in _chunks(ids):
+        rows = db.execute(
+            select(Abo.id, Abo.customer_id, Abo.model_id, AboModel.amount)
+            .outerjoin(AboModel, AboModel.id == Abo.model_id)
+            .where(Abo.id.in_(chunk), Abo.cafe_id == cafe_id)
+        )
+        quotas.update((abo_id, _AboQuota(*rest)) for abo_id, *rest in rows)
+    return quotas
+
+
+def _used_quota(events: Sequence[DrinkBatchItem], db: Session) -> Counter:
+    """
+    Reads the weekly quota counters of all Abos and weeks that the batch touches.
+    """
+    wanted = {(event.abo_id, *quota_service.week_of(event.timestamp)) for event in events}
+    used = Counter()
+    for chunk in _chunks({abo_id for abo_id, _, _ in wanted}):
+        rows = db.execute(
+            select(AboWeekUsage.abo_id, AboWeekUsage.year, AboWeekUsage.week, AboWeekUsage.count)
+            .where(AboWeekUsage.abo_id.in_(chunk))
+        )
+        for abo_id, year, week, count in rows:
+            if (abo_id, year, week) in wanted:
+                used[(abo_id, year, week)] = count
+    return used
+
+
+def _record(items: List[DrinkBatchItem], cafe_id: str, db: Session) -> List[DrinkBatchResult]:
+    events = [item.model_copy(update={"timestamp": _local(item.timestamp)}) for item in items]
+    known = _known_events({e.client_event_id for e in events}, cafe_id, db)
+    customers = _existing_customers({e.customer_id for e in events}, db)
+    quotas = _abo_quotas({e.abo_id for e in events if e.abo_id}, cafe_id, db)
+    latest = datetime.now() + MAX_CLOCK_SKEW
+
+    results: Dict[int, DrinkBatchResult] = {}
+
+    def reject(position: int, error: str):
+        results[position] = DrinkBatchResult(
+            client_event_id=events[position].client_event_id, status="rejected", error=error
+        )
+
+    seen = set()
+    candidates = []
+    for position, event in enumerate(events):
+        quota = quotas.get(event.abo_id)
+        if event.client_event_id in known:
+            results[position] = DrinkBatchResult(
+                client_event_id=event.client_event_id, status="duplicate", event_id=known[event.client_event_id]
+            )
+        elif event.client_event_id in seen:
+            reject(position, "client_event_id occurs more than once in the batch")
+        elif event.customer_id not in customers:
+            reject(position, "Customer not found")
+        elif event.timestamp > latest:
+            reject(position, "Timestamp lies in the future")
+        elif event.abo_id and (quota is None or quota.customer_id != event.customer_id):
+            reject(position, "Abo is not valid for this customer and café.")
+        else:
+            candidates.append(position)
+        seen.add(event.client_event_id)
+
+    # Drinks count against the weekly quota in the order they were served
+    used = _used_quota([events[p] for p in candidates if events[p].abo_id], db)
+    redeemed = Counter()
+    accepted = []
+    for position in sorted(candidates, key=lambda p: events[p].timestamp):
+        event = events[position]
+        if event.abo_id:
+            key = (event.abo_id, *quota_service.week_of(event.timestamp))
+            amount = quotas[event.abo_id].amount
+            if amount is not None and used[key] >= amount:
+                reject(position, "Weekly quota of the Abo is used up")
+                continue
+            used[key] += 1
+            redeemed[key] += 1
+        accepted.append(position)
+
+    counters = {}
+    for (abo_id, year, week), drinks in redeemed.items():
+        counters[(abo_id, year, week)] = quota_service.try_redeem(
+            db, abo_id, year, week, quotas[abo_id].amount, drinks
+        )
+        if counters[(abo_id, year, week)] is None:
+            raise _QuotaRace()
+
+    if accepted:
+        rows = [
+            {
+                "customer_id": events[p].customer_id,
+                "cafe_id": cafe_id,
+                "abo_id": events[p].abo_id,
+                "drink": events[p].drink,
+                "timestamp": events[p].timestamp,
+                "client_event_id": events[p].client_event_id,
+            }
+            for p in accepted
+        ]
+        inserted = db.execute(insert(DrinkEvent).returning(DrinkEvent.client_event_id, DrinkEvent.id), rows)
+        event_ids = dict(inserted.all())
+
+        drinks_per_customer = Counter(events[p].customer_id for p in accepted)
+        customers_table = Customer.__table__
+        db.execute(
+            update(customers_table)
+            .where(customers_table.c.id == bindparam("customer_id"))
+            .values(drinksDrunk=func.coalesce(customers_table.c.drinksDrunk, 0) + bindparam("drinks")),
+            [{"customer_id": c, "drinks": n} for c, n in drinks_per_customer.items()]
+        )
+
+        model_ids = {abo_id: quota.model_id for abo_id, quota in quotas.items()}
+        rollups = Counter(
+            (events[p].timestamp.date(), model_ids.get(events[p].abo_id), events[p].drink) for p in accepted
+        )
+        for (day, model_id, drink), count in rollups.items():
+            rollup_service.record_drink(db, cafe_id, day, model_id, drink, count)
+
+        for position in accepted:
+            client_event_id = events[position].client_event_id
+            results[position] = DrinkBatchResult(
+                client_event_id=client_event_id, status="accepted", event_id=event_ids[client_event_id]
+            )
+
+    db.commit()
+    for (abo_id, year, week), count in counters.items():
+        quota_service.remember(abo_id, year, week, count)
+    now = datetime.now()
+    for timestamp in {quota_service.week_of(events[p].timestamp): events[p].timestamp for p in accepted}.values():
+        year, week = quota_service.week_of(timestamp)
+        if report_service.week_bounds(year, week)[1] <= now:
+            # Backfilled drinks of a past week; its final report is outdated
+            report_cache.invalidate(cafe_id, year, week)
+        else:
+            report_cache.mark_dirty(cafe_id, timestamp)
+    return [results[position] for position in range(len(events))]
+
+
+def record_batch(batch: DrinkBatch, db: Session, token_data: TokenData) -> List[DrinkBatchResult]:
+    """
+    Records a backlog of redemptions uploaded by a café's POS in one transaction.
+
+    Events are rejected if the customer does not exist, the Abo does not belong to the
+    customer and café, the Abo's weekly quota (AboModel.amount) is used up, or the
+    timestamp lies in the future. Events whose client_event_id was recorded before are
+    reported as duplicates and not recorded again.
+
+    Args:
+        batch (DrinkBatch): The uploaded redemptions.
+        db (Session): SQLAlchemy session.
+        token_data (TokenData): Decoded token of the employee whose café uploads the batch.
+
+    Returns:
+        List[DrinkBatchResult]: One result per event, in the order of the batch.
+
+    Raises:
+        HTTPException: If the token is not an employee's.
+    """
+    if token_data.role != "Employee" or not token_data.cafe_id:
+        raise HTTPException(status_code=403, detail="Only employees can record drinks")
+
+    for _ in range(ATTEMPTS):
+        try:
+            return _record(batch.events, token_data.cafe_id, db)
+        except (IntegrityError, _QuotaRace):
+            # A concurrent upload or redemption committed first; re-evaluate the batch
+            # against the new state, which reports already recorded events as duplicates.
+            db.rollback()
+    raise HTTPException(status_code=409, detail="Too many concurrent redemptions, please retry")
@@ -0,0 +1,110 @@
+"""
+report_batch.py
+
+Renders the weekly reports of all cafés in parallel on a process pool. Rendering a PDF
+with ReportLab is CPU bound and holds the GIL, so threads would not help.
+
+Reports are written into the report cache with an atomic rename, so a finished report
+of a closed week doubles as the checkpoint: an interrupted run can simply be restarted
+and skips every café whose final report already exists.
+
+Functions:
+    - previous_week: ISO year and week of the last closed week.
+    - run: Render the reports of all (or selected) cafés for one week.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterator, List, Optional, Tuple
+from database import SessionLocal, engine
+from models.model import Cafe
+from services import report_cache
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """
+    Outcome of rendering the report of one café.
+
+    Attributes:
+        cafe_id (str): ID of the café.
+        status (str): "rendered", "skipped" (final report already existed) or "failed".
+        seconds (float): Wall time spent on this café inside its worker.
+        error (Optional[str]): Error message if the render failed.
+    """
+    cafe_id: str
+    status: str
+    seconds: float
+    error: Optional[str] = None
+
+
+def previous_week() -> Tuple[int, int]:
+    """
+    Returns the ISO year and week of last week, the default target of the weekly job.
+
+    Returns:
+        Tuple[int, int]: ISO year and week.
+    """
+    year, week, _ = (date.today() - timedelta(days=7)).isocalendar()
+    return year, week
+
+
+def _init_worker():
+    # Connections inherited from the parent process must not be shared with it.
+    engine.dispose(close=False)
+
+
+def _render_cafe(cafe_id: str, year: int, week: int, force: bool) -> BatchResult:
+    start = time.perf_counter()
+    key = (cafe_id, year, week)
+    if not force and report_cache.load_final(key):
+        return BatchResult(cafe_id, "skipped", time.perf_counter() - start)
+
+    db = SessionLocal()
+    try:
+        report_cache.render(key, db)
+        return BatchResult(cafe_id, "rendered", time.perf_counter() - start)
+    except Exception as e:
+        return BatchResult(cafe_id, "failed", time.perf_counter() - start, str(e))
+    finally:
+        db.close()
+
+
+def _all_cafe_ids() -> List[str]:
+    db = SessionLocal()
+    try:
+        return [cafe_id for (cafe_id,) in db.query(Cafe.id).order_by(Cafe.id)]
+    finally:
+        db.close()
+
+
+def run(year: int, week: int, workers: Optional[int] = None, cafe_ids: Optional[List[str]] = None,
+        force: bool = False) -> Iterator[BatchResult]:
+    """
+    Renders the weekly reports of the given cafés, yielding each result as it completes.
+
+    If the run is interrupted, pending cafés are cancelled; finished reports stay in
+    the cache and are skipped by the next run.
+
+    Args:
+        year (int): ISO year.
+        week (int): ISO week number.
+        workers (Optional[int]): Number of worker processes, defaults to the CPU count.
+        cafe_ids (Optional[List[str]]): Cafés to render, defaults to all cafés.
+        force (bool): Re-render reports that are already final.
+
+    Yields:
+        BatchResult: The outcome per café, in completion order.
+    """
+    cafe_ids = cafe_ids if cafe_ids is not None else _all_cafe_ids()
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        futures = [executor.submit(_render_cafe, cafe_id, year, week, force) for cafe_id in cafe_ids]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
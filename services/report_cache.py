@@ -0,0 +1,186 @@
+"""
+report_cache.py
+
+Cache of rendered weekly report PDFs, keyed by café and ISO week.
+
+Every artifact is stored below 'reports/' together with the SHA-256 hash of its content,
+which is used as ETag. Reports of closed weeks are rendered once and never again. Reports
+of the current week are re-rendered by a single background worker whenever new drinks
+are recorded, so requests are always answered from the cache without rendering.
+
+Functions:
+    - get_report: Return the cached artifact of a café and week, rendering it on a cold miss.
+    - render: Render a report into the cache.
+    - load_final: Return the final artifact of a closed week from disk, if present.
+    - mark_dirty: Schedule re-rendering of a café's current report after a new drink.
+    - invalidate: Drop the report of a closed week after drinks were added to it later.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from services import report_service
+from utils import etag as etag_utils
+
+ReportKey = Tuple[str, int, int]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ReportArtifact:
+    """
+    A rendered weekly report.
+
+    Attributes:
+        path (str): Location of the PDF file.
+        etag (str): Quoted SHA-256 hash of the file content.
+        closed (bool): Whether the week is over and the report is final.
+    """
+    path: str
+    etag: str
+    closed: bool
+
+
+_artifacts: Dict[ReportKey, ReportArtifact] = {}
+_pending: Set[ReportKey] = set()
+_lock = threading.Lock()
+_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-cache")
+
+
+def _content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return etag_utils.quote(digest.hexdigest())
+
+
+def _week_end(key: ReportKey) -> datetime:
+    _, year, week = key
+    return report_service.week_bounds(year, week)[1]
+
+
+def render(key: ReportKey, db: Session) -> ReportArtifact:
+    """
+    Renders a report into a temporary file and atomically swaps it into place,
+    so concurrent readers never see a half-written PDF.
+    """
+    cafe_id, year, week = key
+    rendered_at = datetime.now()
+    path = report_service.report_path(cafe_id, year, week)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    report = report_service.weekly_report_data(cafe_id, year, week, db)
+    report_service.render_weekly_report_pdf(report, tmp_path)
+    os.replace(tmp_path, path)
+
+    artifact = ReportArtifact(path, _content_hash(path), rendered_at >= _week_end(key))
+    with _lock:
+        _artifacts[key] = artifact
+    return artifact
+
+
+def load_final(key: ReportKey) -> Optional[ReportArtifact]:
+    """
+    Returns the artifact of a closed week that was rendered after the week ended,
+    e.g. by an earlier process or the batch job, or None.
+    """
+    path = report_service.report_path(*key)
+    if not os.path.exists(path):
+        return None
+    if datetime.fromtimestamp(os.path.getmtime(path)) < _week_end(key):
+        return None
+    artifact = ReportArtifact(path, _content_hash(path), True)
+    with _lock:
+        _artifacts[key] = artifact
+    return artifact
+
+
+def get_report(cafe_id: str, year: int, week: int, db: Session) -> ReportArtifact:
+    """
+    Returns the cached report of a café and week.
+
+    Only the very first request of a café and week renders synchronously. A report
+    of the current week that is being re-rendered is served in its previous version.
+
+    Args:
+        cafe_id (str): ID of the café.
+        year (int): ISO year.
+        week (int): ISO week number.
+        db (Session): SQLAlchemy session used for a cold render.
+
+    Returns:
+        ReportArtifact: The cached artifact.
+    """
+    key = (cafe_id, year, week)
+    with _lock:
+        artifact = _artifacts.get(key)
+
+    if artifact and not artifact.closed and datetime.now() >= _week_end(key):
+        # The week ended since the last render; render the final version once.
+        artifact = None
+    elif artifact and artifact.closed and not os.path.exists(artifact.path):
+        # Invalidated, possibly by another process, after drinks were uploaded late.
+        artifact = None
+
+    return artifact or load_final(key) or render(key, db)
+
+
+def _regenerate(key: ReportKey):
+    with _lock:
+        _pending.discard(key)
+    db = SessionLocal()
+    try:
+        render(key, db)
+    except Exception:
+        logger.exception("Re-rendering report %s failed", key)
+    finally:
+        db.close()
+
+
+def mark_dirty(cafe_id: str, timestamp: datetime):
+    """
+    Schedules re-rendering of the report that covers a newly recorded drink.
+
+    Only reports that are already cached are refreshed; requests that arrive while
+    a render for the same report is queued are coalesced into it.
+
+    Args:
+        cafe_id (str): ID of the café that served the drink.
+        timestamp (datetime): Time of the drink.
+    """
+    year, week, _ = timestamp.isocalendar()
+    key = (cafe_id, year, week)
+    with _lock:
+        if key not in _artifacts or key in _pending:
+            return
+        _pending.add(key)
+    _worker.submit(_regenerate, key)
+
+
+def invalidate(cafe_id: str, year: int, week: int):
+    """
+    Drops the cached report of a week that has already ended, e.g. after a POS uploaded
+    drinks of that week late. The file is removed, so neither this nor any other process
+    serves it as final anymore; the next request renders the report again.
+
+    Args:
+        cafe_id (str): ID of the café.
+        year (int): ISO year.
+        week (int): ISO week number.
+    """
+    key = (cafe_id, year, week)
+    with _lock:
+        _artifacts.pop(key, None)
+    try:
+        os.remove(report_service.report_path(cafe_id, year, week))
+    except FileNotFoundError:
+        pass
@@ -2,34 +2,178 @@
 Module to generate a weekly PDF report for the CoffeeClub system.
 
 This report includes summary statistics, top users, popular drinks, and subscription usage
-for a given café over a specified week.
+for a given café over a specified ISO week. Drink counts are read from the daily
+drink_rollups; only the distinct-customer figures aggregate the week's drink_events.
 """
 
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
+import hashlib
 import os
-from datetime import date, timedelta
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import func, distinct
+from sqlalchemy.orm import Session
+from models.model import Abo, Cafe, Customer, DrinkEvent, DrinkRollup
+from schemas.report import WeeklyReport, TopUser, DrinkCount, AboUsage
+from services import rollup_service
 
-def generate_weekly_report_pdf():
+REPORT_DIR = "reports"
+TOP_N = 3
+
+
+def current_week() -> Tuple[int, int]:
+    """
+    Returns the ISO year and week number of today.
+
+    Returns:
+        Tuple[int, int]: ISO year and week.
+    """
+    year, week, _ = date.today().isocalendar()
+    return year, week
+
+
+def week_bounds(year: int, week: int) -> Tuple[datetime, datetime]:
+    """
+    Returns the start (Monday 00:00, inclusive) and end (next Monday 00:00, exclusive)
+    of an ISO week.
+
+    Args:
+        year (int): ISO year.
+        week (int): ISO week number.
+
+    Returns:
+        Tuple[datetime, datetime]: Start and end of the week.
+
+    Raises:
+        HTTPException: If the week does not exist in the given year.
+    """
+    try:
+        start = datetime.fromisocalendar(year, week, 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid ISO week")
+    return start, start + timedelta(days=7)
+
+
+def weekly_report_data(cafe_id: str, year: int, week: int, db: Session) -> WeeklyReport:
     """
-    Generates a weekly PDF report with dummy data and saves it to 'reports/weekly_report.pdf'.
+    Computes the weekly report figures of a café with set-based SQL aggregates.
+
+    Args:
+        cafe_id (str): ID of the café.
+        year (int): ISO year of the report week.
+        week (int): ISO week number.
+        db (Session): SQLAlchemy session.
+
+    Returns:
+        WeeklyReport: The aggregated report figures.
+
+    Raises:
+        HTTPException: If the café does not exist or the week is invalid.
+    """
+    cafe = db.query(Cafe).filter(Cafe.id == cafe_id).first()
+    if not cafe:
+        raise HTTPException(status_code=404, detail="Café not found")
+
+    start, end = week_bounds(year, week)
+    in_week = (
+        DrinkEvent.cafe_id == cafe_id,
+        DrinkEvent.timestamp >= start,
+        DrinkEvent.timestamp < end,
+    )
+
+    # Drink counts come from the daily rollups: at most 7 days x models x drink types rows.
+    in_days = (
+        DrinkRollup.cafe_id == cafe_id,
+        DrinkRollup.day >= start.date(),
+        DrinkRollup.day < end.date(),
+    )
+    drinks_served = db.query(func.coalesce(func.sum(DrinkRollup.count), 0)).filter(*in_days).scalar()
+
+    popular_drinks = (
+        db.query(DrinkRollup.drink, func.sum(DrinkRollup.count))
+        .filter(*in_days)
+        .group_by(DrinkRollup.drink)
+        .order_by(func.sum(DrinkRollup.count).desc())
+        .limit(TOP_N)
+        .all()
+    )
+
+    model_drinks = dict(
+        db.query(DrinkRollup.model_id, func.sum(DrinkRollup.count))
+        .filter(*in_days, DrinkRollup.model_id != rollup_service.NO_ABO)
+        .group_by(DrinkRollup.model_id)
+        .all()
+    )
+
+    # Distinct customers cannot be summed from rollups and are counted on the
+    # covering (cafe_id, timestamp, ...) index instead.
+    top_counts = (
+        db.query(DrinkEvent.customer_id, func.count(DrinkEvent.id).label("drinks"))
+        .filter(*in_week)
+        .group_by(DrinkEvent.customer_id)
+        .order_by(func.count(DrinkEvent.id).desc())
+        .limit(TOP_N)
+        .subquery()
+    )
+    top_users = (
+        db.query(Customer.name, top_counts.c.drinks)
+        .join(top_counts, Customer.id == top_counts.c.customer_id)
+        .order_by(top_counts.c.drinks.desc())
+        .all()
+    )
+
+    # Every Abo belongs to exactly one customer, so Abo holders can be counted
+    # on the distinct Abos of the week instead of on every drink.
+    week_abos = (
+        db.query(DrinkEvent.abo_id)
+        .filter(*in_week, DrinkEvent.abo_id.isnot(None))
+        .distinct()
+        .subquery()
+    )
+    holders = db.query(Abo.model_id, Abo.customer_id).join(week_abos, Abo.id == week_abos.c.abo_id).subquery()
+    abo_users = db.query(func.count(distinct(holders.c.customer_id))).scalar()
+    model_users = (
+        db.query(holders.c.model_id, func.count(distinct(holders.c.customer_id)))
+        .group_by(holders.c.model_id)
+        .all()
+    )
+    abo_usage = sorted(
+        ((model_id, users, model_drinks.get(model_id, 0)) for model_id, users in model_users),
+        key=lambda usage: usage[2],
+        reverse=True
+    )
+
+    return WeeklyReport(
+        cafe_id=cafe.id,
+        account_holder=cafe.account_holder or cafe.id,
+        year=year,
+        week=week,
+        start_date=start.date(),
+        end_date=(end - timedelta(days=1)).date(),
+        drinks_served=drinks_served,
+        abo_users=abo_users,
+        top_users=[TopUser(name=name, drinks=count) for name, count in top_users],
+        popular_drinks=[DrinkCount(drink=drink, count=count) for drink, count in popular_drinks],
+        abo_usage=[AboUsage(model_id=model_id, users=users, drinks=drinks)
+                   for model_id, users, drinks in abo_usage]
+    )
+
+
+def render_weekly_report_pdf(report: WeeklyReport, pdf_path: str) -> str:
+    """
+    Renders the weekly report figures into a PDF file.
+
+    Args:
+        report (WeeklyReport): The aggregated report figures.
+        pdf_path (str): Target path of the PDF file.
 
     Returns:
         str: The path to the generated PDF file.
     """
-    # Dummy data for example
-    cafe_name = "Caffe Aroma"
-    start_date = date(2025, 6, 10)
-    end_date = start_date + timedelta(days=6)
-    drinks_served = 238
-    abo_users = 46
-    top_users = [("Anna Becker", 18), ("Jonas Müller", 15), ("Lara Schmidt", 14)]
-    popular_drinks = [("Cappuccino", 94), ("Flat White", 66), ("Espresso", 43)]
-    abos = [("Barista Basic", 27, 120), ("Latte Lover", 14, 88), ("Caffeine Unlimited", 5, 30)]
-
-    # File path
-    os.makedirs("reports", exist_ok=True)
-    pdf_path = "reports/weekly_report.pdf"
+    os.makedirs(os.path.dirname(pdf_path) or ".", exist_ok=True)
 
     c = canvas.Canvas(pdf_path, pagesize=A4)
     width, height = A4
@@ -40,36 +184,36 @@ def generate_weekly_report_pdf():
 
     c.setFont("Helvetica", 12)
     y -= 30
-    c.drawString(50, y, f"Café: {cafe_name}")
+    c.drawString(50, y, f"Café: {report.account_holder}")
     y -= 20
-    c.drawString(50, y, f"Week: {start_date.strftime('%d %B %Y')} - {end_date.strftime('%d %B %Y')}")
+    c.drawString(50, y, f"Week: {report.start_date.strftime('%d %B %Y')} - {report.end_date.strftime('%d %B %Y')}")
 
     y -= 30
     c.drawString(50, y, "------------------------------------------------------------")
     y -= 20
     c.drawString(50, y, f"📊 Summary:")
     y -= 20
-    c.drawString(70, y, f"- Total Drinks Served: {drinks_served}")
+    c.drawString(70, y, f"- Total Drinks Served: {report.drinks_served}")
     y -= 20
-    c.drawString(70, y, f"- Unique Aboinhaber:innen Served: {abo_users}")
+    c.drawString(70, y, f"- Unique Aboinhaber:innen Served: {report.abo_users}")
 
     y -= 30
     c.drawString(50, y, "🏆 Top Aboinhaber:innen:")
-    for name, count in top_users:
+    for user in report.top_users:
         y -= 20
-        c.drawString(70, y, f"- {name} – {count} drinks")
+        c.drawString(70, y, f"- {user.name} – {user.drinks} drinks")
 
     y -= 30
     c.drawString(50, y, "🥤 Most Popular Drinks:")
-    for drink, count in popular_drinks:
+    for drink in report.popular_drinks:
         y -= 20
-        c.drawString(70, y, f"- {drink}: {count}")
+        c.drawString(70, y, f"- {drink.drink}: {drink.count}")
 
     y -= 30
     c.drawString(50, y, "📈 Subscription Usage:")
-    for abo, users, total in abos:
+    for abo in report.abo_usage:
         y -= 20
-        c.drawString(70, y, f"- Abo \"{abo}\": {users} users ({total} drinks)")
+        c.drawString(70, y, f"- Abo \"{abo.model_id}\": {abo.users} users ({abo.drinks} drinks)")
 
     y -= 40
     c.drawString(50, y, "------------------------------------------------------------")
@@ -80,3 +224,42 @@ def generate_weekly_report_pdf():
 
     c.save()
     return pdf_path
+
+
+def report_path(cafe_id: str, year: int, week: int) -> str:
+    """
+    Returns the file path of a café's report for an ISO week.
+
+    Args:
+        cafe_id (str): ID of the café.
+        year (int): ISO year.
+        week (int): ISO week number.
+
+    Returns:
+        str: Path below the reports directory.
+    """
+    # The sanitized ID keeps the folder readable, the hash keeps IDs such as
+    # "a/b" and "a_b" apart
+    name = re.sub(r"[^\w.-]", "_", cafe_id).lstrip(".")
+    folder = f"{name}-{hashlib.sha256(cafe_id.encode()).hexdigest()[:8]}"
+    return os.path.join(REPORT_DIR, folder, f"{year}-W{week:02d}.pdf")
+
+
+def generate_weekly_report_pdf(cafe_id: str, db: Session,
+                               year: Optional[int] = None, week: Optional[int] = None) -> str:
+    """
+    Computes the weekly report of a café and saves it as PDF below 'reports/'.
+
+    Args:
+        cafe_id (str): ID of the café.
+        db (Session): SQLAlchemy session.
+        year (Optional[int]): ISO year, defaults to the current week's year.
+        week (Optional[int]): ISO week number, defaults to the current week.
+
+    Returns:
+        str: The path to the generated PDF file.
+    """
+    if year is None or week is None:
+        year, week = current_week()
+    report = weekly_report_data(cafe_id, year, week, db)
+    return render_weekly_report_pdf(report, report_path(cafe_id, year, week))
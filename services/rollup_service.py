@@ -0,0 +1,75 @@
+"""
+rollup_service.py
+
+Maintains the drink_rollups table, which holds the number of drinks per café,
+day, AboModel and drink type.
+
+Functions:
+    - record_drink: Count recorded drinks in their rollup row.
+    - rebuild: Recompute the rollups of one or all cafés from drink_events.
+"""
+
+from datetime import date
+from typing import Optional
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from models.model import Abo, DrinkEvent, DrinkRollup
+from models import utility_crud
+
+# model_id used for drinks that were not redeemed on an Abo
+NO_ABO = ""
+
+
+def record_drink(db: Session, cafe_id: str, day: date, model_id: Optional[str], drink: str, count: int = 1):
+    """
+    Increment the rollup row of a recorded drink. Runs in the caller's transaction,
+    so the rollup is committed together with the drink event.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        cafe_id (str): ID of the café that served the drink.
+        day (date): Day of the drink.
+        model_id (Optional[str]): AboModel of the Abo it was redeemed on, if any.
+        drink (str): Name of the drink type.
+        count (int): Number of such drinks.
+    """
+    utility_crud.increment(
+        DrinkRollup,
+        {"cafe_id": cafe_id, "day": day, "model_id": model_id or NO_ABO, "drink": drink},
+        "count",
+        db,
+        count
+    )
+
+
+def rebuild(db: Session, cafe_id: Optional[str] = None) -> int:
+    """
+    Recompute the rollups from the raw drink events with a single INSERT ... SELECT.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        cafe_id (Optional[str]): Only rebuild this café, defaults to all cafés.
+
+    Returns:
+        int: Number of rollup rows written.
+    """
+    day = func.date(DrinkEvent.timestamp)
+    model_id = func.coalesce(Abo.model_id, NO_ABO)
+    aggregate = (
+        select(DrinkEvent.cafe_id, day, model_id, DrinkEvent.drink, func.count(DrinkEvent.id))
+        .outerjoin(Abo, Abo.id == DrinkEvent.abo_id)
+        .group_by(DrinkEvent.cafe_id, day, model_id, DrinkEvent.drink)
+    )
+    clear = delete(DrinkRollup)
+    if cafe_id is not None:
+        aggregate = aggregate.where(DrinkEvent.cafe_id == cafe_id)
+        clear = clear.where(DrinkRollup.cafe_id == cafe_id)
+
+    db.execute(clear)
+    result = db.execute(
+        insert(DrinkRollup).from_select(
+            ["cafe_id", "day", "model_id", "drink", "count"], aggregate
+        )
+    )
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,326 @@
+"""
+sepa_export.py
+
+SEPA credit transfer files (ISO 20022 pain.001.001.03) for the café payouts of a billed
+week, one credit transfer per café to its IBAN, BIC and account holder.
+
+The XML is written element by element with an incremental writer (XMLGenerator)
+instead of being built as a DOM, so memory stays flat no matter how many cafés are
+paid. Payouts are read through a server-side cursor twice: the first pass checks every
+payout against the constraints of the schema and sums the valid ones for the group
+header, the second writes them in payment batches of SEPA_BATCH_SIZE transactions.
+Only one batch is held in memory, since a batch header carries its own totals. Payouts
+that would make the file invalid (no or malformed IBAN/BIC, no positive amount) are
+left out and reported.
+
+validate() re-reads a written file with a streaming parser, validates it against the
+pain.001.001.03 XSD (SEPA_SCHEMA, shipped in xsd/) and checks the number of transactions
+and control sums of the group header and every batch, which the schema cannot express.
+
+Functions:
+    - write: Write the SEPA file of a billed week.
+    - schema_path: Return the configured pain.001.001.03 XSD.
+    - validate: Check a written SEPA file.
+"""
+
+import hashlib
+import os
+import re
+import unicodedata
+from contextlib import contextmanager
+from functools import lru_cache
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import XMLGenerator
+from lxml import etree
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session
+from models.model import Payout
+from utils.validation import validate_bic_format, validate_iban_format
+import config
+
+NAMESPACE = "urn:iso:std:iso:20022:tech:xsd:pain.001.001.03"
+CURRENCY = "EUR"
+
+# Characters of the SEPA basic Latin character set; others are transliterated or replaced
+_DISALLOWED = re.compile(r"[^A-Za-z0-9/\-?:().,'+ ]")
+_TRANSLITERATION = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "Ä": "Ae", "Ö": "Oe", "Ü": "Ue",
+                                  "ß": "ss", "&": "+", "_": "-"})
+
+
+@dataclass
+class SepaResult:
+    """
+    Outcome of writing a SEPA file.
+
+    Attributes:
+        path (str): Location of the written file.
+        message_id (str): MsgId of the file.
+        transactions (int): Number of credit transfers.
+        amount (Decimal): Sum of all credit transfers (control sum).
+        batches (int): Number of payment batches (PmtInf).
+        skipped (List[Tuple[str, str]]): Café ID and reason of every payout left out.
+    """
+    path: str
+    message_id: str
+    transactions: int = 0
+    amount: Decimal = Decimal("0.00")
+    batches: int = 0
+    skipped: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _text(value: str, length: int) -> str:
+    """
+    Restricts free text to the SEPA character set and the maximum length of its element.
+    """
+    value = unicodedata.normalize("NFKD", value.translate(_TRANSLITERATION))
+    # Decomposed accents are non-ASCII and dropped, leaving the base letter
+    value = value.encode("ascii", "ignore").decode("ascii")
+    return _DISALLOWED.sub(".", value).strip()[:length]
+
+
+def _amount(value: int) -> Decimal:
+    return Decimal(value).quantize(Decimal("0.01"))
+
+
+def _problem(payout: Row) -> Optional[str]:
+    """
+    Returns why a payout cannot be transferred, or None if it is valid.
+    """
+    if not payout.iban or not validate_iban_format(payout.iban):
+        return "Invalid IBAN"
+    if not payout.bic or not validate_bic_format(payout.bic):
+        return "Invalid BIC"
+    if not _text(payout.account_holder or "", 70):
+        return "No account holder"
+    if payout.amount is None or payout.amount <= 0:
+        return "Amount must be positive"
+    return None
+
+
+def _payouts(db: Session, year: int, week: int) -> Iterator[Row]:
+    stmt = (
+        select(Payout.cafe_id, Payout.iban, Payout.bic, Payout.account_holder, Payout.amount, Payout.charges)
+        .where(Payout.year == year, Payout.week == week)
+        .order_by(Payout.cafe_id)
+        .execution_options(yield_per=config.SEPA_BATCH_SIZE)
+    )
+    for rows in db.execute(stmt).partitions():
+        yield from rows
+
+
+class _Writer:
+    """
+    Thin wrapper around XMLGenerator for nested elements with text content.
+    """
+
+    def __init__(self, out: BinaryIO):
+        self._xml = XMLGenerator(out, encoding="UTF-8", short_empty_elements=False)
+
+    def start_document(self):
+        self._xml.startDocument()
+
+    def end_document(self):
+        self._xml.endDocument()
+
+    @contextmanager
+    def element(self, name: str, **attributes: str):
+        self._xml.startElement(name, attributes)
+        yield
+        self._xml.endElement(name)
+
+    def text(self, name: str, value: str, **attributes: str):
+        self._xml.startElement(name, attributes)
+        self._xml.characters(value)
+        self._xml.endElement(name)
+
+
+def _account(xml: _Writer, iban: str):
+    with xml.element("Id"):
+        xml.text("IBAN", iban.replace(" ", "").upper())
+
+
+def _agent(xml: _Writer, bic: str):
+    with xml.element("FinInstnId"):
+        xml.text("BIC", bic.strip().upper())
+
+
+def _batch(xml: _Writer, batch_id: str, payouts: List[Row], year: int, week: int, execution_date: date):
+    with xml.element("PmtInf"):
+        xml.text("PmtInfId", batch_id)
+        xml.text("PmtMtd", "TRF")
+        xml.text("BtchBookg", "true")
+        xml.text("NbOfTxs", str(len(payouts)))
+        xml.text("CtrlSum", str(sum(_amount(p.amount) for p in payouts)))
+        with xml.element("PmtTpInf"):
+            with xml.element("SvcLvl"):
+                xml.text("Cd", "SEPA")
+        xml.text("ReqdExctnDt", execution_date.isoformat())
+        with xml.element("Dbtr"):
+            xml.text("Nm", _text(config.SEPA_DEBTOR_NAME, 70))
+        with xml.element("DbtrAcct"):
+            _account(xml, config.SEPA_DEBTOR_IBAN)
+        with xml.element("DbtrAgt"):
+            _agent(xml, config.SEPA_DEBTOR_BIC)
+        xml.text("ChrgBr", "SLEV")
+        for payout in payouts:
+            with xml.element("CdtTrfTxInf"):
+                with xml.element("PmtId"):
+                    # Deterministic, so a file written twice for a week carries the same IDs
+                    digest = hashlib.sha1(payout.cafe_id.encode()).hexdigest()[:24]
+                    xml.text("EndToEndId", f"{year}W{week:02d}-{digest}")
+                with xml.element("Amt"):
+                    xml.text("InstdAmt", str(_amount(payout.amount)), Ccy=CURRENCY)
+                with xml.element("CdtrAgt"):
+                    _agent(xml, payout.bic)
+                with xml.element("Cdtr"):
+                    xml.text("Nm", _text(payout.account_holder, 70))
+                with xml.element("CdtrAcct"):
+                    _account(xml, payout.iban)
+                with xml.element("RmtInf"):
+                    xml.text("Ustrd", _text(f"Payout {year}-W{week:02d} {payout.cafe_id} ({payout.charges} Abos)", 140))
+
+
+def write(db: Session, year: int, week: int, path: str, execution_date: Optional[date] = None) -> SepaResult:
+    """
+    Writes the SEPA credit transfer file of a billed week's payouts.
+
+    The file is written to a temporary name and renamed when complete, so an
+    interrupted run never leaves a truncated file behind.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        year (int): ISO year of the billed week.
+        week (int): ISO week number of the billed week.
+        path (str): Target file.
+        execution_date (Optional[date]): Requested execution date, defaults to today.
+
+    Returns:
+        SepaResult: Totals of the written file and the payouts that were left out.
+
+    Raises:
+        ValueError: If the debtor account (SEPA_DEBTOR_*) is not configured correctly or
+            the week has no valid payouts.
+    """
+    if not validate_iban_format(config.SEPA_DEBTOR_IBAN) or not validate_bic_format(config.SEPA_DEBTOR_BIC):
+        raise ValueError("SEPA_DEBTOR_IBAN and SEPA_DEBTOR_BIC must be a valid IBAN and BIC")
+    execution_date = execution_date or date.today()
+    created = datetime.now().replace(microsecond=0)
+    result = SepaResult(path, f"CF-{year}W{week:02d}-{created:%Y%m%d%H%M%S}")
+
+    for payout in _payouts(db, year, week):
+        problem = _problem(payout)
+        if problem:
+            result.skipped.append((payout.cafe_id, problem))
+        else:
+            result.transactions += 1
+            result.amount += _amount(payout.amount)
+    if not result.transactions:
+        raise ValueError(f"No valid payouts for {year}-W{week:02d}; run the billing first")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as out:
+        xml = _Writer(out)
+        xml.start_document()
+        with xml.element("Document", xmlns=NAMESPACE):
+            with xml.element("CstmrCdtTrfInitn"):
+                with xml.element("GrpHdr"):
+                    xml.text("MsgId", result.message_id)
+                    xml.text("CreDtTm", created.isoformat())
+                    xml.text("NbOfTxs", str(result.transactions))
+                    xml.text("CtrlSum", str(result.amount))
+                    with xml.element("InitgPty"):
+                        xml.text("Nm", _text(config.SEPA_DEBTOR_NAME, 70))
+
+                batch = []
+                for payout in _payouts(db, year, week):
+                    if _problem(payout):
+                        continue
+                    batch.append(payout)
+                    if len(batch) == config.SEPA_BATCH_SIZE:
+                        result.batches += 1
+                        _batch(xml, f"{result.message_id}-{result.batches}", batch, year, week, execution_date)
+                        batch = []
+                if batch:
+                    result.batches += 1
+                    _batch(xml, f"{result.message_id}-{result.batches}", batch, year, week, execution_date)
+        xml.end_document()
+    os.replace(tmp_path, path)
+    return result
+
+
+def schema_path(schema: Optional[str] = None) -> str:
+    """
+    Returns the pain.001.001.03 XSD that SEPA files are validated against.
+
+    Args:
+        schema (Optional[str]): XSD to use, defaults to SEPA_SCHEMA.
+
+    Returns:
+        str: Path of the XSD.
+
+    Raises:
+        RuntimeError: If no schema is configured or the file does not exist.
+    """
+    schema = schema or config.SEPA_SCHEMA
+    if not schema or not os.path.isfile(schema):
+        raise RuntimeError(f"SEPA_SCHEMA must point to the pain.001.001.03 XSD, got {schema!r}")
+    return schema
+
+
+@lru_cache(maxsize=4)
+def _load_schema(schema: str) -> etree.XMLSchema:
+    return etree.XMLSchema(etree.parse(schema))
+
+
+def validate(path: str, schema: Optional[str] = None):
+    """
+    Checks a SEPA file against the pain.001.001.03 XSD, and its IBANs, BICs, number of
+    transactions and control sums of the group header and every payment batch. The file
+    is validated while it is parsed incrementally, and every checked element is
+    released right away.
+
+    Args:
+        path (str): The SEPA file.
+        schema (Optional[str]): pain.001.001.03 XSD, defaults to SEPA_SCHEMA.
+
+    Raises:
+        RuntimeError: If no schema is configured or it cannot be read.
+        ValueError: If the file is invalid.
+    """
+    schema = schema_path(schema)
+    ns = f"{{{NAMESPACE}}}"
+    header, totals, batch = None, [0, Decimal(0)], [0, Decimal(0)]
+    try:
+        for _, element in etree.iterparse(path, schema=_load_schema(schema)):
+            tag = element.tag.removeprefix(ns)
+            if tag == "IBAN" and not validate_iban_format(element.text or ""):
+                raise ValueError(f"Invalid IBAN {element.text}")
+            if tag == "BIC" and not validate_bic_format(element.text or ""):
+                raise ValueError(f"Invalid BIC {element.text}")
+            if tag == "InstdAmt":
+                amount = Decimal(element.text)
+                if amount <= 0 or amount.as_tuple().exponent < -2:
+                    raise ValueError(f"Invalid amount {element.text}")
+                batch[0] += 1
+                batch[1] += amount
+            elif tag == "GrpHdr":
+                header = (int(element.findtext(f"{ns}NbOfTxs")), Decimal(element.findtext(f"{ns}CtrlSum")))
+            elif tag == "PmtInf":
+                expected = (int(element.findtext(f"{ns}NbOfTxs")), Decimal(element.findtext(f"{ns}CtrlSum")))
+                if expected != tuple(batch):
+                    raise ValueError(f"Totals of {element.findtext(f'{ns}PmtInfId')} do not match its transactions")
+                totals = [totals[0] + batch[0], totals[1] + batch[1]]
+                batch = [0, Decimal(0)]
+            if tag in ("CdtTrfTxInf", "PmtInf"):
+                element.clear()
+                # Cleared elements stay attached to their parent; drop the checked ones before it
+                while (previous := element.getprevious()) is not None and previous.tag == element.tag:
+                    element.getparent().remove(previous)
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"{path} does not match {schema}: {e}")
+    if header is None or header != tuple(totals):
+        raise ValueError("Totals of the group header do not match the transactions")
@@ -0,0 +1,277 @@
+"""
+usage_analytics.py
+
+Usage statistics per café and AboModel: drinks per weekday and hour, quota utilisation,
+churn risk and revenue per drink.
+
+The drink events of the analysed period are loaded once, partition by partition, into
+NumPy arrays of integer codes (café, Abo) and timestamps. Every metric is then a vectorized group-by over these
+arrays (np.bincount on combined group keys), so the cost of the computation grows with
+the number of events only through a few array passes, never a Python loop per event.
+
+Functions:
+    - load: Read the events, Abos and AboModels of a period into a UsageData.
+    - compute: Compute the usage statistics of a UsageData.
+    - usage_report: Load and compute in one step.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import BigInteger, String, cast, func, select, type_coerce
+from sqlalchemy.orm import Session
+from models.model import Abo, AboModel, Cafe, DrinkEvent
+from schemas.report import CafeUsage, ModelUsage, UsageReport
+
+# An Abo without a drink in this many days before the end of the period is at risk of churning
+CHURN_DAYS = 14
+# Rows fetched from the database cursor at a time while loading
+LOAD_CHUNK_SIZE = 50_000
+# Default length of the analysed period
+DEFAULT_DAYS = 28
+
+US_PER_HOUR = 3_600_000_000
+US_PER_DAY = 24 * US_PER_HOUR
+
+
+@dataclass
+class UsageData:
+    """
+    Columns of the drink events of a period, with categorical values as integer codes.
+
+    Attributes:
+        start (date): First day of the period.
+        end (date): Last day of the period (inclusive).
+        cafe_ids (np.ndarray): Café ID per café code.
+        model_ids (np.ndarray): AboModel ID per model code.
+        model_amount (np.ndarray): Weekly quota per model code, NaN for no quota.
+        model_price (np.ndarray): Price per week per model code, NaN if unknown.
+        abo_cafe (np.ndarray): Café code per Abo code.
+        abo_model (np.ndarray): Model code per Abo code.
+        event_cafe (np.ndarray): Café code per event.
+        event_abo (np.ndarray): Abo code per event, -1 for drinks without Abo.
+        event_time (np.ndarray): Local time of each event in microseconds since the epoch.
+    """
+    start: date
+    end: date
+    cafe_ids: np.ndarray
+    model_ids: np.ndarray
+    model_amount: np.ndarray
+    model_price: np.ndarray
+    abo_cafe: np.ndarray
+    abo_model: np.ndarray
+    event_cafe: np.ndarray
+    event_abo: np.ndarray
+    event_time: np.ndarray
+
+
+class _Codes(dict):
+    """
+    Integer codes of IDs; IDs without a code (e.g. Abos of an unknown model, cafés that
+    were deleted) map to -1.
+    """
+
+    def __missing__(self, key) -> int:
+        return -1
+
+
+def _period(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_DAYS - 1)
+    if end < start:
+        raise HTTPException(status_code=400, detail="The period must not end before it starts")
+    return start, end
+
+
+def _timestamp_column(db: Session):
+    """
+    Returns the event time as it is converted fastest in bulk: SQLite stores ISO strings,
+    which NumPy parses in C, while creating a datetime object per row would dominate the
+    load. PostgreSQL returns the microseconds since the epoch.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.extract("epoch", DrinkEvent.timestamp) * 1_000_000, BigInteger)
+    return type_coerce(DrinkEvent.timestamp, String)
+
+
+def load(db: Session, start: Optional[date] = None, end: Optional[date] = None,
+         cafe_id: Optional[str] = None) -> UsageData:
+    """
+    Reads the drink events of a period and all cafés, Abos and AboModels into NumPy arrays.
+
+    Events are fetched in partitions of LOAD_CHUNK_SIZE rows, and every column of a
+    partition is converted into an array in one call. Events of cafés that no longer
+    exist are left out.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        start (Optional[date]): First day, defaults to DEFAULT_DAYS before `end`.
+        end (Optional[date]): Last day (inclusive), defaults to today.
+        cafe_id (Optional[str]): Only load this café.
+
+    Returns:
+        UsageData: The loaded columns.
+
+    Raises:
+        HTTPException: If the period ends before it starts.
+    """
+    start, end = _period(start, end)
+    models = db.execute(select(AboModel.id, AboModel.amount, AboModel.priceperweek).order_by(AboModel.id)).all()
+    model_code = {model_id: code for code, (model_id, _, _) in enumerate(models)}
+
+    cafe_query = select(Cafe.id).order_by(Cafe.id)
+    if cafe_id is not None:
+        cafe_query = cafe_query.where(Cafe.id == cafe_id)
+    cafe_ids = db.scalars(cafe_query).all()
+    cafe_code = _Codes((cafe, code) for code, cafe in enumerate(cafe_ids))
+
+    abos = [
+        abo for abo in db.execute(select(Abo.id, Abo.cafe_id, Abo.model_id).where(Abo.model_id.in_(model_code)))
+        if abo.cafe_id in cafe_code
+    ]
+    abo_code = _Codes((abo.id, code) for code, abo in enumerate(abos))
+    abo_code[None] = -1
+
+    events = (
+        select(DrinkEvent.cafe_id, DrinkEvent.abo_id, _timestamp_column(db))
+        .where(DrinkEvent.timestamp >= datetime.combine(start, time.min),
+               DrinkEvent.timestamp < datetime.combine(end + timedelta(days=1), time.min))
+        .execution_options(yield_per=LOAD_CHUNK_SIZE)
+    )
+    if cafe_id is not None:
+        events = events.where(DrinkEvent.cafe_id == cafe_id)
+    event_cafe, event_abo, event_time = [np.empty(0, np.int32)], [np.empty(0, np.int32)], [np.empty(0, np.int64)]
+    # A Core connection skips the ORM's per-row result processing
+    for rows in db.connection().execute(events).partitions():
+        cafes, abo_ids, times = zip(*rows)
+        event_cafe.append(np.fromiter(map(cafe_code.__getitem__, cafes), np.int32, len(rows)))
+        event_abo.append(np.fromiter(map(abo_code.__getitem__, abo_ids), np.int32, len(rows)))
+        if isinstance(times[0], str):
+            event_time.append(np.array(times, dtype="datetime64[us]").astype(np.int64))
+        else:
+            event_time.append(np.fromiter(times, np.int64, len(rows)))
+    event_cafe, event_abo, event_time = map(np.concatenate, (event_cafe, event_abo, event_time))
+    # Deleting a café leaves its events behind; they have no café to be counted for
+    known = event_cafe >= 0
+    if not known.all():
+        event_cafe, event_abo, event_time = event_cafe[known], event_abo[known], event_time[known]
+
+    return UsageData(
+        start=start,
+        end=end,
+        cafe_ids=np.array(cafe_ids, dtype=object),
+        model_ids=np.array([model_id for model_id, _, _ in models], dtype=object),
+        model_amount=np.array([np.nan if amount is None else amount for _, amount, _ in models], dtype=float),
+        model_price=np.array([np.nan if price is None else price for _, _, price in models], dtype=float),
+        abo_cafe=np.array([cafe_code[abo.cafe_id] for abo in abos], dtype=np.int32),
+        abo_model=np.array([model_code[abo.model_id] for abo in abos], dtype=np.int32),
+        event_cafe=event_cafe,
+        event_abo=event_abo,
+        event_time=event_time,
+    )
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def compute(data: UsageData) -> UsageReport:
+    """
+    Computes the usage statistics of all cafés and AboModels in the data.
+
+    Args:
+        data (UsageData): Columns loaded with load().
+
+    Returns:
+        UsageReport: Statistics per café and per AboModel offered there.
+    """
+    n_cafes, n_models, n_abos = len(data.cafe_ids), len(data.model_ids), len(data.abo_cafe)
+    days = (data.end - data.start).days + 1
+    weeks = days / 7
+    start_day = (data.start - date(1970, 1, 1)).days
+
+    # Drinks per café, weekday (Monday = 0; 1970-01-01 was a Thursday) and hour
+    event_day = data.event_time // US_PER_DAY
+    weekday = (event_day + 3) % 7
+    hour = (data.event_time // US_PER_HOUR) % 24
+    by_hour = np.bincount(data.event_cafe * 168 + weekday * 24 + hour, minlength=n_cafes * 168)
+    by_hour = by_hour.reshape(n_cafes, 7, 24)
+
+    # Abo events, grouped per Abo and per Abo and ISO week (weeks start on Mondays)
+    on_abo = data.event_abo >= 0
+    abo = data.event_abo[on_abo]
+    abo_drinks = np.bincount(abo, minlength=n_abos)
+    week = (event_day[on_abo] + 3) // 7 - (start_day + 3) // 7
+    n_weeks = (start_day + days - 1 + 3) // 7 - (start_day + 3) // 7 + 1
+    per_week = np.bincount(abo * n_weeks + week, minlength=n_abos * n_weeks).reshape(n_abos, n_weeks)
+    amount = data.model_amount[data.abo_model]
+    at_quota = (per_week >= amount[:, None]).sum(axis=1)
+    active_weeks = (per_week > 0).sum(axis=1)
+
+    # Last drink per Abo; Abos without one in the last CHURN_DAYS days are at risk
+    last = np.full(n_abos, np.iinfo(np.int64).min)
+    np.maximum.at(last, abo, data.event_time[on_abo])
+    horizon = (start_day + days - CHURN_DAYS) * US_PER_DAY
+    at_risk = last < horizon
+
+    # Group the per-Abo figures by café and model
+    group = data.abo_cafe * n_models + data.abo_model
+    size = n_cafes * n_models
+    abos = np.bincount(group, minlength=size)
+    drinks = np.bincount(group, weights=abo_drinks, minlength=size)
+    group_amount = np.tile(data.model_amount, n_cafes)
+    group_price = np.tile(data.model_price, n_cafes)
+    utilisation = _ratio(drinks, abos * group_amount * weeks)
+    at_quota_share = _ratio(np.bincount(group, weights=at_quota, minlength=size),
+                            np.bincount(group, weights=active_weeks, minlength=size))
+    at_quota_share[np.isnan(group_amount)] = np.nan
+    churn_risk = _ratio(np.bincount(group, weights=at_risk, minlength=size), abos)
+    revenue_per_drink = _ratio(abos * group_price * weeks, drinks)
+
+    cafes: List[CafeUsage] = []
+    cafe_drinks = by_hour.sum(axis=(1, 2))
+    for c, cafe_id in enumerate(data.cafe_ids):
+        models = [
+            ModelUsage(
+                model_id=data.model_ids[m],
+                abos=int(abos[g]),
+                drinks=int(drinks[g]),
+                quota_utilisation=_optional(utilisation[g]),
+                at_quota_share=_optional(at_quota_share[g]),
+                churn_risk=float(churn_risk[g]),
+                revenue_per_drink=_optional(revenue_per_drink[g]),
+            )
+            for m in range(n_models)
+            for g in [c * n_models + m]
+            if abos[g]
+        ]
+        cafes.append(CafeUsage(cafe_id=cafe_id, drinks=int(cafe_drinks[c]), drinks_by_hour=by_hour[c].tolist(),
+                               models=models))
+    return UsageReport(start_date=data.start, end_date=data.end, days=days, cafes=cafes)
+
+
+def usage_report(db: Session, start: Optional[date] = None, end: Optional[date] = None,
+                 cafe_id: Optional[str] = None) -> UsageReport:
+    """
+    Computes the usage statistics of a period.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        start (Optional[date]): First day, defaults to DEFAULT_DAYS before `end`.
+        end (Optional[date]): Last day (inclusive), defaults to today.
+        cafe_id (Optional[str]): Only analyse this café.
+
+    Returns:
+        UsageReport: Statistics per café and per AboModel.
+
+    Raises:
+        HTTPException: If the period ends before it starts.
+    """
+    return compute(load(db, start, end, cafe_id))
@@ -0,0 +1,123 @@
+"""Helpers for conditional requests (If-None-Match, If-Modified-Since)."""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+from fastapi import Response
+
+
+@dataclass(frozen=True)
+class Versioned:
+    """
+    A representation together with its validators.
+
+    Attributes:
+        value (Any): The representation, e.g. a response schema instance.
+        etag (str): Quoted ETag of the representation.
+        last_modified (Optional[datetime]): Time of the last change, if known.
+    """
+    value: Any
+    etag: str
+    last_modified: Optional[datetime] = None
+
+
+def quote(tag: str) -> str:
+    """
+    Formats a raw tag value as a strong ETag header value.
+
+    Args:
+        tag (str): The raw tag, e.g. a content hash or row version.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    return f'"{tag}"'
+
+
+def from_versions(*parts: Any) -> str:
+    """
+    Derives an ETag from row keys and versions, e.g. (id, version, updated_at) of
+    every row a representation is built from.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    return quote(hashlib.sha256(repr(parts).encode()).hexdigest()[:32])
+
+
+def http_date(timestamp: datetime) -> str:
+    """
+    Formats a naive local or aware timestamp as an HTTP date, e.g. for Last-Modified.
+    """
+    return format_datetime(timestamp.astimezone(timezone.utc), usegmt=True)
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks whether an If-None-Match header matches an ETag (weak comparison).
+
+    Args:
+        if_none_match (Optional[str]): Value of the If-None-Match request header.
+        etag (str): Quoted ETag of the current representation.
+
+    Returns:
+        bool: True if the client's copy is current and a 304 can be sent.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+
+def unmodified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """
+    Checks whether a representation was not changed after an If-Modified-Since date.
+
+    Args:
+        if_modified_since (Optional[str]): Value of the If-Modified-Since request header.
+        last_modified (Optional[datetime]): Time of the last change.
+
+    Returns:
+        bool: True if the client's copy is current and a 304 can be sent.
+    """
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # HTTP dates have a resolution of one second
+    return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+
+
+def conditional(versioned: Versioned, response: Response, if_none_match: Optional[str],
+                if_modified_since: Optional[str]) -> Optional[Response]:
+    """
+    Sets the validators of a representation on the response and answers conditional
+    requests. If-Modified-Since is only evaluated without If-None-Match (RFC 9110).
+
+    Args:
+        versioned (Versioned): The current representation and its validators.
+        response (Response): The response the representation will be sent with.
+        if_none_match (Optional[str]): Value of the If-None-Match request header.
+        if_modified_since (Optional[str]): Value of the If-Modified-Since request header.
+
+    Returns:
+        Optional[Response]: A 304 response if the client's copy is current, otherwise None.
+    """
+    headers = {"ETag": versioned.etag, "Cache-Control": "no-cache"}
+    if versioned.last_modified is not None:
+        headers["Last-Modified"] = http_date(versioned.last_modified)
+    if if_none_match:
+        current = matches(if_none_match, versioned.etag)
+    else:
+        current = unmodified_since(if_modified_since, versioned.last_modified)
+    if current:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
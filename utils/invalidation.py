@@ -0,0 +1,128 @@
+"""
+Backends that share cache invalidations between workers.
+
+A cached data set has a version number. Writers increment it after their change was
+committed; readers compare it with the version their cached entries were loaded under
+and reload stale entries. Backends only store the version numbers, so any store with an
+atomic increment can be plugged in.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from models import utility_crud
+from models.model import CacheVersion
+
+
+class InvalidationBackend(ABC):
+    """
+    Interface of a store of version numbers per namespace.
+    """
+
+    @abstractmethod
+    def version(self, namespace: str) -> int:
+        """
+        Returns the current version of a namespace, 0 if it was never invalidated.
+        """
+
+    async def version_async(self, namespace: str) -> int:
+        """
+        The same as version() for callers on the event loop. Backends that do I/O
+        must override it; the default suits backends that never block.
+        """
+        return self.version(namespace)
+
+    @abstractmethod
+    def bump(self, namespace: str) -> int:
+        """
+        Increments the version of a namespace and returns the new version.
+        """
+
+
+class MemoryBackend(InvalidationBackend):
+    """
+    Versions held in the memory of the process; for a single worker and for tests.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, namespace: str) -> int:
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def bump(self, namespace: str) -> int:
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+
+class DatabaseBackend(InvalidationBackend):
+    """
+    Versions stored in the cache_versions table, shared by all workers using the database.
+
+    A read version is reused for `poll` seconds, so a cache lookup only queries the
+    database once per interval. Invalidations of other workers therefore take effect
+    within `poll` seconds, those of this worker immediately.
+
+    Attributes:
+        engine (Engine): Engine of the database holding cache_versions.
+        poll (float): Seconds a read version is reused.
+        async_engine (Optional[AsyncEngine]): Engine for reads from the event loop; without
+            it, version_async() runs the read in a worker thread.
+    """
+
+    def __init__(self, engine: Engine, poll: float, async_engine: Optional[AsyncEngine] = None):
+        self.engine = engine
+        self.poll = poll
+        self.async_engine = async_engine
+        self._read: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, namespace: str, now: float) -> Optional[int]:
+        with self._lock:
+            read = self._read.get(namespace)
+        if read and now - read[0] < self.poll:
+            return read[1]
+        return None
+
+    def _store(self, namespace: str, now: float, version: Optional[int]) -> int:
+        with self._lock:
+            # Versions only grow; keep a newer one stored by a concurrent bump
+            version = max(version or 0, self._read.get(namespace, (0, 0))[1])
+            self._read[namespace] = (now, version)
+        return version
+
+    def version(self, namespace: str) -> int:
+        now = time.monotonic()
+        recent = self._recent(namespace, now)
+        if recent is not None:
+            return recent
+        with Session(self.engine) as db:
+            version = db.scalar(select(CacheVersion.version).where(CacheVersion.namespace == namespace))
+        return self._store(namespace, now, version)
+
+    async def version_async(self, namespace: str) -> int:
+        now = time.monotonic()
+        recent = self._recent(namespace, now)
+        if recent is not None:
+            return recent
+        if self.async_engine is None:
+            return await run_in_threadpool(self.version, namespace)
+        async with AsyncSession(self.async_engine) as db:
+            version = await db.scalar(select(CacheVersion.version).where(CacheVersion.namespace == namespace))
+        return self._store(namespace, now, version)
+
+    def bump(self, namespace: str) -> int:
+        with Session(self.engine) as db:
+            version = utility_crud.increment_within(CacheVersion, {"namespace": namespace}, "version", None, db)
+            db.commit()
+        with self._lock:
+            self._read[namespace] = (time.monotonic(), version)
+        return version
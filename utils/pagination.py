@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A page is requested with an opaque cursor that encodes the sort key of the last row of
+the previous page, so every page is a single indexed range scan (WHERE key > cursor
+ORDER BY key LIMIT n) no matter how deep the client pages. The cursor of the next page
+is returned in the X-Next-Cursor header and as a Link header with rel="next"; the last
+page has neither.
+
+List queries select only the columns of their response schema (see projection()), so
+rows are returned as plain tuples instead of hydrated ORM entities.
+"""
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple, Type
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+from sqlalchemy import Select, tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def projection(entity, schema: Type[BaseModel]) -> list:
+    """
+    Returns the columns of `entity` that make up the fields of a response schema.
+
+    Args:
+        entity: The mapped ORM class.
+        schema (Type[BaseModel]): The response schema of the list endpoint.
+
+    Returns:
+        list: The mapped columns, in the order of the schema's fields.
+    """
+    return [getattr(entity, field) for field in schema.model_fields]
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """
+    Encodes the sort key of a row as an opaque, URL-safe cursor.
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decodes a cursor created by encode_cursor.
+
+    Args:
+        cursor (str): The cursor sent by the client.
+        size (int): Number of sort columns the cursor must hold.
+
+    Returns:
+        List[Any]: The sort key.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        key = None
+    if not isinstance(key, list) or len(key) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def paginate(stmt: Select, key_columns: Sequence, cursor: Optional[str], limit: int) -> Select:
+    """
+    Restricts a SELECT to the page after `cursor`, sorted by `key_columns`.
+    One row more than the page size is fetched to tell whether a next page exists.
+
+    Args:
+        stmt (Select): The unpaginated query; must select the key columns.
+        key_columns (Sequence): Columns of a unique sort key.
+        cursor (Optional[str]): Cursor of the requested page, None for the first page.
+        limit (int): Page size.
+
+    Returns:
+        Select: The query of the page.
+    """
+    if cursor is not None:
+        key = decode_cursor(cursor, len(key_columns))
+        if len(key_columns) == 1:
+            stmt = stmt.where(key_columns[0] > key[0])
+        else:
+            stmt = stmt.where(tuple_(*key_columns) > tuple_(*key))
+    return stmt.order_by(*key_columns).limit(limit + 1)
+
+
+def page(rows: Sequence, key_names: Sequence[str], limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Splits the rows of a paginated query into the page and the cursor of the next one.
+
+    Args:
+        rows (Sequence): Result of the query built by paginate().
+        key_names (Sequence[str]): Attribute names of the sort key columns.
+        limit (int): Page size.
+
+    Returns:
+        Tuple[list, Optional[str]]: The rows of the page and the next cursor, or None.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor([getattr(last, name) for name in key_names])
+
+
+def link_next(request: Request, response: Response, cursor: Optional[str]):
+    """
+    Adds the X-Next-Cursor and Link headers for the next page, if there is one.
+    """
+    if cursor is None:
+        return
+    response.headers["X-Next-Cursor"] = cursor
+    response.headers["Link"] = f'<{request.url.include_query_params(cursor=cursor)}>; rel="next"'
@@ -0,0 +1,40 @@
+"""
+Counts the SQL statements executed on one or more engines, to catch code paths that
+issue one query per item (N+1) instead of a fixed number of queries.
+"""
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """
+    Context manager that records every statement sent to the given engines while active.
+    Pass `async_engine.sync_engine` to count the statements of an AsyncEngine.
+
+    Attributes:
+        statements (List[str]): SQL of the recorded statements, in execution order.
+    """
+
+    def __init__(self, *engines: Engine):
+        self.engines = engines
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        """
+        Number of recorded statements.
+        """
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._record)
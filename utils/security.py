@@ -1,22 +1,69 @@
 """
 Utility functions for hashing and verifying passwords,
 as well as creating and validating access tokens using JWT.
+
+The hashing schemes and their cost are configured in config.py. Hashes created with
+outdated settings are transparently replaced on the next successful login.
+
+bcrypt is deliberately slow, so the async variants run it on a dedicated, bounded
+thread pool. When all workers are busy and the wait queue is full, requests fail
+fast with 503 instead of piling up and starving every other endpoint.
 """
 
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from pydantic import ValidationError
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
-from schemas.token import Token
+from schemas.token import TokenData
+from utils.token_cache import TokenCache
+import config
 
 # TODO: Use environment variables for production
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 20
 
+
+def make_crypt_context(schemes: Optional[List[str]] = None, bcrypt_rounds: Optional[int] = None,
+                       pbkdf2_rounds: Optional[int] = None) -> CryptContext:
+    """
+    Builds a password hashing context, defaulting to the settings in config.py.
+
+    The first scheme hashes new passwords, all others are deprecated. The cost of each
+    scheme is pinned (min = default = max), so needs_update() flags every stored hash
+    whose scheme or cost differs from the current settings.
+    """
+    schemes = schemes or config.PASSWORD_SCHEMES
+    rounds = {
+        "bcrypt": bcrypt_rounds or config.BCRYPT_ROUNDS,
+        "pbkdf2_sha256": pbkdf2_rounds or config.PBKDF2_ROUNDS,
+    }
+    settings = {}
+    for scheme, value in rounds.items():
+        if scheme in schemes:
+            for policy in ("default_rounds", "min_rounds", "max_rounds"):
+                settings[f"{scheme}__{policy}"] = value
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = make_crypt_context()
+
+# Dedicated pool for bcrypt; at most HASH_WORKERS + HASH_QUEUE_LIMIT calls are admitted
+_hash_executor = ThreadPoolExecutor(max_workers=config.HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(config.HASH_WORKERS + config.HASH_QUEUE_LIMIT)
+_hash_lock = threading.Lock()
+_hash_stats = {"admitted": 0, "running": 0, "completed": 0, "rejected": 0}
+
+# Verified token claims keyed by the SHA-256 digest of the token
+_token_cache = TokenCache(config.TOKEN_CACHE_SIZE, config.TOKEN_CACHE_TTL)
 
 # Dependency to extract token from Authorization header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/employees/login")
@@ -36,6 +83,99 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
+def verify_and_update(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a plaintext password and, if the stored hash uses outdated settings,
+    returns a replacement hash made with the current ones.
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matched, and the new hash or None.
+    """
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+def _count(key: str, delta: int = 1):
+    with _hash_lock:
+        _hash_stats[key] += delta
+
+
+def _run_counted(func, *args):
+    _count("running")
+    try:
+        return func(*args)
+    finally:
+        _count("running", -1)
+
+
+async def _run_hashing(func, *args):
+    """
+    Runs a hashing function on the bcrypt pool without blocking the event loop.
+
+    Raises:
+        HTTPException: 503 if the pool and its wait queue are saturated.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        _count("rejected")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _count("admitted")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, _run_counted, func, *args)
+    finally:
+        _hash_slots.release()
+        _count("admitted", -1)
+        _count("completed")
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hashes a plaintext password on the bounded bcrypt pool.
+    """
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """
+    Verifies a plaintext password on the bounded bcrypt pool.
+    """
+    return await _run_hashing(verify_password, plain, hashed)
+
+
+async def verify_and_update_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Runs verify_and_update on the bounded bcrypt pool.
+    """
+    return await _run_hashing(verify_and_update, plain, hashed)
+
+
+def hashing_metrics() -> dict:
+    """
+    Returns a snapshot of the bcrypt pool: configured size, current queue depth
+    and lifetime counters of completed and rejected calls.
+    """
+    with _hash_lock:
+        stats = dict(_hash_stats)
+    return {
+        "workers": config.HASH_WORKERS,
+        "queue_limit": config.HASH_QUEUE_LIMIT,
+        "running": stats["running"],
+        "queued": stats["admitted"] - stats["running"],
+        "completed": stats["completed"],
+        "rejected": stats["rejected"],
+    }
+
+
+def token_cache_metrics() -> dict:
+    """
+    Returns the size and hit-rate counters of the verified-token cache.
+    """
+    return _token_cache.metrics()
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """
     Creates a JWT access token with optional expiration.
@@ -46,14 +186,23 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_access_token(token: str = Depends(oauth2_scheme)) -> Token:
+def verify_access_token(token: str = Depends(oauth2_scheme)) -> TokenData:
     """
-    Verifies and decodes a JWT token, returns the payload as Token.
+    Verifies and decodes a JWT token, returns the payload as TokenData.
+
+    Verified tokens are cached until their expiry (at most TOKEN_CACHE_TTL seconds),
+    so repeated requests with the same token skip decoding and validation.
     """
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return Token(**payload)
-    except JWTError:
+        data = TokenData(**payload)
+        _token_cache.put(key, data, data.exp)
+        return data
+    except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",